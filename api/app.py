@@ -1,6 +1,7 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app import app  # Import the Flask app from the root directory
+from app import create_app  # Import the Flask app factory from the root directory
 
-# Vercel will use 'app' as the entry point
+# Vercel will use 'app' as the entry point; the schema is only touched when the models changed
+app = create_app()
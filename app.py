@@ -1,10 +1,16 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+import startup  # first, so import time is measured
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, send_file
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import insert, update
+from sqlalchemy.orm import joinedload
 import os
 import json
+import hashlib
+import hmac
 import logging
 from typing import Dict, List, Optional
 
@@ -12,7 +18,8 @@ from typing import Dict, List, Optional
 try:
     from google_ai_service import (
         google_ai_service, 
-        artisan_storytelling_agent
+        artisan_storytelling_agent,
+        marketing_content_agent
     )
     AI_SERVICES_AVAILABLE = True
 except ImportError:
@@ -20,17 +27,50 @@ except ImportError:
     logging.warning("Google AI services not available")
 
 from config import Config
+from jobs import dispatch, enqueue, job_handler
+from product_import import ImportFileError, chunked, detect_format, parse_rows, validate_rows
+from search import autocomplete, install_search_index, search_index_ddl, search_products
+from schema import ensure_schema
+from persona_templates import pack_generation, render_bio, render_product_description
+from llm_cache import MemoryLRUCache
+import fragment_cache
+from fragment_cache import artisan_fragment, artisan_versions, artisans_fragment, invalidate_artisan
+import recommendations
+import engagement
+import translations
+import metrics
+import artisan_stats
+import checkout
+import database
+import identity
+import images
+from streaming import stream_generation, wants_stream
+from recommendations import THEMES as BUNDLE_THEMES, get_index as get_bundle_index, suggest_bundles
+from repository import (
+    get_query_count,
+    load_artisan_products,
+    load_homepage,
+    load_marketplace_page,
+    load_products_by_status
+)
+startup.mark('imports')
 
 app = Flask(__name__, static_folder='static', template_folder='templates', instance_path='/tmp/instance')
 app.config.from_object(Config)
 app.config['SECRET_KEY'] = 'persona-digital-twin-secret-key'
 # Use /tmp/persona.db for Vercel serverless deployment
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:////tmp/persona.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('PERSONA_DATABASE_URL') or 'sqlite:////tmp/persona.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 # Use /tmp/uploads for Vercel serverless deployment
 app.config['UPLOAD_FOLDER'] = '/tmp/uploads'
 
-db = SQLAlchemy(app)
+# SQLite files get WAL, a single writer connection and a read-only pool; replicas serve read-only views
+database.configure(app.config)
+db = SQLAlchemy(app, session_options={'class_': database.RoutingSession})
+database.init_app(app, db)
+
+# Per-route latency, SQL, template and AI upstream timings, exported at /metrics
+metrics.init_app(app)
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -59,6 +99,11 @@ class Artisan(db.Model):
     # Relationships
     persona = db.relationship('Persona', backref='artisan', uselist=False)
     products = db.relationship('Product', backref='artisan', lazy=True)
+    
+    # Keyset index for the paginated marketplace feed
+    __table_args__ = (
+        db.Index('ix_artisan_created_at_id', 'created_at', 'id'),
+    )
 
 class Persona(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -86,6 +131,13 @@ class Product(db.Model):
     cultural_significance = db.Column(db.Text)
     creation_story = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Covers the "artisans with published products" lookup
+    __table_args__ = (
+        db.Index('ix_product_status_artisan_id', 'status', 'artisan_id'),
+        # Keyset pages of one artisan's catalog, newest first
+        db.Index('ix_product_artisan_id_id', 'artisan_id', 'id'),
+    )
 
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -107,80 +159,128 @@ class OrderItem(db.Model):
     # Relationships
     product = db.relationship('Product', backref='order_items')
 
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON object passed to the handler
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))  # Owner allowed to poll the job
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, succeeded, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    result = db.Column(db.Text)  # JSON
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Workers poll for due jobs by (status, run_after)
+    __table_args__ = (
+        db.Index('ix_job_status_run_after', 'status', 'run_after'),
+    )
+
+class EngagementCounter(db.Model):
+    __tablename__ = 'engagement_counter'
+    kind = db.Column(db.String(30), primary_key=True)  # story_like, artisan_follow, bundle_add
+    subject_id = db.Column(db.Integer, primary_key=True)  # artisan or product id, depending on kind
+    count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ArtisanStats(db.Model):
+    __tablename__ = 'artisan_stats'
+    artisan_id = db.Column(db.Integer, db.ForeignKey('artisan.id'), primary_key=True)
+    product_count = db.Column(db.Integer, nullable=False, default=0)
+    published_count = db.Column(db.Integer, nullable=False, default=0)
+    draft_count = db.Column(db.Integer, nullable=False, default=0)
+    sold_out_count = db.Column(db.Integer, nullable=False, default=0)
+    total_value = db.Column(db.Float, nullable=False, default=0)  # sum of product prices
+    stock_total = db.Column(db.Integer, nullable=False, default=0)
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
+    order_revenue = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class FragmentVersion(db.Model):
+    __tablename__ = 'fragment_version'
+    artisan_id = db.Column(db.Integer, primary_key=True)  # no foreign key: deleting an artisan bumps it too
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class SchemaVersion(db.Model):
+    __tablename__ = 'schema_version'
+    id = db.Column(db.Integer, primary_key=True)  # single row, id 1
+    fingerprint = db.Column(db.String(64), nullable=False)  # see schema.fingerprint
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Translation(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    source_hash = db.Column(db.String(64), nullable=False)  # sha256 of the normalized source text
+    target_language = db.Column(db.String(10), nullable=False)
+    translated_text = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('source_hash', 'target_language', name='uq_translation_source_target'),
+    )
+
+# Rendered story cards and homepage sections are cached until their artisan changes
+fragment_cache.configure(app.config)
+fragment_cache.register_model_events(Artisan, Persona, Product)
+app.jinja_env.globals.update(
+    artisan_fragment=artisan_fragment,
+    artisans_fragment=artisans_fragment,
+    engagement_count=engagement.get_count,
+    first_image=images.first_image,
+    image_url=images.image_url,
+    image_srcset=images.image_srcset
+)
+
+# Uploaded images are content-addressed; variants are rendered by a background job
+images.configure(app.config)
+
+# Dashboard numbers are materialized per artisan and updated with each product/order flush
+artisan_stats.register_model_events(Product, OrderItem)
+
+# Session identity claims are cleared when the signed-in user's type or artisan profile changes
+identity.register_model_events(User, Artisan)
+
+# The bundle index is a snapshot of the published catalog; committed writes mark it for a background rebuild
+recommendations.register_model_events(Product, Artisan)
+
+# Translations go through the store; without Google AI only stored translations are served
+translations.configure(google_ai_service if AI_SERVICES_AVAILABLE else None)
+
+startup.mark('models')
+
 # AI Storytelling Agent
 class AIStorytellingAgent:
     @staticmethod
     def generate_artisan_bio(artisan_data, persona_data):
         """Generate AI-powered artisan biography based on persona settings"""
-        tone = persona_data.get('tone', 'friendly')
-        style = persona_data.get('style', 'traditional')
-        depth = persona_data.get('storytelling_depth', 5)
-        
-        # Template-based generation with persona influence
-        templates = {
-            'friendly': {
-                'intro': f"Hi there! I'm {artisan_data['name']}, and I'm passionate about {artisan_data['craft_type']}.",
-                'craft': f"I've been creating beautiful {artisan_data['craft_type']} pieces from my workshop in {artisan_data['location']}.",
-                'story': "Each piece I create tells a story - a blend of traditional techniques passed down through generations and my own creative vision."
-            },
-            'formal': {
-                'intro': f"I am {artisan_data['name']}, a dedicated {artisan_data['craft_type']} artisan.",
-                'craft': f"My workshop in {artisan_data['location']} serves as the foundation for creating exceptional {artisan_data['craft_type']} works.",
-                'story': "My commitment lies in preserving traditional craftsmanship while incorporating contemporary design elements."
-            },
-            'poetic': {
-                'intro': f"In the heart of {artisan_data['location']}, where tradition meets creativity, I am {artisan_data['name']}.",
-                'craft': f"My hands dance with clay and dreams, shaping {artisan_data['craft_type']} that whisper ancient stories.",
-                'story': "Every creation is a poem written in form and texture, a bridge between the wisdom of ancestors and the hopes of tomorrow."
-            },
-            'warm': {
-                'intro': f"Welcome to my world! I'm {artisan_data['name']}, and {artisan_data['craft_type']} is not just my craft - it's my heart's language.",
-                'craft': f"From my cozy workshop in {artisan_data['location']}, I pour love into every piece I create.",
-                'story': "I believe that handmade items carry the warmth of human touch and the joy of creation. Each piece is made with care, just for you."
-            }
-        }
-        
-        template = templates.get(tone, templates['friendly'])
-        
-        bio_parts = [template['intro'], template['craft']]
-        
-        if depth >= 5:
-            bio_parts.append(template['story'])
-        
-        if depth >= 7:
-            cultural_addition = f"My {artisan_data['craft_type']} reflects the rich cultural heritage of {artisan_data['location']}, where this art form has flourished for centuries."
-            bio_parts.append(cultural_addition)
-        
-        if depth >= 9:
-            personal_touch = "When you choose my work, you're not just buying a product - you're becoming part of a story that connects past, present, and future."
-            bio_parts.append(personal_touch)
-        
-        return " ".join(bio_parts)
+        # Templates are compiled once per locale pack; only the chosen one is rendered
+        return render_bio(artisan_data, persona_data)
     
     @staticmethod
     def enrich_product_description(product_data, artisan_persona):
         """Enhance product description using artisan's persona"""
-        base_description = product_data.get('description', '')
-        tone = artisan_persona.tone
-        craft_type = product_data.get('category', 'handcraft')
-        
-        enrichment_styles = {
-            'friendly': f"This beautiful {craft_type} piece is one of my favorites to create! {base_description} I put so much care into every detail, and I hope you'll love it as much as I enjoyed making it.",
-            'formal': f"This {craft_type} represents the finest in traditional craftsmanship. {base_description} Each element has been carefully considered to ensure both aesthetic appeal and functional excellence.",
-            'poetic': f"Behold this {craft_type}, born from inspiration and shaped by skilled hands. {base_description} It carries within it the essence of creativity and the soul of artisanal tradition.",
-            'warm': f"I'm so excited to share this special {craft_type} with you! {base_description} Made with love in my workshop, it's ready to bring joy and beauty to your space."
-        }
-        
-        return enrichment_styles.get(tone, enrichment_styles['friendly'])
+        return render_product_description(product_data, artisan_persona)
+
+# Memo of rendered persona previews, keyed by their ETag
+preview_memo = MemoryLRUCache(Config.PREVIEW_MEMO_MAX_ENTRIES, Config.PREVIEW_MEMO_TTL)
+PREVIEW_PERSONA_FIELDS = ('tone', 'style', 'storytelling_depth', 'language_preference')
+
+def preview_etag(artisan_data, persona_data):
+    """Deterministic content hash of everything that affects a rendered preview bio"""
+    payload = json.dumps({
+        'artisan': artisan_data,
+        'persona': {field: persona_data.get(field) for field in PREVIEW_PERSONA_FIELDS},
+        'templates': pack_generation()
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
 
 # Helper Functions
 def is_logged_in():
     return 'user_id' in session
 
 def get_current_user():
-    if is_logged_in():
-        return User.query.get(session['user_id'])
-    return None
+    return identity.current_user()
 
 def login_required(f):
     def decorated_function(*args, **kwargs):
@@ -190,15 +290,44 @@ def login_required(f):
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+# Marketplace feed helpers
+MAX_FEED_PAGE_SIZE = 50
+PRODUCT_STATUSES = ('draft', 'published', 'sold_out')
+
+def serialize_story_card(artisan, products):
+    """Serialize an artisan and their featured products for the story scroll feed"""
+    return {
+        'id': artisan.id,
+        'name': artisan.name,
+        'craft_type': artisan.craft_type,
+        'location': artisan.location,
+        'bio': artisan.bio,
+        'tone': artisan.persona.tone if artisan.persona else None,
+        'likes': engagement.get_count('story_like', artisan.id),
+        'products': [
+            {'id': product.id, 'name': product.name, 'price': product.price,
+             'image': images.image_url(images.first_image(product.images))}
+            for product in products
+        ]
+    }
+
+@app.after_request
+def add_query_count_header(response):
+    """Expose the per-request SQL statement count in debug and test runs"""
+    if app.debug or app.testing:
+        response.headers['X-Query-Count'] = str(get_query_count())
+    return response
+
 # Routes
 @app.route('/')
+@database.replica_reads()
 def index():
     # Get featured artisans and products for homepage
-    featured_artisans = db.session.query(Artisan).join(Product).filter(Product.status == 'published').limit(6).all()
-    featured_products = Product.query.filter_by(status='published').limit(8).all()
+    featured_artisans, products_by_artisan, featured_products = load_homepage()
     
     return render_template('index.html', 
                          featured_artisans=featured_artisans,
+                         products_by_artisan=products_by_artisan,
                          featured_products=featured_products,
                          current_user=get_current_user())
 
@@ -225,7 +354,7 @@ def register():
         db.session.add(user)
         db.session.commit()
         
-        session['user_id'] = user.id
+        identity.remember(user)
         
         return jsonify({'success': True, 'message': 'Registration successful'})
     
@@ -236,10 +365,10 @@ def login():
     if request.method == 'POST':
         data = request.get_json()
         
-        user = User.query.filter_by(username=data['username']).first()
+        found = identity.find_by_username(data['username'])
         
-        if user and check_password_hash(user.password_hash, data['password']):
-            session['user_id'] = user.id
+        if found and check_password_hash(found.user.password_hash, data['password']):
+            identity.remember(found.user, found.artisan)
             return jsonify({'success': True, 'message': 'Login successful'})
         
         return jsonify({'success': False, 'message': 'Invalid credentials'})
@@ -254,8 +383,7 @@ def logout():
 @app.route('/artisan/onboard')
 @login_required
 def artisan_onboard():
-    user = get_current_user()
-    if user.user_type != 'artisan':
+    if identity.user_type() != 'artisan':
         flash('Access denied. Artisan account required.')
         return redirect(url_for('index'))
     
@@ -304,7 +432,11 @@ def create_artisan_profile():
     artisan.bio = persona.generated_bio
     
     db.session.add(persona)
+    translation_job = translations.enqueue_pretranslation(artisan_ids=[artisan.id])
     db.session.commit()
+    identity.remember(user, artisan)  # the session claims now carry the artisan id
+    if translation_job:
+        dispatch(translation_job)
     
     return jsonify({
         'success': True,
@@ -315,7 +447,7 @@ def create_artisan_profile():
 @app.route('/api/persona/preview', methods=['POST'])
 def preview_persona():
     """Generate live preview of persona bio"""
-    data = request.get_json()
+    data = request.get_json() or {}
     
     artisan_data = {
         'name': data.get('name', 'Sample Artisan'),
@@ -325,76 +457,167 @@ def preview_persona():
     
     persona_data = data.get('persona', {})
     
-    generated_bio = AIStorytellingAgent.generate_artisan_bio(artisan_data, persona_data)
+    # Repeats of the last preview the client already shows cost nothing but a hash
+    etag = preview_etag(artisan_data, persona_data)
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
     
-    return jsonify({
+    generated_bio = preview_memo.get(etag)
+    if generated_bio is None:
+        generated_bio = AIStorytellingAgent.generate_artisan_bio(artisan_data, persona_data)
+        preview_memo.set(etag, generated_bio)
+    
+    response = jsonify({
         'success': True,
         'preview_bio': generated_bio
     })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @app.route('/artisan/dashboard')
 @login_required
 def artisan_dashboard():
-    user = get_current_user()
-    artisan = Artisan.query.filter_by(user_id=user.id).first()
+    artisan = identity.current_artisan()
     
     if not artisan:
         return redirect(url_for('artisan_onboard'))
     
-    products = Product.query.filter_by(artisan_id=artisan.id).all()
-    
+    # Counters come from the stats table; each kanban column shows its newest products
     return render_template('artisan_dashboard.html', 
                          artisan=artisan, 
-                         products=products)
+                         stats=artisan_stats.get_stats(artisan.id),
+                         products_by_status=load_products_by_status(artisan.id, app.config['PRODUCTS_PER_PAGE']),
+                         per_status=app.config['PRODUCTS_PER_PAGE'])
 
 @app.route('/marketplace')
+@database.replica_reads()
 def marketplace():
     view_type = request.args.get('view', 'scroll')  # scroll view only
     
-    artisans_with_products = db.session.query(Artisan).join(Product).filter(Product.status == 'published').all()
+    # Only the first page is rendered server-side; story-scroll.js pulls the rest from the feed
+    artisans_with_products, products_by_artisan, next_cursor = load_marketplace_page(
+        limit=app.config['POSTS_PER_PAGE']
+    )
+    artisan_versions([artisan.id for artisan in artisans_with_products])  # one query for every card's cache key
     
     return render_template('marketplace.html', 
                          artisans_with_products=artisans_with_products,
+                         products_by_artisan=products_by_artisan,
+                         next_cursor=next_cursor,
                          view_type=view_type)
 
-@app.route('/api/products/create', methods=['POST'])
-@login_required
-def create_product():
-    user = get_current_user()
-    artisan = Artisan.query.filter_by(user_id=user.id).first()
+@app.route('/api/marketplace/feed')
+@database.replica_reads()
+def marketplace_feed():
+    """Cursor-paginated marketplace feed for the story scroll"""
+    try:
+        limit = int(request.args.get('limit', app.config['POSTS_PER_PAGE']))
+        limit = max(1, min(limit, MAX_FEED_PAGE_SIZE))
+        
+        artisans, products_by_artisan, next_cursor = load_marketplace_page(
+            request.args.get('cursor'), limit
+        )
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     
-    if not artisan:
-        return jsonify({'success': False, 'message': 'Artisan profile required'})
+    return jsonify({
+        'success': True,
+        'artisans': [serialize_story_card(a, products_by_artisan[a.id]) for a in artisans],
+        'next_cursor': next_cursor
+    })
+
+def engagement_subject_id(data, field):
+    """Positive integer id from a tap payload, or None"""
+    try:
+        subject_id = int(data.get(field))
+    except (TypeError, ValueError):
+        return None
+    return subject_id if subject_id > 0 else None
+
+@app.route('/api/story/like', methods=['POST'])
+def like_story():
+    """Like or unlike an artisan story; counted in memory and flushed in batches"""
+    data = request.get_json() or {}
+    story_id = engagement_subject_id(data, 'story_id')
+    if story_id is None:
+        return jsonify({'success': False, 'message': 'story_id is required'}), 400
     
-    data = request.get_json()
+    likes = engagement.record('story_like', story_id, 1 if data.get('liked', True) else -1)
+    return jsonify({'success': True, 'likes': likes})
+
+@app.route('/api/artisan/follow', methods=['POST'])
+def follow_artisan():
+    """Follow or unfollow an artisan; counted in memory and flushed in batches"""
+    data = request.get_json() or {}
+    artisan_id = engagement_subject_id(data, 'artisan_id')
+    if artisan_id is None:
+        return jsonify({'success': False, 'message': 'artisan_id is required'}), 400
     
-    product = Product(
-        artisan_id=artisan.id,
-        name=data['name'],
-        description=data['description'],
-        price=float(data['price']),
-        stock_quantity=int(data.get('stock_quantity', 1)),
-        category=data.get('category', ''),
-        images=json.dumps(data.get('images', [])),
-        cultural_significance=data.get('cultural_significance', ''),
-        creation_story=data.get('creation_story', '')
-    )
+    followers = engagement.record('artisan_follow', artisan_id, 1 if data.get('following', True) else -1)
+    return jsonify({'success': True, 'followers': followers})
+
+@app.route('/api/bundle/add', methods=['POST'])
+def add_to_bundle():
+    """Count a product being added to a bundle; flushed in batches"""
+    data = request.get_json() or {}
+    product_id = engagement_subject_id(data, 'product_id')
+    if product_id is None:
+        return jsonify({'success': False, 'message': 'product_id is required'}), 400
     
-    # AI-enrich description using persona
-    if artisan.persona:
-        product.ai_enriched_description = AIStorytellingAgent.enrich_product_description(
-            data, artisan.persona
-        )
-    else:
-        product.ai_enriched_description = data['description']
+    bundle_adds = engagement.record('bundle_add', product_id)
+    return jsonify({'success': True, 'bundle_adds': bundle_adds})
+
+@app.route('/api/search')
+@database.replica_reads()
+def search_api():
+    """Ranked full-text search over published products with category and location facets"""
+    query = request.args.get('q', '').strip()
     
-    db.session.add(product)
-    db.session.commit()
+    try:
+        limit = max(1, min(int(request.args.get('limit', app.config['PRODUCTS_PER_PAGE'])), MAX_FEED_PAGE_SIZE))
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'limit and offset must be integers'}), 400
+    
+    results = search_products(query, limit, offset)
+    
+    # Load the page of hits in one query and restore rank order
+    products = Product.query.options(joinedload(Product.artisan)).filter(
+        Product.id.in_(results['product_ids'])
+    ).all() if results['product_ids'] else []
+    rank = {product_id: position for position, product_id in enumerate(results['product_ids'])}
+    products.sort(key=lambda product: rank[product.id])
     
     return jsonify({
         'success': True,
-        'product_id': product.id,
-        'enriched_description': product.ai_enriched_description
+        'query': query,
+        'total': results['total'],
+        'products': [{
+            'id': product.id,
+            'name': product.name,
+            'description': product.ai_enriched_description or product.description,
+            'price': product.price,
+            'category': product.category,
+            'artisan': {
+                'id': product.artisan.id,
+                'name': product.artisan.name,
+                'location': product.artisan.location
+            }
+        } for product in products],
+        'facets': results['facets']
+    })
+
+@app.route('/api/search/autocomplete')
+@database.replica_reads()
+def search_autocomplete_api():
+    """Prefix suggestions for the search box"""
+    return jsonify({
+        'success': True,
+        'suggestions': autocomplete(request.args.get('q', ''))
     })
 
 @app.route('/api/products/<int:product_id>/status', methods=['PUT'])
@@ -419,32 +642,44 @@ def update_product_status():
 @login_required
 def my_products():
     """Artisan's product management page"""
-    if not get_current_user().user_type == 'artisan':
+    if identity.user_type() != 'artisan':
         flash('Access denied. Artisan account required.', 'error')
         return redirect(url_for('index'))
     
     # Get artisan's products
-    artisan = Artisan.query.filter_by(user_id=get_current_user().id).first()
+    artisan = identity.current_artisan()
     if not artisan:
         flash('Artisan profile not found.', 'error')
         return redirect(url_for('index'))
     
-    products = Product.query.filter_by(artisan_id=artisan.id).order_by(Product.created_at.desc()).all()
+    status = request.args.get('status')
+    if status not in PRODUCT_STATUSES:
+        status = None
+    
+    products, next_before = load_artisan_products(
+        artisan.id, status, request.args.get('before', type=int), app.config['PRODUCTS_PER_PAGE']
+    )
     
-    return render_template('my_products.html', products=products, artisan=artisan)
+    return render_template('my_products.html', 
+                         products=products, 
+                         artisan=artisan,
+                         stats=artisan_stats.get_stats(artisan.id),
+                         status=status,
+                         next_before=next_before,
+                         paged=bool(request.args.get('before')))
 
 @app.route('/api/products/create', methods=['POST'])
 @login_required
 def create_product_api():
     """API endpoint to create a new product with AI enhancement"""
-    if not get_current_user().user_type == 'artisan':
+    if identity.user_type() != 'artisan':
         return jsonify({'success': False, 'message': 'Access denied'}), 403
     
     try:
         data = request.get_json()
         
         # Get artisan
-        artisan = Artisan.query.filter_by(user_id=get_current_user().id).first()
+        artisan = identity.current_artisan()
         if not artisan:
             return jsonify({'success': False, 'message': 'Artisan profile not found'}), 404
         
@@ -461,69 +696,122 @@ def create_product_api():
             price=float(data['price']),
             category=data.get('category', artisan.craft_type),
             stock_quantity=int(data.get('stock_quantity', 1)),
+            images=json.dumps(data.get('images', [])),
             cultural_significance=data.get('cultural_significance', ''),
+            creation_story=data.get('creation_story', ''),
             artisan_id=artisan.id,
             status='draft'  # Start as draft
         )
         
-        # Generate AI-enhanced description using Google AI
-        try:
-            from google_ai_service import artisan_storytelling_agent
-            
-            # Create context for AI enhancement
-            context = {
-                'artisan_name': artisan.name,
-                'craft_type': artisan.craft_type,
-                'persona_tone': artisan.persona.tone or 'warm',
-                'cultural_background': artisan.cultural_background or '',
-                'product_name': product.name,
-                'product_description': product.description,
-                'cultural_significance': product.cultural_significance
-            }
-            
-            # Generate enhanced description
-            enhanced_description = artisan_storytelling_agent.generate_product_description(context)
-            if enhanced_description and enhanced_description.strip():
-                product.ai_enriched_description = enhanced_description
-            
-        except Exception as e:
-            print(f"AI enhancement failed: {e}")
-            # Continue without AI enhancement
-        
         db.session.add(product)
+        db.session.flush()  # Get product ID
+        
+        # AI-enhanced description is generated in the background; the job commits with the product
+        job = enqueue('enrich_product_description', {'product_id': product.id}, user_id=artisan.user_id)
         db.session.commit()
+        dispatch(job)
         
         return jsonify({
             'success': True, 
             'message': 'Product created successfully!',
-            'product_id': product.id
+            'product_id': product.id,
+            'enrichment_job_id': job.id
         })
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/products/import', methods=['POST'])
+@login_required
+def import_products_api():
+    """Bulk-create products from an uploaded CSV or JSON Lines file"""
+    if identity.user_type() != 'artisan':
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+    
+    artisan = identity.current_artisan()
+    if not artisan:
+        return jsonify({'success': False, 'message': 'Artisan profile not found'}), 404
+    
+    upload = request.files.get('file')
+    
+    try:
+        if upload:
+            file_format = request.args.get('format') or detect_format(upload.filename, upload.mimetype)
+            stream = upload.stream
+        else:
+            file_format = request.args.get('format') or detect_format(content_type=request.mimetype)
+            stream = request.stream
+        
+        rows = parse_rows(stream, file_format, app.config['IMPORT_MAX_ROWS'])
+        
+    except (ImportFileError, UnicodeDecodeError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    records, errors = validate_rows(rows, artisan.id, artisan.craft_type)
+    
+    # All-or-nothing: report every invalid row and insert none of them
+    if errors:
+        return jsonify({
+            'success': False,
+            'message': f'{len(errors)} of {len(rows)} rows failed validation',
+            'errors': errors
+        }), 400
+    
+    if not records:
+        return jsonify({'success': False, 'message': 'Import file contains no products'}), 400
+    
+    try:
+        # One executemany INSERT for the whole catalog
+        product_ids = db.session.scalars(
+            insert(Product).returning(Product.id, sort_by_parameter_order=True),
+            records
+        ).all()
+        invalidate_artisan(db.session.connection(), artisan.id)  # Bulk inserts skip the mapper events
+        artisan_stats.rebuild(db.session.connection(), [artisan.id])
+        
+        job_ids = [
+            enqueue('enrich_product_batch', {'product_ids': batch}, user_id=artisan.user_id).id
+            for batch in chunked(product_ids, app.config['IMPORT_ENRICH_BATCH_SIZE'])
+        ]
+        db.session.commit()
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+    
+    for job_id in job_ids:
+        dispatch(db.session.get(Job, job_id))
+    
+    return jsonify({
+        'success': True,
+        'message': f'{len(product_ids)} products imported successfully!',
+        'imported': len(product_ids),
+        'product_ids': product_ids,
+        'enrichment_job_ids': job_ids
+    })
+
 @app.route('/api/products/<int:product_id>/status', methods=['PUT'])
 @login_required
 def update_product_status_api(product_id):
     """API endpoint to update product status"""
-    if not get_current_user().user_type == 'artisan':
+    if identity.user_type() != 'artisan':
         return jsonify({'success': False, 'message': 'Access denied'}), 403
     
     try:
         data = request.get_json()
         new_status = data.get('status')
         
-        if new_status not in ['draft', 'published', 'sold_out']:
+        if new_status not in PRODUCT_STATUSES:
             return jsonify({'success': False, 'message': 'Invalid status'}), 400
         
-        # Get artisan
-        artisan = Artisan.query.filter_by(user_id=get_current_user().id).first()
-        if not artisan:
+        # The artisan id comes from the session claims when they are enabled
+        artisan_id = identity.artisan_id()
+        if not artisan_id:
             return jsonify({'success': False, 'message': 'Artisan profile not found'}), 404
         
         # Get product
-        product = Product.query.filter_by(id=product_id, artisan_id=artisan.id).first()
+        product = Product.query.filter_by(id=product_id, artisan_id=artisan_id).first()
         if not product:
             return jsonify({'success': False, 'message': 'Product not found'}), 404
         
@@ -540,6 +828,95 @@ def update_product_status_api(product_id):
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/orders/checkout', methods=['POST'])
+@login_required
+def checkout_api():
+    """Place an order for a cart of published products, taking their stock atomically"""
+    data = request.get_json() or {}
+    
+    try:
+        cart = checkout.parse_cart(data.get('items'), app.config['CHECKOUT_MAX_LINES'],
+                                   app.config['CHECKOUT_MAX_QUANTITY'])
+        order = checkout.place_order(session['user_id'], cart, retries=app.config['CHECKOUT_RETRIES'])
+        
+    except checkout.OutOfStockError as e:
+        return jsonify({'success': False, 'message': str(e), 'product_id': e.product_id}), 409
+    except checkout.CheckoutError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logging.exception('Checkout failed')
+        return jsonify({'success': False, 'message': str(e)}), 500
+    
+    return jsonify({'success': True, 'message': 'Order placed successfully!', 'order': order})
+
+@app.route('/api/images/upload', methods=['POST'])
+@login_required
+def upload_image_api():
+    """Store an uploaded product image and queue its thumbnail and width variants"""
+    if identity.user_type() != 'artisan':
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+    
+    # Multipart uploads are spooled to a temp file by Werkzeug; a raw body is read straight off the socket
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    
+    try:
+        key, created = images.save_upload(stream, app.config['ALLOWED_EXTENSIONS'], app.config['MAX_CONTENT_LENGTH'])
+    except images.ImageUploadError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    job_id = None
+    # A repeat upload re-queues the variants if an earlier job never finished rendering them
+    if created or images.variants_missing(key):
+        job = enqueue('generate_image_variants', {'key': key}, user_id=session['user_id'])
+        db.session.commit()
+        dispatch(job)
+        job_id = job.id
+    
+    return jsonify({
+        'success': True,
+        'image': key,
+        'url': images.image_url(key, images.ORIGINAL),
+        'thumbnail_url': images.image_url(key),
+        'variants_job_id': job_id
+    })
+
+@app.route(f'{images.URL_PREFIX}/<key>/<variant>')
+def product_image(key, variant):
+    """Serve an image variant; URLs are content-addressed, so rendered variants never change"""
+    path, mimetype, final = images.resolve(key, variant)
+    if path is None:
+        return jsonify({'success': False, 'message': 'Image not found'}), 404
+    
+    if not final:
+        # Variant not rendered yet: serve the original briefly, so the variant is fetched once it exists
+        return send_file(path, mimetype=mimetype, max_age=60)
+    
+    response = send_file(path, mimetype=mimetype, max_age=app.config['IMAGE_CACHE_MAX_AGE'])
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/api/jobs/<int:job_id>')
+@login_required
+def job_status(job_id):
+    """Poll the status of a background job"""
+    job = db.session.get(Job, job_id)
+    
+    if not job or (job.user_id and job.user_id != session['user_id']):
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job': {
+            'id': job.id,
+            'kind': job.kind,
+            'status': job.status,
+            'attempts': job.attempts,
+            'result': json.loads(job.result) if job.result else None,
+            'error': job.last_error if job.status == 'failed' else None
+        }
+    })
+
 @app.route('/api/generate/artisan-bio', methods=['POST'])
 def generate_artisan_bio():
     """Generate artisan biography using Google AI"""
@@ -560,6 +937,11 @@ def generate_artisan_bio():
         }
         tone = data.get('tone', 'warm')
         
+        if wants_stream():
+            return stream_generation(
+                artisan_storytelling_agent.stream_artisan_bio(artisan_data, tone), 'bio', {'tone': tone}
+            )
+        
         bio = artisan_storytelling_agent.generate_artisan_bio(artisan_data, tone)
         
         return jsonify({
@@ -593,6 +975,12 @@ def generate_story_title():
         }
         tone = data.get('tone', 'poetic')
         
+        if wants_stream():
+            return stream_generation(
+                artisan_storytelling_agent.stream_story_title(artisan_data, tone), 'title', {'tone': tone},
+                finish=artisan_storytelling_agent.clean_title
+            )
+        
         title = artisan_storytelling_agent.generate_story_title(artisan_data, tone)
         
         return jsonify({
@@ -627,6 +1015,12 @@ def generate_product_description():
         }
         persona = data.get('persona', 'warm')
         
+        if wants_stream():
+            return stream_generation(
+                artisan_storytelling_agent.stream_product_description(product_data, persona), 'description',
+                {'persona': persona}
+            )
+        
         description = artisan_storytelling_agent.generate_product_description(product_data, persona)
         
         return jsonify({
@@ -671,22 +1065,61 @@ def generate_cultural_context():
             'context': 'Traditional craft with rich cultural heritage and historical significance.'
         }), 500
 
-@app.route('/api/generate/product-bundles', methods=['POST'])
-def generate_product_bundles():
-    """Generate product bundle suggestions using Google AI"""
+@app.route('/api/generate/onboarding-profile', methods=['POST'])
+def generate_onboarding_profile():
+    """Generate an artisan's bio, story title and cultural context in one structured call"""
+    fallback = {
+        'bio': 'Passionate artisan creating beautiful handcrafted pieces with traditional techniques.',
+        'title': 'Artisan\'s Journey',
+        'cultural_context': 'Traditional craft with rich cultural heritage and historical significance.'
+    }
     if not AI_SERVICES_AVAILABLE:
-        return jsonify({
-            'success': False,
-            'error': 'AI services not available',
-            'bundles': []
-        }), 503
+        return jsonify({'success': False, 'error': 'AI services not available', **fallback}), 503
     
     try:
         data = request.get_json()
-        products = data.get('products', [])
-        theme = data.get('theme', 'complementary')
+        artisan_data = {
+            'name': data.get('name', ''),
+            'craft_type': data.get('craft_type', ''),
+            'location': data.get('location', ''),
+            'experience_years': data.get('experience_years', 5)
+        }
+        tone = data.get('tone', 'warm')
+        title_tone = data.get('title_tone', 'poetic')
+        
+        profile = artisan_storytelling_agent.generate_onboarding_profile(artisan_data, tone, title_tone)
+        
+        return jsonify({
+            'success': True,
+            'tone': tone,
+            'title_tone': title_tone,
+            **profile
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e), **fallback}), 500
+
+@app.route('/api/generate/product-bundles', methods=['POST'])
+def generate_product_bundles():
+    """Suggest product bundles for a theme, completing the products already chosen"""
+    try:
+        data = request.get_json() or {}
+        theme = data.get('theme') or 'complementary'
+        # Accept product ids or product objects from the bundle builder
+        selected_ids = [int(p['id'] if isinstance(p, dict) else p) for p in data.get('products', [])]
+        size = max(2, min(int(data.get('size', 3)), app.config['BUNDLE_MAX_SIZE']))
+        limit = max(1, min(int(data.get('limit', 3)), 10))
+        min_price = float(data['min_price']) if data.get('min_price') is not None else None
+        max_price = float(data['max_price']) if data.get('max_price') is not None else None
         
-        bundles = product_recommendation_agent.suggest_product_bundles(products, theme)
+    except (TypeError, ValueError, KeyError) as e:
+        return jsonify({'success': False, 'error': f'Invalid request: {e}', 'bundles': []}), 400
+    
+    if theme not in BUNDLE_THEMES:
+        return jsonify({'success': False, 'error': f'Unknown theme: {theme}', 'bundles': []}), 400
+    
+    try:
+        bundles = suggest_bundles(theme, selected_ids, size, limit, min_price, max_price)
         
         return jsonify({
             'success': True,
@@ -701,6 +1134,18 @@ def generate_product_bundles():
             'bundles': []
         }), 500
 
+@app.route('/api/bundle/products')
+@database.replica_reads()
+def bundle_products():
+    """Published products for the bundle builder, most relevant to the theme first"""
+    theme = request.args.get('theme', 'complementary')
+    limit = max(1, min(request.args.get('limit', 24, type=int), 100))
+    
+    return jsonify({
+        'success': True,
+        'products': get_bundle_index().top_products(theme, limit)
+    })
+
 @app.route('/api/generate/marketing-content', methods=['POST'])
 def generate_marketing_content():
     """Generate marketing content using Google AI"""
@@ -717,6 +1162,21 @@ def generate_marketing_content():
         artisan_data = data.get('artisan', {})
         product_data = data.get('product', {})
         
+        if content_type == 'catalog':
+            # Posts for the artisan's whole catalog, generated in batched prompts by a background job
+            artisan = identity.current_artisan()
+            if not artisan:
+                return jsonify({'success': False, 'error': 'Artisan profile not found'}), 404
+            
+            job = enqueue('generate_catalog_marketing', {
+                'artisan_id': artisan.id,
+                'platform': data.get('platform', 'Instagram'),
+                'status': data.get('status', 'published')
+            }, user_id=artisan.user_id)
+            db.session.commit()
+            dispatch(job)
+            return jsonify({'success': True, 'type': content_type, 'job_id': job.id}), 202
+        
         if content_type == 'social_media':
             content = marketing_content_agent.generate_social_media_post(
                 'Instagram', artisan_data, product_data
@@ -743,41 +1203,192 @@ def generate_marketing_content():
 
 @app.route('/api/translate', methods=['POST'])
 def translate_text():
-    """Translate text using Google Translate API"""
-    if not AI_SERVICES_AVAILABLE:
-        return jsonify({
-            'success': False,
-            'error': 'Translation services not available',
-            'translated_text': request.get_json().get('text', '')
-        }), 503
+    """Translate one text or a list of texts, serving from the translation store"""
+    data = request.get_json() or {}
+    single = 'texts' not in data
+    texts = [data.get('text', '')] if single else data.get('texts') or []
+    target_language = data.get('target_language', 'en')
+    source_language = data.get('source_language', None)
+    
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        return jsonify({'success': False, 'error': 'texts must be a list of strings'}), 400
     
     try:
-        data = request.get_json()
-        text = data.get('text', '')
-        target_language = data.get('target_language', 'en')
-        source_language = data.get('source_language', None)
-        
-        translated_text = google_ai_service.translate_text(text, target_language, source_language)
-        
-        return jsonify({
-            'success': True,
-            'translated_text': translated_text,
-            'target_language': target_language,
-            'source_language': source_language
-        })
+        results = translations.translate_cached(texts, target_language, source_language)
         
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e),
-            'translated_text': text
-        }), 500
+        db.session.rollback()
+        results = [None] * len(texts)
+        error = str(e)
+    else:
+        error = None if all(results) or not any(texts) else 'Translation services not available'
+    
+    # Untranslatable segments come back unchanged, as before
+    translated = [result if result is not None else text for text, result in zip(texts, results)]
+    response = {
+        'success': error is None,
+        'target_language': target_language,
+        'source_language': source_language
+    }
+    if single:
+        response['translated_text'] = translated[0]
+    else:
+        response['translated_texts'] = translated
+    if error:
+        response['error'] = error
+    
+    return jsonify(response), (200 if error is None else 503)
+
+def collect_component_stats():
+    """Scrape-time gauges from the caches, counters and upstream clients"""
+    caches = {
+        'fragment': fragment_cache.fragment_cache.stats(),
+        'preview_memo': preview_memo.stats(),
+        'bundle_suggestions': recommendations.suggestion_cache.stats()
+    }
+    lines = metrics.stats_gauges('persona_cache', 'cache', caches)
+    lines += metrics.stats_gauges('persona_engagement', 'buffer', {'counters': engagement.buffer.stats()})
+    lines += metrics.stats_gauges('persona_db_pool', 'engine', database.pool_stats(db))
+    lines += metrics.stats_gauges('persona_db_replica', 'replica', database.replicas.stats())
+    if AI_SERVICES_AVAILABLE:
+        from google_ai_service import upstreams
+        lines += metrics.stats_gauges('persona_upstream', 'upstream', {
+            name: client.stats() for name, client in upstreams.items()
+        })
+        lines += metrics.gauge_lines('persona_upstream_circuit_open', 'Whether the circuit breaker is open', [
+            ({'upstream': name}, 0 if client.available() else 1) for name, client in upstreams.items()
+        ])
+    lines += metrics.gauge_lines('persona_startup_seconds', 'Time spent in each cold-start phase', [
+        ({'phase': phase}, seconds) for phase, seconds in startup.phases().items()
+    ])
+    return lines
+
+metrics.registry.add_collector(collect_component_stats)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint for this worker process; needs METRICS_TOKEN unless METRICS_PUBLIC is set"""
+    if not app.config['METRICS_PUBLIC']:
+        token = app.config['METRICS_TOKEN']
+        if not token:
+            return jsonify({'success': False, 'error': 'Not found'}), 404
+        authorization = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode()):
+            return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    
+    return metrics.registry.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+# Background job handlers
+def generate_enriched_description(product_data, persona):
+    """Generate an AI-enriched description for plain product data in the artisan's voice"""
+    if AI_SERVICES_AVAILABLE:
+        return artisan_storytelling_agent.generate_product_description(
+            product_data, persona.tone if persona else 'warm'
+        )
+    elif persona:
+        return AIStorytellingAgent.enrich_product_description(product_data, persona)
+    return product_data['description']
+
+def _enrichment_data(product, artisan):
+    return {
+        'name': product.name,
+        'description': product.description,
+        'category': product.category or artisan.craft_type
+    }
+
+@job_handler('enrich_product_description')
+def enrich_product_description_job(payload):
+    """Generate the AI-enriched description for a newly created product"""
+    product = db.session.get(Product, payload['product_id'])
+    if not product:
+        return None
+    
+    artisan = product.artisan
+    enhanced_description = generate_enriched_description(_enrichment_data(product, artisan), artisan.persona)
+    
+    if not enhanced_description or not enhanced_description.strip():
+        raise ValueError('AI enhancement returned an empty description')
+    
+    product.ai_enriched_description = enhanced_description
+    translation_job = translations.enqueue_pretranslation(product_ids=[product.id])
+    db.session.commit()
+    if translation_job:
+        dispatch(translation_job)
+    
+    return {'product_id': product.id, 'ai_enriched_description': enhanced_description}
+
+@job_handler('enrich_product_batch')
+def enrich_product_batch_job(payload):
+    """Enrich a batch of imported products on a bounded thread pool, then write them back together"""
+    products = Product.query.filter(
+        Product.id.in_(payload['product_ids']),
+        Product.ai_enriched_description.is_(None)
+    ).all()
+    if not products:
+        return {'enriched': 0}
+    
+    # Build plain dicts up front so the pool threads never trigger lazy loads
+    artisan = products[0].artisan
+    persona = artisan.persona
+    product_data = [_enrichment_data(product, artisan) for product in products]
+    
+    with ThreadPoolExecutor(max_workers=app.config['IMPORT_ENRICH_WORKERS']) as executor:
+        descriptions = list(executor.map(lambda data: generate_enriched_description(data, persona), product_data))
+    
+    db.session.execute(update(Product), [
+        {'id': product.id, 'ai_enriched_description': description}
+        for product, description in zip(products, descriptions)
+        if description and description.strip()
+    ])
+    # Bulk updates skip the mapper events
+    invalidate_artisan(db.session.connection(), artisan.id)
+    database.after_commit(db.session, recommendations.invalidate_index)
+    translation_job = translations.enqueue_pretranslation(product_ids=[product.id for product in products])
+    db.session.commit()
+    if translation_job:
+        dispatch(translation_job)
+    
+    return {'enriched': len(products)}
+
+@job_handler('generate_image_variants')
+def generate_image_variants_job(payload):
+    """Render an uploaded image's WebP thumbnail and width variants in the process pool"""
+    return {'rendered': images.generate_variants(payload['key'])}
+
+@job_handler('generate_catalog_marketing')
+def generate_catalog_marketing_job(payload):
+    """Social posts for an artisan's catalog, many products per Gemini prompt"""
+    artisan = db.session.get(Artisan, payload['artisan_id'])
+    if not artisan:
+        return {'posts': {}, 'upstream_calls': 0, 'fallbacks': 0}
+    
+    query = Product.query.filter_by(artisan_id=artisan.id)
+    if payload.get('status'):
+        query = query.filter_by(status=payload['status'])
+    products = [
+        {'id': product.id, 'name': product.name, 'category': product.category, 'price': product.price,
+         'description': product.ai_enriched_description or product.description}
+        for product in query.order_by(Product.id)
+    ]
+    artisan_data = {'name': artisan.name, 'craft_type': artisan.craft_type, 'location': artisan.location}
+    # Release the connection while the upstream calls run
+    db.session.rollback()
+    return marketing_content_agent.generate_catalog_posts(artisan_data, products, payload.get('platform', 'Instagram'))
+
+@job_handler('pretranslate_content')
+def pretranslate_content_job(payload):
+    """Translate changed bios and descriptions into the configured target languages"""
+    return translations.pretranslate(payload.get('artisan_ids', []), payload.get('product_ids', []))
 
 # Initialize database and sample data
-def init_db():
-    """Initialize database with tables and sample data."""
+def init_db(synthetic_artisans: int = 0, synthetic_products: int = 0, synthetic_seed: int = 7):
+    """Initialize database with tables and sample data.
+    
+    With synthetic_artisans/synthetic_products, also seed a deterministic
+    synthetic dataset of that size (see synthetic_data.py) for load tests.
+    """
     with app.app_context():
-        db.create_all()
+        ensure_schema(db, SchemaVersion.__table__, search_index_ddl(), install_search_index, force=True)
     
         # Create sample data if none exists
         if not User.query.first():
@@ -877,12 +1488,31 @@ def init_db():
                 db.session.add(product)
             
             db.session.commit()
+        
+        if synthetic_artisans or synthetic_products:
+            import synthetic_data
+            synthetic_data.seed(synthetic_artisans, synthetic_products, synthetic_seed)
+        
+        # Summary rows for artisans whose products predate the artisan_stats table
+        if artisan_stats.backfill(db.session.connection()):
+            db.session.commit()
+
+startup.mark('routes')
 
-# Remove local-only code for Vercel deployment
-# if not IS_VERCEL:
-#     init_db()  # Optional: only if you want sample data locally
-#     app.run(debug=True, host='0.0.0.0', port=5000)
+_schema_ready = False
 
-# Ensure tables are created at startup (for serverless)
-with app.app_context():
-    db.create_all()
+def create_app():
+    """The app for a serving process, with the schema brought up to date on first call.
+    
+    Importing this module does no database work; entry points (api/app.py,
+    gunicorn "app:create_app()", the job worker) call this instead. Tables are
+    only created when the model fingerprint differs from the stored one.
+    """
+    global _schema_ready
+    if not _schema_ready:
+        with app.app_context():
+            ensure_schema(db, SchemaVersion.__table__, search_index_ddl(), install_search_index)
+        _schema_ready = True
+        startup.mark('schema')
+        startup.log_report()
+    return app
@@ -0,0 +1,236 @@
+"""
+Artisan Stats - Materialized per-artisan dashboard numbers
+Product counts by status, catalog value, stock, units sold and order revenue
+live in the artisan_stats summary table. ORM writes to products and order
+items apply their deltas in the same transaction; an artisan without a row
+is built from one GROUP BY per source table before its first such write, or
+by backfill(). Reads never write: an artisan with no row yet is answered from
+the GROUP BY directly. Core bulk writes skip the mapper events, so those
+paths call rebuild() or apply_delta() themselves.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm.attributes import get_history
+
+from upserts import insert_on_conflict
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ('product_count', 'published_count', 'draft_count', 'sold_out_count',
+            'total_value', 'stock_total', 'units_sold', 'order_revenue')
+STATUS_COUNTERS = {'published': 'published_count', 'draft': 'draft_count', 'sold_out': 'sold_out_count'}
+
+
+def _tables():
+    from app import ArtisanStats, OrderItem, Product
+    return ArtisanStats.__table__, Product.__table__, OrderItem.__table__
+
+
+def _product_contribution(status, price, stock) -> Dict[str, float]:
+    """What one product row adds to its artisan's counters"""
+    contribution = {'product_count': 1, 'total_value': price or 0, 'stock_total': stock or 0}
+    if status in STATUS_COUNTERS:
+        contribution[STATUS_COUNTERS[status]] = 1
+    return contribution
+
+
+def _subtract(after: Dict[str, float], before: Dict[str, float]) -> Dict[str, float]:
+    return {key: after.get(key, 0) - before.get(key, 0) for key in set(after) | set(before)}
+
+
+def compute(connection, artisan_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, float]]:
+    """Counters for the given artisans (or all of them) from one GROUP BY per source table"""
+    _, products, order_items = _tables()
+
+    product_query = select(
+        products.c.artisan_id,
+        func.count(),
+        *[func.coalesce(func.sum(case((products.c.status == status, 1), else_=0)), 0)
+          for status in STATUS_COUNTERS],
+        func.coalesce(func.sum(products.c.price), 0),
+        func.coalesce(func.sum(products.c.stock_quantity), 0)
+    ).group_by(products.c.artisan_id)
+    order_query = select(
+        products.c.artisan_id,
+        func.coalesce(func.sum(order_items.c.quantity), 0),
+        func.coalesce(func.sum(order_items.c.quantity * order_items.c.price), 0)
+    ).select_from(order_items.join(products, order_items.c.product_id == products.c.id)).group_by(
+        products.c.artisan_id
+    )
+    if artisan_ids is not None:
+        artisan_ids = list(artisan_ids)
+        product_query = product_query.where(products.c.artisan_id.in_(artisan_ids))
+        order_query = order_query.where(products.c.artisan_id.in_(artisan_ids))
+
+    stats = {artisan_id: dict.fromkeys(COUNTERS, 0) for artisan_id in (artisan_ids or ())}
+    for artisan_id, count, published, draft, sold_out, value, stock in connection.execute(product_query):
+        stats.setdefault(artisan_id, dict.fromkeys(COUNTERS, 0)).update(
+            product_count=count, published_count=published, draft_count=draft, sold_out_count=sold_out,
+            total_value=value, stock_total=stock
+        )
+    for artisan_id, units, revenue in connection.execute(order_query):
+        stats.setdefault(artisan_id, dict.fromkeys(COUNTERS, 0)).update(units_sold=units, order_revenue=revenue)
+    return stats
+
+
+def _insert_missing(connection, artisan_id: int, now: datetime) -> bool:
+    """Create an artisan's row from GROUP BY unless one exists. Returns whether it was inserted."""
+    stats_table = _tables()[0]
+    row = compute(connection, [artisan_id])[artisan_id]
+    inserted = connection.execute(
+        insert_on_conflict(connection, stats_table).values(
+            artisan_id=artisan_id, updated_at=now, **row
+        ).on_conflict_do_nothing(index_elements=[stats_table.c.artisan_id])
+    )
+    return bool(inserted.rowcount)
+
+
+def ensure_row(connection, artisan_id: Optional[int]):
+    """Build an artisan's row from GROUP BY if it has none, before writes whose deltas will follow"""
+    stats_table = _tables()[0]
+    if artisan_id is None or connection.scalar(
+        select(stats_table.c.artisan_id).where(stats_table.c.artisan_id == artisan_id)
+    ) is not None:
+        return
+    _insert_missing(connection, artisan_id, datetime.utcnow())
+
+
+def apply_delta(connection, artisan_id: int, delta: Dict[str, float]):
+    """Add `delta` to an artisan's counters inside the caller's transaction.
+
+    If the artisan has no row yet, it is built from a GROUP BY instead, which
+    already sees this transaction's own write. A concurrent builder that wins
+    the insert did not see it, so the delta is applied to its row.
+    """
+    stats_table = _tables()[0]
+    delta = {key: value for key, value in delta.items() if value}
+    if not delta:
+        return
+
+    now = datetime.utcnow()
+    increments = {key: stats_table.c[key] + value for key, value in delta.items()}
+    update = stats_table.update().where(stats_table.c.artisan_id == artisan_id).values(updated_at=now, **increments)
+    if connection.execute(update).rowcount:
+        return
+
+    if not _insert_missing(connection, artisan_id, now):
+        connection.execute(update)
+
+
+def rebuild(connection, artisan_ids: Optional[Iterable[int]] = None) -> int:
+    """Overwrite the stats rows of the given artisans (or all) from GROUP BY. Returns rows written.
+
+    For after bulk writes that bypassed the mapper events, in the same transaction.
+    """
+    stats_table = _tables()[0]
+    stats = compute(connection, artisan_ids)
+    if not stats:
+        return 0
+
+    now = datetime.utcnow()
+    statement = insert_on_conflict(connection, stats_table)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[stats_table.c.artisan_id],
+        set_={**{key: statement.excluded[key] for key in COUNTERS}, 'updated_at': statement.excluded.updated_at}
+    ), [{'artisan_id': artisan_id, 'updated_at': now, **row} for artisan_id, row in stats.items()])
+    return len(stats)
+
+
+def backfill(connection) -> int:
+    """Build the rows of every artisan with products but no row yet. Returns rows inserted.
+
+    Existing rows are left alone, so this is safe to run while deltas are being applied.
+    """
+    stats_table, products, _ = _tables()
+    missing = connection.scalars(
+        select(products.c.artisan_id).distinct()
+        .outerjoin(stats_table, stats_table.c.artisan_id == products.c.artisan_id)
+        .where(products.c.artisan_id.is_not(None), stats_table.c.artisan_id.is_(None))
+    ).all()
+    if not missing:
+        return 0
+
+    now = datetime.utcnow()
+    inserted = connection.execute(
+        insert_on_conflict(connection, stats_table).on_conflict_do_nothing(index_elements=[stats_table.c.artisan_id]),
+        [{'artisan_id': artisan_id, 'updated_at': now, **row} for artisan_id, row in compute(connection, missing).items()]
+    )
+    return inserted.rowcount
+
+
+def get_stats(artisan_id: int) -> Dict[str, float]:
+    """Dashboard counters for one artisan, from its row or, until it has one, from GROUP BY"""
+    from app import db, ArtisanStats
+
+    stats = db.session.get(ArtisanStats, artisan_id)
+    if stats is None:
+        return compute(db.session.connection(), [artisan_id])[artisan_id]
+    return {key: getattr(stats, key) for key in COUNTERS}
+
+
+# Incremental maintenance from ORM writes. A flush runs every before_* hook of
+# a batch before its statements, so rows are built from GROUP BY before any of
+# the batch is written and every row's delta is then applied exactly once.
+def _product_written(mapper, connection, target):
+    ensure_row(connection, target.artisan_id)
+    history = get_history(target, 'artisan_id')
+    for previous in history.deleted:
+        ensure_row(connection, previous)
+
+
+def _order_item_written(mapper, connection, target):
+    products = _tables()[1]
+    ensure_row(connection, connection.scalar(select(products.c.artisan_id).where(products.c.id == target.product_id)))
+
+
+def _product_inserted(mapper, connection, target):
+    apply_delta(connection, target.artisan_id,
+                _product_contribution(target.status, target.price, target.stock_quantity))
+
+
+def _product_updated(mapper, connection, target):
+    def before(attribute):
+        history = get_history(target, attribute)
+        return history.deleted[0] if history.deleted else getattr(target, attribute)
+
+    old = (before('artisan_id'), before('status'), before('price'), before('stock_quantity'))
+    new = (target.artisan_id, target.status, target.price, target.stock_quantity)
+    if old == new:
+        return
+
+    old_contribution = _product_contribution(*old[1:])
+    new_contribution = _product_contribution(*new[1:])
+    if old[0] == new[0]:
+        apply_delta(connection, new[0], _subtract(new_contribution, old_contribution))
+    else:
+        apply_delta(connection, old[0], _subtract({}, old_contribution))
+        apply_delta(connection, new[0], new_contribution)
+
+
+def _product_deleted(mapper, connection, target):
+    old_contribution = _product_contribution(target.status, target.price, target.stock_quantity)
+    apply_delta(connection, target.artisan_id, _subtract({}, old_contribution))
+
+
+def _order_item_inserted(mapper, connection, target):
+    products = _tables()[1]
+    artisan_id = connection.scalar(select(products.c.artisan_id).where(products.c.id == target.product_id))
+    if artisan_id is not None:
+        apply_delta(connection, artisan_id, {
+            'units_sold': target.quantity, 'order_revenue': target.quantity * target.price
+        })
+
+
+def register_model_events(product_model, order_item_model):
+    """Keep the summary rows current through flushes of products and order items"""
+    for name in ('before_insert', 'before_update', 'before_delete'):
+        event.listen(product_model, name, _product_written)
+    event.listen(order_item_model, 'before_insert', _order_item_written)
+    event.listen(product_model, 'after_insert', _product_inserted)
+    event.listen(product_model, 'after_update', _product_updated)
+    event.listen(product_model, 'after_delete', _product_deleted)
+    event.listen(order_item_model, 'after_insert', _order_item_inserted)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Bulk import benchmark - compares /api/products/import with one
+/api/products/create call per row on the same catalog.
+
+Usage: python benchmarks/bulk_import.py [rows]
+"""
+
+import io
+import sys
+import time
+
+from common import use_scratch_database
+
+use_scratch_database()
+
+from app import app, init_db  # noqa: E402
+
+
+def build_csv(rows):
+    lines = ['name,description,price,stock_quantity,category']
+    lines += [f'Bench Item {i},Handmade bench item {i},{100 + i},3,Pottery' for i in range(rows)]
+    return '\n'.join(lines).encode()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    app.config['JOB_QUEUE_MODE'] = 'external'  # Measure request throughput only
+    init_db()
+
+    client = app.test_client()
+    client.post('/login', json={'username': 'maya_potter', 'password': 'potter123'})
+
+    start = time.perf_counter()
+    for i in range(rows):
+        client.post('/api/products/create', json={
+            'name': f'Bench Item {i}', 'description': f'Handmade bench item {i}',
+            'price': 100 + i, 'stock_quantity': 3, 'category': 'Pottery'
+        })
+    per_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = client.post('/api/products/import', data={'file': (io.BytesIO(build_csv(rows)), 'catalog.csv')},
+                           content_type='multipart/form-data')
+    bulk = time.perf_counter() - start
+    assert response.get_json()['imported'] == rows
+
+    print(f"rows:        {rows}")
+    print(f"per-row API: {per_row:.2f}s ({rows / per_row:,.0f} rows/s)")
+    print(f"bulk import: {bulk:.2f}s ({rows / bulk:,.0f} rows/s)")
+    print(f"speedup:     {per_row / bulk:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Bundle recommendation benchmark - index build time and suggestion latency
+per theme, uncached and cached, and the first request after a catalog edit
+while the index rebuilds in the background.
+
+Usage: python benchmarks/bundles.py [products]
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from common import use_scratch_database
+
+use_scratch_database()
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import app, db, init_db, Artisan, Product, User  # noqa: E402
+from recommendations import THEMES, get_index, suggest_bundles, suggestion_cache  # noqa: E402
+
+CATEGORIES = ['Pottery', 'Textiles', 'Jewelry', 'Woodwork', 'Metalwork']
+WORDS = ('traditional heritage modern festive diwali minimal elegant decorative vase kitchen bowl '
+         'terracotta glazed silk cotton embroidered teak carved brass copper silver filigree lamp '
+         'diya gift set wedding bridal handmade village river').split()
+
+
+def seed(products):
+    user = User.query.first()
+    artisans = [{
+        'user_id': user.id, 'name': f'Artisan {i}', 'craft_type': CATEGORIES[i % len(CATEGORIES)],
+        'location': 'Jaipur', 'bio': 'Bench artisan'
+    } for i in range(max(1, products // 20))]
+    artisan_ids = db.session.scalars(insert(Artisan).returning(Artisan.id), artisans).all()
+
+    rng = random.Random(7)
+    rows = [{
+        'artisan_id': artisan_ids[i % len(artisan_ids)],
+        'name': ' '.join(rng.sample(WORDS, 3)).title(),
+        'description': ' '.join(rng.choices(WORDS, k=12)),
+        'category': CATEGORIES[i % len(CATEGORIES)],
+        'price': rng.randint(200, 8000),
+        'stock_quantity': 5,
+        'status': 'published'
+    } for i in range(products)]
+    db.session.execute(insert(Product), rows)
+    db.session.commit()
+
+
+def timed(fn, repeat=10):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    init_db()
+
+    with app.app_context():
+        seed(products)
+
+        start = time.perf_counter()
+        index = get_index()
+        print(f"built index over {len(index):,} products in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+        selection = [int(index.ids[0]), int(index.ids[1])]
+        print(f"{'theme':<15}{'empty ms':>10}{'selection ms':>14}{'cached ms':>11}")
+        for theme in THEMES:
+            def uncached(selected):
+                suggestion_cache.clear()
+                return suggest_bundles(theme, selected, size=3, limit=3, max_price=10000)
+
+            empty = timed(lambda: uncached([]))
+            with_selection = timed(lambda: uncached(selection))
+            cached = timed(lambda: suggest_bundles(theme, selection, size=3, limit=3, max_price=10000), repeat=100)
+            print(f"{theme:<15}{empty:>10.2f}{with_selection:>14.2f}{cached:>11.3f}")
+
+        # A catalog edit marks the snapshot stale; requests keep using it while the next one builds
+        product = db.session.get(Product, int(index.ids[0]))
+        product.price += 1
+        db.session.commit()
+        start = time.perf_counter()
+        suggestion_cache.clear()
+        suggest_bundles('festive', selection, size=3, limit=3, max_price=10000)
+        after_edit = (time.perf_counter() - start) * 1000
+        while get_index() is index:
+            time.sleep(0.05)
+        print(f"\nfirst request after an edit: {after_edit:.2f} ms; rebuilt snapshot ready "
+              f"{time.time() - index.built_at:.1f}s after the previous one")
+
+        bundle = suggest_bundles('festive', [], size=4, limit=1, min_price=3000, max_price=12000)[0]
+        print(f"\nsample: {bundle['title']} ({bundle['total_price']}) - {bundle['reason']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Checkout stress test - many buyers racing for a few scarce products through
+/api/orders/checkout, checking that stock is never oversold and that orders,
+order items, product stock and the artisan stats agree afterwards.
+
+Runs against a throwaway SQLite database in WAL mode by default; pass
+--database-url postgresql://... to run the same race against a local Postgres.
+
+Usage: python benchmarks/checkout_stress.py [--threads N] [--stock N] [--products N]
+                                            [--database-url URL]
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from common import use_scratch_database
+
+parser = argparse.ArgumentParser(description='Concurrent checkout stress test')
+parser.add_argument('--threads', type=int, default=16)
+parser.add_argument('--stock', type=int, default=25, help='units of each scarce product')
+parser.add_argument('--products', type=int, default=3, help='scarce products shared by every buyer')
+parser.add_argument('--attempts', type=int, default=40, help='checkouts per buyer thread')
+parser.add_argument('--database-url', help='database to test (default: a temporary SQLite file in WAL mode)')
+args = parser.parse_args()
+
+# Point the app at the database under test before it is imported
+use_scratch_database(args.database_url)
+
+import artisan_stats  # noqa: E402
+from app import app, db, init_db, Artisan, Order, OrderItem, Product, User  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+
+def setup():
+    """Scarce published products for the sample artisan, plus one customer account per thread"""
+    init_db()
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            db.session.execute(db.text('PRAGMA journal_mode=WAL'))
+            db.session.commit()
+        artisan = Artisan.query.first()
+        products = [Product(artisan_id=artisan.id, name=f'Last Lamp {i}', description='Scarce brass lamp',
+                            price=100.0 + i, stock_quantity=args.stock, status='published')
+                    for i in range(args.products)]
+        password_hash = generate_password_hash('stress123')
+        customers = [User(username=f'stress_buyer_{time.time_ns()}_{i}', email=f'stress_{time.time_ns()}_{i}@example.com',
+                          password_hash=password_hash, user_type='customer') for i in range(args.threads)]
+        db.session.add_all(products + customers)
+        db.session.commit()
+        return artisan.id, [p.id for p in products], [c.id for c in customers]
+
+
+def buyer(user_id, product_ids, outcomes, seed):
+    """Check out random 1-2 line carts of the scarce products, in shuffled line order"""
+    rng = random.Random(seed)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+
+    for _ in range(args.attempts):
+        lines = rng.sample(product_ids, min(len(product_ids), rng.randint(1, 2)))
+        items = [{'product_id': product_id, 'quantity': rng.randint(1, 2)} for product_id in lines]
+        response = client.post('/api/orders/checkout', json={'items': items})
+        outcomes[response.status_code] += 1
+        if response.status_code == 500:
+            print('error:', response.get_json()['message'])
+
+
+def main():
+    artisan_id, product_ids, customer_ids = setup()
+    with app.app_context():
+        dialect = db.engine.dialect.name
+    outcomes = Counter()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=buyer, args=(user_id, product_ids, outcomes, n))
+               for n, user_id in enumerate(customer_ids)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    attempts = args.threads * args.attempts
+    print(f"{dialect}: {attempts} checkouts from {args.threads} threads in {elapsed:.1f}s "
+          f"({attempts / elapsed:.0f}/s)")
+    print(f"placed {outcomes[200]}, out of stock {outcomes[409]}, rejected {outcomes[400]}, errors {outcomes[500]}")
+
+    failures = []
+    with app.app_context():
+        for product in Product.query.filter(Product.id.in_(product_ids)):
+            sold = db.session.scalar(db.select(db.func.coalesce(db.func.sum(OrderItem.quantity), 0)).where(
+                OrderItem.product_id == product.id
+            ))
+            print(f"  product {product.id}: sold {sold}, stock left {product.stock_quantity}, {product.status}")
+            if product.stock_quantity < 0 or sold + product.stock_quantity != args.stock:
+                failures.append(f'product {product.id} oversold or lost stock')
+            if (product.stock_quantity == 0) != (product.status == 'sold_out'):
+                failures.append(f'product {product.id} sold_out status does not match stock')
+
+        mismatched = db.session.scalar(db.select(db.func.count()).select_from(Order).where(
+            Order.total_amount != db.select(db.func.sum(OrderItem.quantity * OrderItem.price))
+            .where(OrderItem.order_id == Order.id).scalar_subquery()
+        ))
+        if mismatched:
+            failures.append(f'{mismatched} orders whose total does not match their items')
+
+        stored = artisan_stats.get_stats(artisan_id)
+        expected = artisan_stats.compute(db.session.connection(), [artisan_id])[artisan_id]
+        drift = {key: (stored[key], expected[key]) for key in expected if float(stored[key]) != float(expected[key])}
+        if drift:
+            failures.append(f'artisan stats drifted: {drift}')
+
+    if outcomes[500]:
+        failures.append(f'{outcomes[500]} checkouts failed with errors')
+    if failures:
+        print('\nFAILED\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+    print('\nno overselling; orders, stock and artisan stats agree')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Cold-start report - what a fresh serverless worker spends before it can
+answer its first request: import time broken down by package (from
+python -X importtime), the app's own startup phases, create_app() and the
+first request.
+
+The first run creates the schema; the rest find it up to date, which is the
+common cold start. Use --budget-ms to fail when the median cold start grows.
+
+Usage: python benchmarks/cold_start.py [--runs N] [--top N] [--output PATH] [--budget-ms MS]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from common import ROOT, scratch_database_url
+
+# Runs in the fresh interpreter; mirrors api/app.py, then serves one request
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+import app as application
+imported = time.perf_counter()
+flask_app = application.create_app()
+created = time.perf_counter()
+response = flask_app.test_client().get('/')
+response.close()
+served = time.perf_counter()
+import startup
+print(json.dumps({{
+    'status': response.status_code,
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (served - created) * 1000,
+    'phases_ms': {{phase: seconds * 1000 for phase, seconds in startup.phases().items()}}
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """({top-level package: self µs}, {module imported directly by app: cumulative µs})"""
+    by_package = defaultdict(int)
+    from_app = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2  # one separator space, two per nesting level
+        module = name.strip()
+        by_package[module.split('.')[0]] += int(self_us)
+        if depth == 1:
+            from_app[module] = int(cumulative_us)
+    return by_package, from_app
+
+
+def probe(env):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE.format(root=ROOT)],
+                            env=env, capture_output=True, text=True, cwd=ROOT)
+    if result.returncode != 0:
+        sys.exit(f'probe failed:\n{result.stderr[-2000:]}')
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['by_package'], timings['from_app'] = parse_importtime(result.stderr)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start timing report')
+    parser.add_argument('--runs', type=int, default=5, help='cold starts with an up-to-date schema')
+    parser.add_argument('--top', type=int, default=15, help='packages and modules to list')
+    parser.add_argument('--output', help='write the report as JSON')
+    parser.add_argument('--budget-ms', type=float, help='exit 1 if the median cold start exceeds this')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['PERSONA_DATABASE_URL'] = scratch_database_url()
+    env.setdefault('JOB_QUEUE_MODE', 'external')  # keep the probe from starting worker threads
+
+    first = probe(env)
+    runs = [probe(env) for _ in range(args.runs)]
+
+    def median(key):
+        return statistics.median(run[key] for run in runs)
+
+    totals = [run['import_ms'] + run['create_app_ms'] + run['first_request_ms'] for run in runs]
+    print(f"{'':<22}{'first boot':>12}{'median':>10}")
+    for key, label in (('import_ms', 'import app'), ('create_app_ms', 'create_app()'),
+                       ('first_request_ms', 'first request')):
+        print(f'{label:<22}{first[key]:>12.0f}{median(key):>10.0f}')
+    first_total = first['import_ms'] + first['create_app_ms'] + first['first_request_ms']
+    print(f"{'total':<22}{first_total:>12.0f}{statistics.median(totals):>10.0f}")
+
+    print('\nstartup phases (ms)')
+    for phase in runs[-1]['phases_ms']:
+        print(f"  {phase:<20}{first['phases_ms'].get(phase, 0):>12.0f}"
+              f"{statistics.median(run['phases_ms'][phase] for run in runs):>10.0f}")
+
+    by_package = {package: statistics.median(run['by_package'].get(package, 0) for run in runs) / 1000
+                  for package in runs[-1]['by_package']}
+    print(f'\nimport self time by package, top {args.top} (ms)')
+    for package, ms in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f'  {package:<32}{ms:>8.1f}')
+
+    from_app = {module: statistics.median(run['from_app'].get(module, 0) for run in runs) / 1000
+                for module in runs[-1]['from_app']}
+    print(f'\nimported by app.py, cumulative, top {args.top} (ms)')
+    for module, ms in sorted(from_app.items(), key=lambda item: -item[1])[:args.top]:
+        print(f'  {module:<32}{ms:>8.1f}')
+
+    report = {
+        'first_boot': {key: first[key] for key in ('import_ms', 'create_app_ms', 'first_request_ms', 'phases_ms')},
+        'median_total_ms': statistics.median(totals),
+        'median': {key: median(key) for key in ('import_ms', 'create_app_ms', 'first_request_ms')},
+        'by_package_ms': by_package,
+        'imported_by_app_ms': from_app
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'\nreport written to {args.output}')
+
+    if args.budget_ms and report['median_total_ms'] > args.budget_ms:
+        print(f"\nmedian cold start {report['median_total_ms']:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
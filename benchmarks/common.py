@@ -0,0 +1,35 @@
+"""
+Shared benchmark setup - throwaway databases and a stand-in for Gemini responses.
+Scripts call use_scratch_database() before importing the app, since app.py
+reads PERSONA_DATABASE_URL at import time.
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def scratch_dir() -> str:
+    """A new temporary directory for benchmark databases"""
+    return tempfile.mkdtemp(prefix='persona-bench-')
+
+
+def scratch_database_url() -> str:
+    """URL of a new SQLite file in its own temporary directory"""
+    return f"sqlite:///{os.path.join(scratch_dir(), 'bench.db')}"
+
+
+def use_scratch_database(url: str = None) -> str:
+    """Point the app at `url`, or a new SQLite file; call before the app is imported"""
+    os.environ['PERSONA_DATABASE_URL'] = url or scratch_database_url()
+    return os.environ['PERSONA_DATABASE_URL']
+
+
+class FakeResponse:
+    """What a Gemini generate_content call (or one streamed chunk) returns, as far as the app reads it"""
+
+    def __init__(self, text):
+        self.text = text
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Engagement counter load test - sustained like taps on a few hot artisans,
+write-behind buffering versus one UPSERT transaction per tap.
+
+Usage: python benchmarks/engagement.py [seconds] [threads]
+"""
+
+import os
+import sys
+import threading
+import time
+
+from common import use_scratch_database
+
+use_scratch_database()
+os.environ.setdefault('ENGAGEMENT_FLUSH_INTERVAL', '0.5')
+
+import engagement  # noqa: E402
+from app import app, db, init_db, Artisan, EngagementCounter  # noqa: E402
+
+HOT_ARTISANS = 3
+
+
+def hammer(seconds, threads, after_tap=None):
+    """Tap /api/story/like from `threads` clients for `seconds`; returns taps sent"""
+    with app.app_context():
+        artisan_ids = [a.id for a in Artisan.query.limit(HOT_ARTISANS)]
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def client(n):
+        test_client = app.test_client()
+        while time.perf_counter() < deadline:
+            artisan_id = artisan_ids[counts[n] % len(artisan_ids)]
+            response = test_client.post('/api/story/like', json={'story_id': artisan_id, 'liked': True})
+            assert response.status_code == 200
+            if after_tap:
+                after_tap()
+            counts[n] += 1
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(counts)
+
+
+def stored_total():
+    with app.app_context():
+        return db.session.query(db.func.coalesce(db.func.sum(EngagementCounter.count), 0)).filter(
+            EngagementCounter.kind == 'story_like'
+        ).scalar()
+
+
+def write_through():
+    """Baseline: flush (one UPSERT transaction) after every single tap"""
+    with app.app_context():
+        engagement.flush()
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    init_db()
+
+    print(f"{threads} clients tapping {HOT_ARTISANS} hot artisans for {seconds:.0f}s\n")
+    print(f"{'mode':<15}{'taps':>8}{'taps/s':>10}{'flushes':>9}{'rows':>8}{'stored':>9}")
+
+    for mode, after_tap in (('write-through', write_through), ('write-behind', None)):
+        with app.app_context():
+            EngagementCounter.query.delete()
+            db.session.commit()
+        engagement.buffer.flushes = engagement.buffer.rows_written = 0
+
+        taps = hammer(seconds, threads, after_tap)
+        engagement._flusher.tick()  # drain what is still buffered
+        stats = engagement.buffer.stats()
+        print(f"{mode:<15}{taps:>8}{taps / seconds:>10.0f}{stats['flushes']:>9}{stats['rows_written']:>8}"
+              f"{stored_total():>9}")
+
+
+if __name__ == '__main__':
+    main()
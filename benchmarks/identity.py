@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Identity benchmark - SQL statements per authenticated request for the
+artisan pages and product APIs, once with the identity loaded from the
+database and once with SESSION_IDENTITY_CLAIMS, where authorization checks
+read the signed session instead.
+
+Usage: python benchmarks/identity.py [--repeat N]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from common import use_scratch_database
+
+use_scratch_database()
+os.environ.setdefault('JOB_QUEUE_MODE', 'external')  # enrichment jobs are written, not run
+
+from app import app, db, init_db, Artisan, User  # noqa: E402
+from repository import count_queries  # noqa: E402
+
+
+def scenarios():
+    return [
+        ('GET /', lambda c: c.get('/')),
+        ('GET /artisan/onboard', lambda c: c.get('/artisan/onboard')),
+        ('GET /artisan/dashboard', lambda c: c.get('/artisan/dashboard')),
+        ('GET /artisan/products', lambda c: c.get('/artisan/products')),
+        ('POST /api/products/create', lambda c: c.post('/api/products/create', json={
+            'name': 'Identity Bench Bowl', 'description': 'Wheel-thrown stoneware', 'price': 450
+        })),
+    ]
+
+
+def measure(repeat):
+    """{scenario: (median statements, median ms)} for the sample artisan"""
+    with app.app_context():
+        user = db.session.scalar(db.select(User).join(Artisan, Artisan.user_id == User.id).order_by(User.id))
+        credentials = {'username': user.username, 'password': 'potter123'}
+
+    client = app.test_client()
+    started = time.perf_counter()
+    with count_queries() as counter:
+        response = client.post('/login', json=credentials)
+    assert response.get_json()['success'], 'sample artisan login failed'
+
+    results = {'POST /login': (counter.count, (time.perf_counter() - started) * 1000)}
+    for name, request in scenarios():
+        counts, timings = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            with count_queries() as counter:
+                response = request(client)
+            timings.append((time.perf_counter() - started) * 1000)
+            counts.append(counter.count)
+            assert response.status_code in (200, 302), f'{name}: {response.status_code}'
+        results[name] = (statistics.median(counts), statistics.median(timings))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Queries per authenticated request')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    init_db()
+    loaded = measure(args.repeat)
+    app.config['SESSION_IDENTITY_CLAIMS'] = True
+    claims = measure(args.repeat)
+
+    print(f"{'request':<32}{'queries':>9}{'ms':>7}{'claims: queries':>18}{'ms':>7}")
+    for name, (queries, ms) in loaded.items():
+        print(f'{name:<32}{queries:>9.0f}{ms:>7.1f}{claims[name][0]:>18.0f}{claims[name][1]:>7.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Catalog marketing benchmark - social posts for a 200-product catalog, one
+Gemini call per product versus batched multi-product JSON prompts, against
+a fake model with a fixed per-call latency that also drops or garbles a
+share of the items so per-item retries are exercised.
+
+Usage: python benchmarks/marketing.py [products] [latency_ms]
+"""
+
+import json
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import FakeResponse, use_scratch_database
+
+use_scratch_database()
+
+import google_ai_service  # noqa: E402
+from llm_cache import MemoryLRUCache  # noqa: E402
+from upstream import UpstreamClient  # noqa: E402
+
+ITEM_ID = re.compile(r'\{"id": (\d+),')
+ARTISAN = {'name': 'Maya Sharma', 'craft_type': 'Pottery', 'location': 'Jaipur, Rajasthan'}
+
+
+class FakeMarketingModel:
+    """Fixed latency per call plus a little per generated item; `failure_rate` of batch items come back bad"""
+
+    def __init__(self, latency, per_item=0.01, failure_rate=0.05, seed=3):
+        self.latency = latency
+        self.per_item = per_item
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        with self.lock:
+            self.calls += 1
+        ids = [int(i) for i in ITEM_ID.findall(prompt)]
+        time.sleep(self.latency + self.per_item * max(len(ids), 1))
+        if not ids:
+            return FakeResponse('Handmade in Jaipur, glazed by hand. #pottery #handmade #jaipur')
+
+        items = []
+        for product_id in ids:
+            roll = self.rng.random()
+            if roll < self.failure_rate / 2:
+                continue  # dropped
+            if roll < self.failure_rate:
+                items.append({'id': product_id, 'caption': '', 'hashtags': 'oops'})  # invalid
+                continue
+            items.append({'id': product_id, 'caption': f'Product {product_id}, shaped by hand in Jaipur.',
+                          'hashtags': ['pottery', '#handmade']})
+        return FakeResponse('```json\n' + json.dumps(items) + '\n```')
+
+
+def catalog(n):
+    return [{'id': i, 'name': f'Blue Pottery Vase {i}', 'category': 'Pottery', 'price': 500 + i,
+             'description': 'Hand-thrown and glazed with cobalt in the Jaipur tradition.'} for i in range(1, n + 1)]
+
+
+def service(model):
+    upstream = UpstreamClient('gemini-fake', max_concurrency=4, timeout=30)
+    return google_ai_service.GoogleAIService(cache=MemoryLRUCache(), gemini_upstream=upstream, gemini_model=model)
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.4
+    items = catalog(products)
+
+    model = FakeMarketingModel(latency)
+    agent = google_ai_service.MarketingContentAgent(service(model))
+    started = time.perf_counter()
+    # As many calls in flight as the upstream allows, so only the batching differs
+    with ThreadPoolExecutor(agent.ai_service.gemini_upstream.max_concurrency) as pool:
+        list(pool.map(lambda product: agent.generate_social_media_post('Instagram', ARTISAN, product), items))
+    per_product = (time.perf_counter() - started, model.calls)
+
+    model = FakeMarketingModel(latency)
+    agent = google_ai_service.MarketingContentAgent(service(model))
+    started = time.perf_counter()
+    result = agent.generate_catalog_posts(ARTISAN, items)
+    batched = (time.perf_counter() - started, model.calls)
+
+    assert len(result['posts']) == products
+    ai_posts = sum(1 for post in result['posts'].values() if post['source'] == 'ai')
+
+    print(f"{products} products, {latency * 1000:.0f} ms per call, batch size {agent.batch_size}, "
+          f"{model.failure_rate:.0%} of batch items invalid\n")
+    print(f"{'mode':<14}{'calls':>8}{'seconds':>10}")
+    print(f"{'per product':<14}{per_product[1]:>8}{per_product[0]:>10.1f}")
+    print(f"{'batched':<14}{batched[1]:>8}{batched[0]:>10.1f}")
+    print(f"\n{per_product[1] / batched[1]:.0f}x fewer calls, {per_product[0] / batched[0]:.0f}x faster; "
+          f"{ai_posts} AI posts, {result['fallbacks']} template fallbacks")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Onboarding generation benchmark - bio, story title and cultural context for a
+new artisan, end to end through the Flask endpoints: three separate requests
+one after another, the composite endpoint, and the composite endpoint when
+the structured answer is unusable and the three prompts run concurrently.
+The Gemini model is a stub with a fixed latency per call.
+
+Usage: python benchmarks/onboarding.py [rounds] [latency_ms]
+"""
+
+import json
+import statistics
+import sys
+import threading
+import time
+
+from common import FakeResponse, use_scratch_database
+
+use_scratch_database()
+
+import google_ai_service  # noqa: E402
+from app import app  # noqa: E402
+from llm_cache import MemoryLRUCache  # noqa: E402
+from upstream import UpstreamClient  # noqa: E402
+
+
+class FakeOnboardingModel:
+    """Fixed latency per call; `structured` decides whether the composite prompt gets valid JSON"""
+
+    def __init__(self, latency, structured=True):
+        self.latency = latency
+        self.structured = structured
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        if 'JSON object' in prompt:
+            if not self.structured:
+                return FakeResponse('Here is a lovely profile for this artisan!')
+            return FakeResponse('```json\n' + json.dumps({
+                'bio': 'Raised among the kilns of Jaipur, Maya learned blue pottery from her grandmother.',
+                'title': '"Cobalt Dreams in Clay"',
+                'cultural_context': 'Jaipur blue pottery came to Rajasthan with Persian artisans.'
+            }) + '\n```')
+        if 'story title' in prompt:
+            return FakeResponse('"Cobalt Dreams in Clay"')
+        return FakeResponse('Raised among the kilns of Jaipur, Maya learned blue pottery from her grandmother.')
+
+
+def install(model):
+    upstream = UpstreamClient('gemini-fake', max_concurrency=4, timeout=30)
+    google_ai_service.artisan_storytelling_agent.ai_service = google_ai_service.GoogleAIService(
+        cache=MemoryLRUCache(), gemini_upstream=upstream, gemini_model=model
+    )
+
+
+def separate(client, artisan):
+    for endpoint in ('artisan-bio', 'story-title', 'cultural-context'):
+        response = client.post(f'/api/generate/{endpoint}', json=artisan)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+
+def composite(client, artisan):
+    response = client.post('/api/generate/onboarding-profile', json=artisan)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()['source']
+
+
+def measure(rounds, latency, run, structured=True):
+    model = FakeOnboardingModel(latency, structured)
+    install(model)
+    client = app.test_client()
+    timings = []
+    for i in range(rounds):
+        # A new craft per round keeps the response cache out of the measurement
+        artisan = {'name': 'Maya Sharma', 'craft_type': f'Pottery {i}', 'location': 'Jaipur, Rajasthan'}
+        started = time.perf_counter()
+        run(client, artisan)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, model.calls / rounds
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.8
+
+    results = [
+        ('3 requests', measure(rounds, latency, separate)),
+        ('composite', measure(rounds, latency, composite)),
+        ('composite, bad JSON', measure(rounds, latency, composite, structured=False))
+    ]
+
+    print(f"{rounds} onboardings, {latency * 1000:.0f} ms per Gemini call\n")
+    print(f"{'mode':<22}{'calls':>8}{'median ms':>12}")
+    for mode, (ms, calls) in results:
+        print(f'{mode:<22}{calls:>8.0f}{ms:>12.0f}')
+    print(f"\ncomposite is {results[0][1][0] / results[1][1][0]:.1f}x faster than three requests, "
+          f"{results[0][1][0] / results[2][1][0]:.1f}x when it falls back")
+
+
+if __name__ == '__main__':
+    main()
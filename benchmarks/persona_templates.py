@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Persona template micro-benchmark - per-call latency and allocations of the
+precompiled template engine versus the previous build-every-tone approach.
+
+Usage: python benchmarks/persona_templates.py [iterations]
+
+Each timing is the best of five runs of `iterations` calls. Exits non-zero
+if the engine renders any case slower than the legacy code.
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from persona_templates import render_bio, render_product_description  # noqa: E402
+
+ARTISAN = {'name': 'Maya Sharma', 'craft_type': 'Pottery', 'location': 'Jaipur, Rajasthan'}
+PERSONA = {'tone': 'poetic', 'style': 'traditional', 'storytelling_depth': 9}
+PRODUCT = {'category': 'Pottery', 'description': 'Blue pottery vase with floral patterns.'}
+REPEATS = 5
+
+
+def legacy_generate_artisan_bio(artisan_data, persona_data):
+    """The pre-engine implementation: builds all four tones' f-strings on every call"""
+    tone = persona_data.get('tone', 'friendly')
+    depth = persona_data.get('storytelling_depth', 5)
+    templates = {
+        'friendly': {
+            'intro': f"Hi there! I'm {artisan_data['name']}, and I'm passionate about {artisan_data['craft_type']}.",
+            'craft': f"I've been creating beautiful {artisan_data['craft_type']} pieces from my workshop in {artisan_data['location']}.",
+            'story': "Each piece I create tells a story - a blend of traditional techniques passed down through generations and my own creative vision."
+        },
+        'formal': {
+            'intro': f"I am {artisan_data['name']}, a dedicated {artisan_data['craft_type']} artisan.",
+            'craft': f"My workshop in {artisan_data['location']} serves as the foundation for creating exceptional {artisan_data['craft_type']} works.",
+            'story': "My commitment lies in preserving traditional craftsmanship while incorporating contemporary design elements."
+        },
+        'poetic': {
+            'intro': f"In the heart of {artisan_data['location']}, where tradition meets creativity, I am {artisan_data['name']}.",
+            'craft': f"My hands dance with clay and dreams, shaping {artisan_data['craft_type']} that whisper ancient stories.",
+            'story': "Every creation is a poem written in form and texture, a bridge between the wisdom of ancestors and the hopes of tomorrow."
+        },
+        'warm': {
+            'intro': f"Welcome to my world! I'm {artisan_data['name']}, and {artisan_data['craft_type']} is not just my craft - it's my heart's language.",
+            'craft': f"From my cozy workshop in {artisan_data['location']}, I pour love into every piece I create.",
+            'story': "I believe that handmade items carry the warmth of human touch and the joy of creation. Each piece is made with care, just for you."
+        }
+    }
+    template = templates.get(tone, templates['friendly'])
+    bio_parts = [template['intro'], template['craft']]
+    if depth >= 5:
+        bio_parts.append(template['story'])
+    if depth >= 7:
+        bio_parts.append(f"My {artisan_data['craft_type']} reflects the rich cultural heritage of {artisan_data['location']}, where this art form has flourished for centuries.")
+    if depth >= 9:
+        bio_parts.append("When you choose my work, you're not just buying a product - you're becoming part of a story that connects past, present, and future.")
+    return " ".join(bio_parts)
+
+
+def legacy_enrich_product_description(product_data, artisan_persona):
+    base_description = product_data.get('description', '')
+    tone = artisan_persona.tone
+    craft_type = product_data.get('category', 'handcraft')
+    enrichment_styles = {
+        'friendly': f"This beautiful {craft_type} piece is one of my favorites to create! {base_description} I put so much care into every detail, and I hope you'll love it as much as I enjoyed making it.",
+        'formal': f"This {craft_type} represents the finest in traditional craftsmanship. {base_description} Each element has been carefully considered to ensure both aesthetic appeal and functional excellence.",
+        'poetic': f"Behold this {craft_type}, born from inspiration and shaped by skilled hands. {base_description} It carries within it the essence of creativity and the soul of artisanal tradition.",
+        'warm': f"I'm so excited to share this special {craft_type} with you! {base_description} Made with love in my workshop, it's ready to bring joy and beauty to your space."
+    }
+    return enrichment_styles.get(tone, enrichment_styles['friendly'])
+
+
+def check_equivalence():
+    for tone in ('friendly', 'formal', 'poetic', 'warm', 'unknown'):
+        persona = SimpleNamespace(tone=tone, language_preference='en')
+        assert render_product_description(PRODUCT, persona) == legacy_enrich_product_description(PRODUCT, persona)
+        for depth in range(1, 11):
+            settings = {'tone': tone, 'storytelling_depth': depth}
+            assert render_bio(ARTISAN, settings) == legacy_generate_artisan_bio(ARTISAN, settings), (tone, depth)
+
+
+def peak_bytes_per_call(fn):
+    """Transient memory a single call needs on top of what was already allocated"""
+    fn()  # Warm up caches so only per-call work is traced
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - baseline
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    check_equivalence()
+    persona = SimpleNamespace(tone='warm', language_preference='en')
+
+    cases = [
+        ('artisan bio', lambda: legacy_generate_artisan_bio(ARTISAN, PERSONA), lambda: render_bio(ARTISAN, PERSONA)),
+        ('product description', lambda: legacy_enrich_product_description(PRODUCT, persona),
+         lambda: render_product_description(PRODUCT, persona)),
+    ]
+
+    print(f"{'case':<22}{'impl':<10}{'ns/call':>10}{'peak bytes/call':>17}")
+    slower = []
+    for name, legacy, engine in cases:
+        timings = {}
+        for impl, fn in (('legacy', legacy), ('engine', engine)):
+            # Best of several runs, so a noisy machine does not decide the comparison
+            timings[impl] = min(timeit.repeat(fn, number=iterations, repeat=REPEATS)) / iterations * 1e9
+            print(f"{name:<22}{impl:<10}{timings[impl]:>10.0f}{peak_bytes_per_call(fn):>17}")
+        if timings['engine'] > timings['legacy']:
+            slower.append(name)
+
+    assert not slower, f"engine slower than legacy for: {', '.join(slower)}"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Replica routing check - read-only views against a primary and a replica,
+with a user who writes and a user who only browses. Reports which engine
+served each request and checks that the writer reads their own write at once
+while the browser catches up once the replica has it.
+
+By default two SQLite files stand in for the primary and the replica, and a
+thread copies the primary over the replica every --lag seconds. Pass
+--primary-url and --replica-url to run against real Postgres servers, e.g. a
+primary and a streaming standby in two local containers.
+
+Usage: python benchmarks/replica_routing.py [--lag S] [--sticky S] [--reads N]
+                                            [--primary-url URL --replica-url URL]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+from common import scratch_dir, use_scratch_database
+
+parser = argparse.ArgumentParser(description='Read replica routing check')
+parser.add_argument('--lag', type=float, default=1.0, help='seconds between copies to the SQLite stand-in replica')
+parser.add_argument('--sticky', type=float, default=3.0, help='DB_STICKY_SECONDS')
+parser.add_argument('--reads', type=int, default=200, help='anonymous page views to time')
+parser.add_argument('--primary-url')
+parser.add_argument('--replica-url')
+args = parser.parse_args()
+
+# Point the app at the primary and replica before it is imported
+_db_dir = scratch_dir()
+PRIMARY_PATH = os.path.join(_db_dir, 'primary.db')
+REPLICA_PATH = os.path.join(_db_dir, 'replica.db')
+STAND_IN = not args.primary_url
+use_scratch_database(args.primary_url or f'sqlite:///{PRIMARY_PATH}')
+os.environ['DATABASE_REPLICA_URLS'] = args.replica_url or f'sqlite:///{REPLICA_PATH}'
+os.environ['DB_STICKY_SECONDS'] = str(args.sticky)
+os.environ.setdefault('JOB_QUEUE_MODE', 'external')
+
+from sqlalchemy import event  # noqa: E402
+
+import database  # noqa: E402
+from app import app, db, init_db, Artisan  # noqa: E402
+
+served_by = Counter()
+
+
+def replicate():
+    """Copy the primary over the stand-in replica, as a lagging standby would catch up"""
+    with sqlite3.connect(PRIMARY_PATH) as source, sqlite3.connect(REPLICA_PATH) as target:
+        source.backup(target)
+    source.close()
+    target.close()
+
+
+def replicate_forever(stop):
+    while not stop.wait(args.lag):
+        replicate()
+
+
+def count_statements():
+    with app.app_context():
+        for key, engine in db.engines.items():
+            event.listen(engine, 'before_cursor_execute',
+                         lambda *_, key=key: served_by.update([key or 'primary']))
+
+
+def get(client, path):
+    served_by.clear()
+    response = client.get(path)
+    assert response.status_code == 200, response.get_data(as_text=True)[:500]
+    return response, '+'.join(sorted(served_by)) or 'none'
+
+
+def main():
+    init_db()
+    if STAND_IN:
+        replicate()
+        stop = threading.Event()
+        threading.Thread(target=replicate_forever, args=(stop,), daemon=True).start()
+    count_statements()
+
+    with app.app_context():
+        artisan_user_id = db.session.scalar(db.select(Artisan.user_id).order_by(Artisan.id))
+
+    writer, browser = app.test_client(), app.test_client()
+    with writer.session_transaction() as session:
+        session['user_id'] = artisan_user_id
+
+    name = f'Replica Check Lamp {int(time.time())}'
+    search = f"/api/search?q={name.replace(' ', '+')}"
+    failures = []
+
+    print(f"replica: {'SQLite stand-in, copied every %.1fs' % args.lag if STAND_IN else args.replica_url}; "
+          f"sticky window {args.sticky:.1f}s\n")
+    for path in ('/', '/marketplace', search):
+        print(f'{"browser GET " + path.split("?")[0]:<36}{get(browser, path)[1]}')
+
+    product_id = writer.post('/api/products/create', json={
+        'name': name, 'description': 'Hand-beaten brass', 'price': 900, 'category': 'Metalwork'
+    }).get_json()['product_id']
+    writer.put(f'/api/products/{product_id}/status', json={'status': 'published'})
+    wrote_at = time.time()
+    print(f'{"writer creates and publishes":<36}primary')
+
+    response, engine = get(writer, search)
+    print(f'{"writer searches right away":<36}{engine}, found: {response.get_json()["total"] > 0}')
+    if response.get_json()['total'] == 0 or 'replica' in engine:
+        failures.append('the writer did not read their own write from the primary')
+
+    response, engine = get(browser, search)
+    print(f'{"browser searches right away":<36}{engine}, found: {response.get_json()["total"] > 0}')
+
+    found_after = None
+    while time.time() - wrote_at < args.lag * 3 + args.sticky + 5:
+        if get(browser, search)[0].get_json()['total'] > 0:
+            found_after = time.time() - wrote_at
+            break
+        time.sleep(0.05)
+    print(f'{"browser sees it after":<36}' + (f'{found_after:.2f}s' if found_after is not None else 'never'))
+    if found_after is None:
+        failures.append('the replica never caught up')
+
+    time.sleep(max(0.0, wrote_at + args.sticky - time.time()) + 0.1)
+    engine = get(writer, search)[1]
+    print(f'{"writer after the sticky window":<36}{engine}')
+    if 'replica' not in engine:
+        failures.append('the writer was still pinned to the primary after the sticky window')
+
+    started = time.perf_counter()
+    for _ in range(args.reads):
+        get(browser, '/api/marketplace/feed')
+    elapsed = time.perf_counter() - started
+    print(f"\n{args.reads} feed reads in {elapsed:.2f}s ({args.reads / elapsed:.0f}/s), "
+          f"replica reads {database.replicas.reads}, sticky primary reads {database.replicas.sticky_reads}")
+    with app.app_context():
+        for key, stats in database.pool_stats(db).items():
+            print(f'  pool {key:<12} size {stats["size"]:>3}, idle {stats["idle"]:>3}')
+
+    if STAND_IN:
+        stop.set()
+    if failures:
+        print('\nFAILED\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+    print('\nwrites and post-write reads on the primary; read-only views on the replica')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Search benchmark - FTS5/BM25 queries versus the equivalent LIKE scans.
+
+Usage: python benchmarks/search.py [products]
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from common import use_scratch_database
+
+use_scratch_database()
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import app, db, init_db, Artisan, Product, User  # noqa: E402
+from search import autocomplete, like_search_products, search_products  # noqa: E402
+
+CRAFTS = ['Pottery', 'Textiles', 'Jewelry', 'Woodwork', 'Metalwork', 'Painting', 'Leather', 'Glass']
+LOCATIONS = ['Jaipur', 'Varanasi', 'Kutch', 'Channapatna', 'Moradabad', 'Madhubani', 'Kolhapur', 'Firozabad']
+WORDS = ('handwoven indigo terracotta brass carved lacquered embroidered block printed silk cotton '
+         'teak clay glazed filigree silver mirror-work heritage festival wedding village river').split()
+
+QUERIES = ['indigo silk', 'brass lamp', 'terracotta', 'carved teak box', 'jaipur pottery', 'wedding silver']
+
+
+def seed(products):
+    user = User.query.first()
+    artisans = [{
+        'user_id': user.id, 'name': f'Artisan {i}', 'craft_type': CRAFTS[i % len(CRAFTS)],
+        'location': LOCATIONS[i % len(LOCATIONS)], 'bio': 'Bench artisan'
+    } for i in range(max(1, products // 10))]
+    artisan_ids = db.session.scalars(insert(Artisan).returning(Artisan.id), artisans).all()
+
+    rng = random.Random(42)
+    rows = [{
+        'artisan_id': artisan_ids[i % len(artisan_ids)],
+        'name': ' '.join(rng.sample(WORDS, 3)).title(),
+        'description': ' '.join(rng.choices(WORDS, k=30)),
+        'category': CRAFTS[i % len(CRAFTS)],
+        'price': rng.randint(100, 10000),
+        'status': 'published'
+    } for i in range(products)]
+    db.session.execute(insert(Product), rows)
+    db.session.commit()
+
+
+def timed(fn, repeat=20):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    init_db()
+
+    with app.app_context():
+        start = time.perf_counter()
+        seed(products)
+        print(f"seeded {products:,} products (index maintained by triggers) in {time.perf_counter() - start:.1f}s\n")
+
+        print(f"{'query':<20}{'fts5 ms':>10}{'like ms':>10}{'speedup':>10}")
+        for query in QUERIES:
+            fts = timed(lambda: search_products(query))
+            like = timed(lambda: like_search_products(query), repeat=3)
+            print(f"{query:<20}{fts:>10.2f}{like:>10.2f}{like / fts:>9.1f}x")
+
+        print(f"\nautocomplete 'ter': {timed(lambda: autocomplete('ter')):.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
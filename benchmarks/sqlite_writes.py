@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+SQLite write concurrency benchmark - several worker processes, each with
+several request threads, creating products through the API against one
+SQLite file, as gunicorn workers would. Runs once with the
+stock engine settings and once with the SQLite engine profile (WAL, pragmas,
+one BEGIN IMMEDIATE writer per process, read-only pool), on fresh databases,
+and reports write throughput and how many writes failed with "database is
+locked".
+
+Usage: python benchmarks/sqlite_writes.py [--processes N] [--threads N] [--writes N]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+from common import ROOT, scratch_database_url
+
+
+def setup():
+    """Create the schema and print the sample artisan's user id"""
+    from app import app, db, init_db, Artisan
+
+    init_db()
+    with app.app_context():
+        print(db.session.scalar(db.select(Artisan.user_id).order_by(Artisan.id)))
+
+
+def worker(user_id, threads, writes, start_at):
+    """Product-create loops on `threads` threads; prints outcome counts as JSON"""
+    from app import app
+
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def run(n):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+        for i in range(writes):
+            response = client.post('/api/products/create', json={
+                'name': f'Bench Bowl {os.getpid()}-{n}-{i}', 'description': 'Wheel-thrown stoneware', 'price': 450
+            })
+            message = (response.get_json() or {}).get('message', '')
+            with lock:
+                outcomes['ok' if response.status_code == 200 else
+                         'locked' if 'locked' in message else 'error'] += 1
+
+    pool = [threading.Thread(target=run, args=(n,)) for n in range(threads)]
+    time.sleep(max(0.0, start_at - time.time()))  # every process starts writing together
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    print(json.dumps({**outcomes, 'seconds': time.perf_counter() - started}))
+
+
+def run_profile(profile, args):
+    env = dict(os.environ)
+    env['PERSONA_DATABASE_URL'] = scratch_database_url()
+    env['SQLITE_ENGINE_PROFILE'] = profile
+    env['JOB_QUEUE_MODE'] = 'external'  # enrichment jobs are written, not run
+    script = os.path.abspath(__file__)
+
+    user_id = subprocess.run([sys.executable, script, '--role', 'setup'], env=env, cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout.split()[-1]
+    start_at = time.time() + 3  # time for every process to import the app
+    workers = [subprocess.Popen([sys.executable, script, '--role', 'worker', '--user-id', user_id,
+                                 '--threads', str(args.threads), '--writes', str(args.writes),
+                                 '--start-at', str(start_at)],
+                                env=env, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+               for _ in range(args.processes)]
+
+    totals = Counter()
+    seconds = 0.0
+    for process in workers:
+        result = json.loads(process.communicate()[0].strip().splitlines()[-1])
+        seconds = max(seconds, result.pop('seconds'))
+        totals.update(result)
+    return totals, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent SQLite write benchmark')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8, help='request threads per process')
+    parser.add_argument('--writes', type=int, default=25, help='products created per thread')
+    parser.add_argument('--role', choices=('bench', 'setup', 'worker'), default='bench')
+    parser.add_argument('--user-id', type=int)
+    parser.add_argument('--start-at', type=float)
+    args = parser.parse_args()
+
+    if args.role != 'bench':
+        if args.role == 'setup':
+            setup()
+        else:
+            worker(args.user_id, args.threads, args.writes, args.start_at)
+        return
+
+    print(f'{args.processes} processes x {args.threads} threads, {args.writes} products each '
+          f'(one create request per product)\n')
+    print(f"{'engine':<16}{'writes':>8}{'ok':>8}{'locked':>8}{'errors':>8}{'seconds':>9}{'ok/s':>8}{'locked %':>10}")
+    for profile, label in (('off', 'stock'), ('on', 'sqlite profile')):
+        totals, seconds = run_profile(profile, args)
+        attempted = sum(totals.values())
+        print(f"{label:<16}{attempted:>8}{totals['ok']:>8}{totals['locked']:>8}{totals['error']:>8}"
+              f"{seconds:>9.1f}{totals['ok'] / seconds:>8.0f}{100 * totals['locked'] / max(attempted, 1):>9.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Streaming generation benchmark - time to first byte and total time for
+/api/generate/artisan-bio, blocking JSON versus SSE, against a fake
+Gemini model that produces tokens at a fixed rate.
+
+Usage: python benchmarks/streaming.py [requests]
+"""
+
+import json
+import statistics
+import sys
+import time
+
+from common import FakeResponse, use_scratch_database
+
+use_scratch_database()
+
+import google_ai_service  # noqa: E402
+from app import app, artisan_storytelling_agent  # noqa: E402
+from llm_cache import MemoryLRUCache  # noqa: E402
+from upstream import UpstreamClient  # noqa: E402
+
+BIO_WORDS = ('I learned this craft at my grandmother\'s wheel, shaping river clay into lamps and bowls '
+             'for the village festivals. ' * 6).split()
+
+
+class FakeStreamingModel:
+    """generate_content with Gemini's shape: a slow first token, then a steady token rate"""
+
+    def __init__(self, first_token=0.6, per_chunk=0.04, words_per_chunk=3):
+        self.first_token = first_token
+        self.per_chunk = per_chunk
+        self.chunks = [' '.join(BIO_WORDS[i:i + words_per_chunk]) + ' '
+                       for i in range(0, len(BIO_WORDS), words_per_chunk)]
+
+    def _generate(self):
+        time.sleep(self.first_token)
+        for chunk in self.chunks:
+            yield FakeResponse(chunk)
+            time.sleep(self.per_chunk)
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        if stream:
+            return self._generate()
+        return FakeResponse(''.join(chunk.text for chunk in self._generate()))
+
+
+def timed_request(client, n, stream):
+    """(time to first byte, total time) in ms for one bio request"""
+    # Distinct names per request and mode, so no answer comes from the response cache
+    payload = {'name': f'Bench Artisan {n} {stream}', 'craft_type': 'Pottery', 'location': 'Jaipur', 'tone': 'warm'}
+    headers = {'Accept': 'text/event-stream'} if stream else {}
+    start = time.perf_counter()
+    response = client.post('/api/generate/artisan-bio', json=payload, headers=headers, buffered=False)
+    first = None
+    body = b''
+    for data in response.response:
+        first = first or time.perf_counter()
+        body += data
+    end = time.perf_counter()
+    response.close()
+    assert response.status_code == 200 and (b'event: done' in body if stream else json.loads(body)['success'])
+    return (first - start) * 1000, (end - start) * 1000
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    upstream = UpstreamClient('gemini-fake', max_concurrency=4, timeout=10)
+    artisan_storytelling_agent.ai_service = google_ai_service.GoogleAIService(
+        cache=MemoryLRUCache(), gemini_upstream=upstream, gemini_model=FakeStreamingModel()
+    )
+    client = app.test_client()
+
+    print(f"{'mode':<12}{'TTFB ms':>10}{'total ms':>10}")
+    for label, stream in (('blocking', False), ('sse', True)):
+        samples = [timed_request(client, n, stream) for n in range(requests)]
+        print(f"{label:<12}{statistics.median(s[0] for s in samples):>10.0f}"
+              f"{statistics.median(s[1] for s in samples):>10.0f}")
+
+    print(f"\nupstream first chunk: {upstream.stats()['first_chunk_ms']}")
+
+    # No model configured: the fallback bio is streamed in word chunks
+    artisan_storytelling_agent.ai_service = google_ai_service.GoogleAIService(cache=MemoryLRUCache())
+    if hasattr(artisan_storytelling_agent.ai_service, 'gemini_model'):
+        del artisan_storytelling_agent.ai_service.gemini_model
+    response = client.post('/api/generate/artisan-bio?stream=1', json={'name': 'Fallback'})
+    print(f"fallback stream: {response.get_data(as_text=True).count('event: chunk')} chunks, "
+          f"mimetype {response.mimetype}")
+
+
+if __name__ == '__main__':
+    main()
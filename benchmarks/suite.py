@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Load-test suite - marketplace pages, persona preview, product creation and
+the /api/generate/* endpoints over a seeded synthetic dataset, with Gemini
+replaced by a stub model of configurable latency.
+
+Reports p50/p95/p99 latency, throughput, SQL statements per request and peak
+RSS per scenario, and writes them as JSON so runs can be compared between
+commits.
+
+Usage: python benchmarks/suite.py [--scale 1k|10k|100k] [--requests N] [--concurrency N]
+                                  [--ai-latency MS] [--only NAME,...] [--output PATH]
+                                  [--compare BASELINE.json] [--threshold PCT]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import ROOT, use_scratch_database
+
+use_scratch_database()
+
+import google_ai_service  # noqa: E402
+import synthetic_data  # noqa: E402
+from app import app, artisan_storytelling_agent, db, init_db, User  # noqa: E402
+from llm_cache import MemoryLRUCache  # noqa: E402
+
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000}
+QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+WARMUP_REQUESTS = 5
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """Stands in for the Gemini model: fixed latency, canned text"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def _chunks(self):
+        words = ('Shaped by hand in a small village workshop, every piece carries the patience of '
+                 'three generations of makers and the colours of the river market. ' * 3).split()
+        for i in range(0, len(words), 4):
+            yield StubResponse(' '.join(words[i:i + 4]) + ' ')
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        if stream:
+            return self._stream()
+        time.sleep(self.latency)
+        return StubResponse(''.join(chunk.text for chunk in self._chunks()))
+
+    def _stream(self):
+        chunks = list(self._chunks())
+        for chunk in chunks:
+            time.sleep(self.latency / len(chunks))
+            yield chunk
+
+
+# Scenarios: name -> (needs an artisan login, request builder(n, rng) -> (method, url, json))
+def _persona(rng):
+    return {'tone': rng.choice(synthetic_data.TONES), 'style': rng.choice(synthetic_data.STYLES),
+            'storytelling_depth': rng.randint(1, 10)}
+
+
+SCENARIOS = {
+    'homepage': (False, lambda n, rng: ('GET', '/', None)),
+    'marketplace': (False, lambda n, rng: ('GET', '/marketplace', None)),
+    'persona_preview': (False, lambda n, rng: ('POST', '/api/persona/preview', {
+        'name': f'Load Test {rng.randint(1, 50)}', 'craft_type': rng.choice(synthetic_data.CRAFTS),
+        'location': rng.choice(synthetic_data.LOCATIONS), 'persona': _persona(rng)
+    })),
+    'product_create': (True, lambda n, rng: ('POST', '/api/products/create', {
+        'name': f'Load Test Lamp {n}', 'description': 'Hand-beaten brass lamp for festive evenings',
+        'price': rng.randint(300, 5000), 'stock_quantity': 3
+    })),
+    'generate_bio': (False, lambda n, rng: ('POST', '/api/generate/artisan-bio', {
+        'name': f'Load Test {n}', 'craft_type': rng.choice(synthetic_data.CRAFTS),
+        'location': rng.choice(synthetic_data.LOCATIONS), 'tone': rng.choice(synthetic_data.TONES)
+    })),
+    'generate_description': (False, lambda n, rng: ('POST', '/api/generate/product-description', {
+        'name': f'Load Test Vase {n}', 'category': rng.choice(synthetic_data.CRAFTS), 'persona': 'warm'
+    })),
+    'generate_title': (False, lambda n, rng: ('POST', '/api/generate/story-title', {
+        'craft_type': rng.choice(synthetic_data.CRAFTS), 'location': f'Village {n}'
+    })),
+    'generate_bundles': (False, lambda n, rng: ('POST', '/api/generate/product-bundles', {
+        'theme': rng.choice(['complementary', 'festive', 'traditional']), 'size': 3
+    })),
+}
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # ru_maxrss is KiB on Linux
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return revision + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_scenario(name, requests, concurrency, artisan_user_ids):
+    login, build = SCENARIOS[name]
+    local = threading.local()
+    counter = iter(range(10 ** 9))
+    lock = threading.Lock()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+            local.rng = random.Random(threading.get_ident())
+            if login:
+                with local.client.session_transaction() as session:
+                    session['user_id'] = local.rng.choice(artisan_user_ids)
+        return local.client
+
+    def one_request(_):
+        test_client = client()
+        with lock:
+            n = next(counter)
+        method, url, payload = build(n, local.rng)
+        started = time.perf_counter()
+        response = test_client.open(url, method=method, json=payload)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        response.close()
+        match = QUERY_COUNT.search(response.headers.get('Server-Timing', ''))
+        return elapsed, response.status_code, int(match.group(1)) if match else None
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one_request, range(WARMUP_REQUESTS)))
+        started = time.perf_counter()
+        results = list(pool.map(one_request, range(requests)))
+        wall = time.perf_counter() - started
+
+    latencies = [elapsed * 1000 for elapsed, _, _ in results]
+    queries = [count for _, _, count in results if count is not None]
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, status, _ in results if status >= 400),
+        'throughput_rps': round(requests / wall, 1),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+        'queries_p50': percentile(queries, 0.5) if queries else None,
+        'queries_max': max(queries) if queries else None,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print per-scenario deltas against a baseline run; returns the regressed scenarios"""
+    print(f"\ncompared with {baseline['meta']['revision']} (regression threshold {threshold:.0f}%)")
+    print(f"{'scenario':<22}{'p95 ms':>10}{'was':>10}{'delta':>9}{'rps':>9}{'was':>9}{'queries':>9}{'was':>6}")
+    regressed = []
+    for name, current in results['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if not previous:
+            continue
+        delta = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100 if previous['p95_ms'] else 0
+        more_queries = (current['queries_max'] or 0) > (previous['queries_max'] or 0)
+        flag = ' <-' if delta > threshold or more_queries else ''
+        if flag:
+            regressed.append(name)
+        print(f"{name:<22}{current['p95_ms']:>10.1f}{previous['p95_ms']:>10.1f}{delta:>+8.0f}%"
+              f"{current['throughput_rps']:>9.0f}{previous['throughput_rps']:>9.0f}"
+              f"{current['queries_max'] or 0:>9}{previous['queries_max'] or 0:>6}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Marketplace and AI endpoint load test')
+    parser.add_argument('--scale', default='1k', help='1k, 10k, 100k or a number of artisans and products')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--ai-latency', type=float, default=300, help='stub Gemini latency in ms')
+    parser.add_argument('--only', help='comma-separated scenarios to run')
+    parser.add_argument('--output', help='results file (default benchmarks/results/<revision>-<scale>.json)')
+    parser.add_argument('--compare', help='baseline results file to compare against')
+    parser.add_argument('--threshold', type=float, default=10, help='p95 regression threshold in percent')
+    args = parser.parse_args()
+
+    size = SCALES.get(args.scale) or int(args.scale)
+    scenarios = args.only.split(',') if args.only else list(SCENARIOS)
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    started = time.perf_counter()
+    init_db(synthetic_artisans=size, synthetic_products=size)
+    seed_seconds = time.perf_counter() - started
+
+    # Every AI call goes to the stub model, through the real upstream limits and fallbacks
+    artisan_storytelling_agent.ai_service = google_ai_service.GoogleAIService(
+        cache=MemoryLRUCache(), gemini_model=StubModel(args.ai_latency / 1000)
+    )
+
+    with app.app_context():
+        artisan_user_ids = db.session.scalars(db.select(User.id).where(
+            User.username.startswith(synthetic_data.USERNAME_PREFIX)
+        ).limit(1000)).all()
+
+    results = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scale': size,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'ai_latency_ms': args.ai_latency,
+            'seed_seconds': round(seed_seconds, 1)
+        },
+        'scenarios': {}
+    }
+
+    print(f"seeded {size:,} artisans and products in {seed_seconds:.1f}s; "
+          f"{args.requests} requests per scenario, concurrency {args.concurrency}, AI latency {args.ai_latency:.0f} ms\n")
+    print(f"{'scenario':<22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'rps':>8}{'errors':>8}{'queries':>9}{'rss MB':>8}")
+    for name in scenarios:
+        stats = run_scenario(name, args.requests, args.concurrency, artisan_user_ids)
+        results['scenarios'][name] = stats
+        print(f"{name:<22}{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+              f"{stats['throughput_rps']:>8.0f}{stats['errors']:>8}{stats['queries_max'] or 0:>9}"
+              f"{stats['peak_rss_mb']:>8.0f}")
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results',
+                                         f"{results['meta']['revision']}-{args.scale}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(results, json.load(f), args.threshold)
+        if regressed:
+            print(f"\nregressions: {', '.join(regressed)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
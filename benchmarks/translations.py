@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Translation pipeline benchmark - batched upstream calls, store hits and
+single-flight collapsing, measured against a stub translate client.
+
+Usage: python benchmarks/translations.py [segments]
+"""
+
+import sys
+import threading
+import time
+
+from common import use_scratch_database
+
+use_scratch_database()
+
+import translations  # noqa: E402
+from app import app, init_db  # noqa: E402
+
+
+class StubTranslateClient:
+    """Stands in for GoogleAIService: fixed latency per call, records every request"""
+
+    def __init__(self, latency=0.2):
+        self.latency = latency
+        self.calls = 0
+        self.segments = 0
+        self._lock = threading.Lock()
+
+    def translate_batch(self, texts, target_language, source_language=None):
+        with self._lock:
+            self.calls += 1
+            self.segments += len(texts)
+        time.sleep(self.latency)
+        return [f'[{target_language}] {text}' for text in texts]
+
+
+def main():
+    segments = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    init_db()
+    stub = StubTranslateClient()
+    translations.configure(stub)
+    texts = [f'Handcrafted piece number {i} made in the village workshop.' for i in range(segments)]
+
+    with app.app_context():
+        print(f"{'run':<34}{'upstream calls':>15}{'segments':>10}{'ms':>9}")
+
+        start = time.perf_counter()
+        translations.translate_segments(texts + texts[:50], 'hi')
+        print(f"{'cold, batched (with duplicates)':<34}{stub.calls:>15}{stub.segments:>10}"
+              f"{(time.perf_counter() - start) * 1000:>9.0f}")
+
+        calls, sent = stub.calls, stub.segments
+        start = time.perf_counter()
+        translations.translate_segments(texts, 'hi')
+        print(f"{'warm, from store':<34}{stub.calls - calls:>15}{stub.segments - sent:>10}"
+              f"{(time.perf_counter() - start) * 1000:>9.1f}")
+
+        print(f"{'per-segment API (previous code)':<34}{segments:>15}{segments:>10}"
+              f"{segments * stub.latency * 1000:>9.0f}  (estimated)")
+
+    # Concurrent identical misses through the endpoint collapse into one upstream call
+    calls = stub.calls
+    responses = []
+
+    def request():
+        response = app.test_client().post('/api/translate', json={'text': 'A brand new bio', 'target_language': 'ta'})
+        responses.append(response.get_json()['translated_text'])
+
+    threads = [threading.Thread(target=request) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"\n16 concurrent identical misses: {stub.calls - calls} upstream call, "
+          f"{translations.inflight.shared} requests shared it, answers identical: {len(set(responses)) == 1}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Upstream client benchmark - concurrency limit, deadlines and circuit breaker
+against a local fake upstream that can be made slow or failing.
+
+Usage: python benchmarks/upstream_client.py [callers]
+"""
+
+import http.client
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from upstream import CircuitBreaker, UpstreamClient, UpstreamError  # noqa: E402
+
+
+class FakeUpstream(BaseHTTPRequestHandler):
+    """Answers after `delay` seconds, or with a 503 while `failing` is set"""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    delay = 0.05
+    failing = False
+    active = 0
+    peak = 0
+    connections = set()
+    lock = threading.Lock()
+
+    def do_POST(self):
+        cls = type(self)
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+            cls.connections.add(self.client_address)
+        try:
+            time.sleep(cls.delay)
+            status, body = (503, b'unavailable') if cls.failing else (200, b'{"text": "ok"}')
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+_local = threading.local()
+
+
+def generate(port):
+    """One keep-alive connection per pool thread, reused across calls"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = _local.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.request('POST', '/generate', body=b'{"prompt": "bio"}')
+    response = conn.getresponse()
+    body = response.read()
+    if response.status != 200:
+        raise RuntimeError(f'upstream returned {response.status}')
+    return body
+
+
+def burst(client, port, callers):
+    """Fire `callers` concurrent calls; returns (outcomes, wall ms, slowest call ms)"""
+    outcomes = {}
+
+    def one(_):
+        start = time.perf_counter()
+        try:
+            client.call(generate, port)
+            outcome = 'ok'
+        except UpstreamError as e:
+            outcome = type(e).__name__
+        except Exception:
+            outcome = 'upstream_error'
+        return outcome, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        results = list(executor.map(one, range(callers)))
+    for outcome, _ in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return outcomes, (time.perf_counter() - start) * 1000, max(elapsed for _, elapsed in results) * 1000
+
+
+def main():
+    callers = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeUpstream)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = UpstreamClient('fake', max_concurrency=4, timeout=2.0,
+                            breaker=CircuitBreaker(failure_threshold=4, reset_timeout=3.0))
+
+    print(f"{callers} concurrent callers, limit {client.max_concurrency}, deadline {client.timeout}s")
+
+    FakeUpstream.delay = 0.05
+    outcomes, wall, slowest = burst(client, port, callers)
+    print(f"healthy      {outcomes}  wall {wall:7.1f} ms  slowest {slowest:7.1f} ms  "
+          f"upstream peak {FakeUpstream.peak}  connections {len(FakeUpstream.connections)}")
+
+    # Hung upstream: the first calls hit the deadline and open the circuit
+    FakeUpstream.delay = 2.5
+    outcomes, wall, slowest = burst(client, port, client.max_concurrency)
+    print(f"hung         {outcomes}  wall {wall:7.1f} ms  slowest {slowest:7.1f} ms  "
+          f"circuit {client.breaker.state}")
+
+    # Everything else fails fast instead of waiting for its own timeout
+    outcomes, wall, slowest = burst(client, port, callers)
+    print(f"open         {outcomes}  wall {wall:7.1f} ms  slowest {slowest:7.1f} ms  "
+          f"circuit {client.breaker.state}")
+
+    # Erroring upstream: the half-open trial fails and the circuit reopens
+    FakeUpstream.delay = 0.05
+    FakeUpstream.failing = True
+    time.sleep(client.breaker.reset_timeout)
+    outcomes, wall, slowest = burst(client, port, callers)
+    print(f"erroring     {outcomes}  wall {wall:7.1f} ms  slowest {slowest:7.1f} ms  "
+          f"circuit {client.breaker.state}")
+
+    FakeUpstream.failing = False
+    time.sleep(client.breaker.reset_timeout)
+    outcomes, wall, slowest = burst(client, port, callers)
+    print(f"recovered    {outcomes}  wall {wall:7.1f} ms  slowest {slowest:7.1f} ms  "
+          f"circuit {client.breaker.state}")
+
+    print('stats', client.stats())
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Checkout - Transactional order placement with atomic stock decrements
+All cart products are loaded in one query, then each line takes its stock
+with a conditional UPDATE ... WHERE stock_quantity >= :qty, so two buyers
+racing for the last unit cannot both succeed. The order, its items and the
+decrements commit together or not at all.
+"""
+
+import logging
+import time
+from typing import Any, Dict
+
+from sqlalchemy import case, select, update
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+
+class CheckoutError(ValueError):
+    """Raised when a cart cannot be turned into an order"""
+
+
+class OutOfStockError(CheckoutError):
+    """Raised when a product no longer has the requested quantity; nothing is written"""
+
+    def __init__(self, product_id: int, requested: int):
+        super().__init__(f'Product {product_id} does not have {requested} in stock')
+        self.product_id = product_id
+        self.requested = requested
+
+
+def parse_cart(items: Any, max_lines: int, max_quantity: int) -> Dict[int, int]:
+    """Validate a [{product_id, quantity}] payload into {product_id: quantity}, merging repeated products"""
+    if not isinstance(items, list) or not items:
+        raise CheckoutError('Cart is empty')
+    if len(items) > max_lines:
+        raise CheckoutError(f'Carts are limited to {max_lines} lines')
+
+    cart = {}
+    for position, item in enumerate(items, start=1):
+        try:
+            product_id = int(item['product_id'])
+            quantity = int(item.get('quantity', 1))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise CheckoutError(f'Line {position}: product_id and an integer quantity are required')
+        if product_id <= 0 or quantity <= 0:
+            raise CheckoutError(f'Line {position}: product_id and quantity must be positive')
+        cart[product_id] = cart.get(product_id, 0) + quantity
+        if cart[product_id] > max_quantity:
+            raise CheckoutError(f'At most {max_quantity} of one product per order')
+    return cart
+
+
+def _is_lock_conflict(error: OperationalError) -> bool:
+    """SQLite refuses to upgrade a stale read snapshot to a write; the transaction can simply be retried"""
+    message = str(error.orig).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def _take_stock(session, product_id: int, quantity: int):
+    """Decrement one product's stock if enough remains. Returns (price, stock_left, artisan_id) or None."""
+    from app import Product
+
+    products = Product.__table__
+    remaining = products.c.stock_quantity - quantity
+    return session.execute(
+        update(products)
+        .where(products.c.id == product_id,
+               products.c.status == 'published',
+               products.c.stock_quantity >= quantity)
+        .values(stock_quantity=remaining,
+                status=case((remaining <= 0, 'sold_out'), else_=products.c.status))
+        .returning(products.c.price, products.c.stock_quantity, products.c.artisan_id)
+    ).first()
+
+
+def _place_order(session, customer_id: int, cart: Dict[int, int]):
+    from app import Order, OrderItem, Product
+    import artisan_stats
+    import recommendations
+    from fragment_cache import invalidate_artisan
+
+    # One query for the whole cart, to reject unknown or unlisted products before taking any stock
+    products = Product.__table__
+    listed = dict(session.execute(
+        select(products.c.id, products.c.status).where(products.c.id.in_(cart))
+    ).all())
+    missing = sorted(set(cart) - set(listed))
+    if missing:
+        raise CheckoutError(f"Products not found: {', '.join(map(str, missing))}")
+    for product_id, status in sorted(listed.items()):
+        if status == 'sold_out':
+            raise OutOfStockError(product_id, cart[product_id])
+    unavailable = sorted(product_id for product_id, status in listed.items() if status != 'published')
+    if unavailable:
+        raise CheckoutError(f"Products not available: {', '.join(map(str, unavailable))}")
+
+    # Ascending id order, so concurrent checkouts lock shared rows in the same order
+    lines, sold_out = [], False
+    for product_id in sorted(cart):
+        taken = _take_stock(session, product_id, cart[product_id])
+        if taken is None:
+            raise OutOfStockError(product_id, cart[product_id])
+
+        price, stock_left, artisan_id = taken
+        lines.append((product_id, cart[product_id], price))
+        delta = {'stock_total': -cart[product_id]}
+        if stock_left <= 0:
+            delta.update(published_count=-1, sold_out_count=1)
+            sold_out = True
+        # Core UPDATEs skip the mapper events that maintain these
+        artisan_stats.apply_delta(session.connection(), artisan_id, delta)
+        invalidate_artisan(session.connection(), artisan_id)
+
+    order = Order(customer_id=customer_id, total_amount=sum(quantity * price for _, quantity, price in lines))
+    session.add(order)
+    session.flush()
+    session.add_all([OrderItem(order_id=order.id, product_id=product_id, quantity=quantity, price=price)
+                     for product_id, quantity, price in lines])
+    session.flush()
+    # Read before commit expires the order
+    placed = {
+        'order_id': order.id,
+        'total_amount': order.total_amount,
+        'status': order.status,
+        'items': [{'product_id': product_id, 'quantity': quantity, 'price': price}
+                  for product_id, quantity, price in lines]
+    }
+    session.commit()
+
+    if sold_out:
+        recommendations.invalidate_index()
+    return placed
+
+
+def place_order(customer_id: int, cart: Dict[int, int], retries: int = 3) -> Dict[str, Any]:
+    """Create an order for `cart` and take its stock in one transaction.
+
+    Raises CheckoutError (or OutOfStockError) after rolling back; retries the
+    whole transaction when SQLite reports a write-lock conflict.
+    """
+    from app import db
+
+    for attempt in range(retries + 1):
+        try:
+            return _place_order(db.session, customer_id, cart)
+        except OperationalError as e:
+            db.session.rollback()
+            if attempt == retries or not _is_lock_conflict(e):
+                raise
+            logger.debug('Checkout lock conflict, retrying (attempt %d)', attempt + 1)
+            time.sleep(0.01 * 2 ** attempt)
+        except Exception:
+            db.session.rollback()
+            raise
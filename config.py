@@ -14,12 +14,33 @@ class Config:
         'pool_pre_ping': True,
         'pool_recycle': 300,
     }
+    # SQLite files: WAL and pragmas, one writer connection and a read-only pool per process (database.py).
+    # The single writer only serializes threads within a process: writers in other gunicorn workers or the
+    # job worker still contend for SQLite's lock, and give up after SQLITE_BUSY_TIMEOUT_MS.
+    SQLITE_ENGINE_PROFILE = os.environ.get('SQLITE_ENGINE_PROFILE', 'true').lower() in ['true', 'on', '1']
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 10000)  # wait for the write lock
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE') or 256 * 1024 * 1024)  # bytes
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB') or 64 * 1024)  # page cache per connection
+    SQLITE_READ_POOL_SIZE = int(os.environ.get('SQLITE_READ_POOL_SIZE') or 8)  # read-only connections per process
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 5)  # primary connections per process (server databases)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 10)
+    
+    # Read Replicas (database.py): read-only views query these; writes and recent writers use the primary
+    DATABASE_REPLICA_URLS = [url.strip() for url in (os.environ.get('DATABASE_REPLICA_URLS') or '').split(',')
+                             if url.strip()]
+    DB_REPLICA_POOL_SIZE = int(os.environ.get('DB_REPLICA_POOL_SIZE') or 10)  # connections per replica per process
+    DB_REPLICA_MAX_OVERFLOW = int(os.environ.get('DB_REPLICA_MAX_OVERFLOW') or 10)
+    DB_STICKY_SECONDS = float(os.environ.get('DB_STICKY_SECONDS') or 5)  # reads stay on the primary after a write
+    DB_REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG') or 30)  # seconds; laggier replicas are skipped
+    DB_REPLICA_CHECK_INTERVAL = float(os.environ.get('DB_REPLICA_CHECK_INTERVAL') or 5)  # seconds between lag probes
     
     # Session Configuration
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
+    # Keep the user type and artisan id in the signed session so authorization checks skip the database
+    SESSION_IDENTITY_CLAIMS = os.environ.get('SESSION_IDENTITY_CLAIMS', 'false').lower() in ['true', 'on', '1']
     
     # Security Configuration
     WTF_CSRF_ENABLED = True
@@ -29,12 +50,95 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+    IMAGE_VARIANT_WIDTHS = [int(w) for w in (os.environ.get('IMAGE_VARIANT_WIDTHS') or '320,640,1280').split(',')]
+    IMAGE_THUMBNAIL_SIZE = int(os.environ.get('IMAGE_THUMBNAIL_SIZE') or 320)  # square crop for cards
+    IMAGE_WEBP_QUALITY = int(os.environ.get('IMAGE_WEBP_QUALITY') or 80)
+    IMAGE_PROCESS_WORKERS = int(os.environ.get('IMAGE_PROCESS_WORKERS') or 2)  # processes rendering variants
+    IMAGE_CACHE_MAX_AGE = int(os.environ.get('IMAGE_CACHE_MAX_AGE') or 365 * 24 * 3600)  # seconds
     
     # AI Service Configuration - Essential Google AI Only
     GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY')  # For Gemini API
     GOOGLE_CLOUD_PROJECT = os.environ.get('GOOGLE_CLOUD_PROJECT')  # For Google Translate
     GOOGLE_APPLICATION_CREDENTIALS = os.environ.get('GOOGLE_APPLICATION_CREDENTIALS')  # Service account key
     
+    # Upstream Limits (per worker process)
+    GEMINI_MAX_CONCURRENCY = int(os.environ.get('GEMINI_MAX_CONCURRENCY') or 4)
+    GEMINI_TIMEOUT = float(os.environ.get('GEMINI_TIMEOUT') or 20)  # seconds per call, including queueing
+    TRANSLATE_MAX_CONCURRENCY = int(os.environ.get('TRANSLATE_MAX_CONCURRENCY') or 8)
+    TRANSLATE_TIMEOUT = float(os.environ.get('TRANSLATE_TIMEOUT') or 5)  # seconds per call, including queueing
+    UPSTREAM_BREAKER_FAILURES = int(os.environ.get('UPSTREAM_BREAKER_FAILURES') or 5)  # consecutive failures to open
+    UPSTREAM_BREAKER_RESET = float(os.environ.get('UPSTREAM_BREAKER_RESET') or 30)  # seconds before a trial call
+    
+    # Translation Store
+    TRANSLATION_TARGET_LANGUAGES = [lang.strip() for lang in
+                                    (os.environ.get('TRANSLATION_TARGET_LANGUAGES') or 'hi').split(',') if lang.strip()]
+    TRANSLATE_BATCH_SIZE = int(os.environ.get('TRANSLATE_BATCH_SIZE') or 100)  # segments per upstream call (API max 128)
+    TRANSLATE_BATCH_MAX_CHARS = int(os.environ.get('TRANSLATE_BATCH_MAX_CHARS') or 25000)
+    MARKETING_BATCH_SIZE = int(os.environ.get('MARKETING_BATCH_SIZE') or 25)  # products per Gemini prompt
+    MARKETING_MAX_RETRIES = int(os.environ.get('MARKETING_MAX_RETRIES') or 2)  # re-asks for items that failed validation
+    
+    # LLM Response Cache
+    LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', 'true').lower() in ['true', 'on', '1']
+    LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL') or 7 * 24 * 3600)  # seconds
+    LLM_CACHE_MEMORY_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MEMORY_MAX_ENTRIES') or 512)
+    LLM_CACHE_DISK_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_DISK_MAX_ENTRIES') or 10000)
+    LLM_CACHE_EVICT_EVERY = int(os.environ.get('LLM_CACHE_EVICT_EVERY') or 100)  # Disk-tier writes between eviction sweeps
+    LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH', '/tmp/persona_llm_cache.db')  # Empty disables the disk tier
+    LLM_CACHE_MAX_TEMPERATURE = float(os.environ.get('LLM_CACHE_MAX_TEMPERATURE') or 1.0)  # Hotter calls skip the cache
+    
+    # Background Jobs
+    JOB_QUEUE_MODE = os.environ.get('JOB_QUEUE_MODE', 'thread')  # thread, external (python -m jobs), eager
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS') or 3)
+    JOB_RETRY_BACKOFF = int(os.environ.get('JOB_RETRY_BACKOFF') or 5)  # seconds, doubled per attempt
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL') or 2)  # seconds
+    JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS') or 300)  # reclaim running jobs whose worker stopped renewing
+    
+    # Bulk Product Import
+    IMPORT_MAX_ROWS = int(os.environ.get('IMPORT_MAX_ROWS') or 10000)
+    IMPORT_ENRICH_BATCH_SIZE = int(os.environ.get('IMPORT_ENRICH_BATCH_SIZE') or 100)  # products per enrichment job
+    IMPORT_ENRICH_WORKERS = int(os.environ.get('IMPORT_ENRICH_WORKERS') or 8)  # concurrent AI calls per job
+    
+    # Checkout
+    CHECKOUT_MAX_LINES = int(os.environ.get('CHECKOUT_MAX_LINES') or 50)
+    CHECKOUT_MAX_QUANTITY = int(os.environ.get('CHECKOUT_MAX_QUANTITY') or 100)  # units of one product per order
+    CHECKOUT_RETRIES = int(os.environ.get('CHECKOUT_RETRIES') or 5)  # SQLite write-lock conflicts
+    
+    # Persona Template Packs (<locale>.json files, loaded once at import)
+    PERSONA_TEMPLATE_DIR = os.environ.get('PERSONA_TEMPLATE_DIR') or \
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'persona_packs')
+    
+    # Persona Preview Memo
+    PREVIEW_MEMO_MAX_ENTRIES = int(os.environ.get('PREVIEW_MEMO_MAX_ENTRIES') or 2048)
+    PREVIEW_MEMO_TTL = int(os.environ.get('PREVIEW_MEMO_TTL') or 3600)  # seconds
+    
+    # Fragment Cache (rendered story cards and homepage sections)
+    FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES') or 8 * 1024 * 1024)
+    # Versions are shared through the fragment_version table; the TTL only bounds the rare card cached
+    # from rows read just before a write committed (see fragment_cache.py)
+    FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL') or 300)  # seconds
+    
+    # Bundle Recommendations
+    BUNDLE_INDEX_TTL = int(os.environ.get('BUNDLE_INDEX_TTL') or 300)  # seconds before the catalog snapshot is rebuilt
+    # Stale snapshots are rebuilt in the background, at most once per interval (seconds)
+    BUNDLE_INDEX_REBUILD_INTERVAL = float(os.environ.get('BUNDLE_INDEX_REBUILD_INTERVAL') or 10)
+    BUNDLE_CACHE_MAX_ENTRIES = int(os.environ.get('BUNDLE_CACHE_MAX_ENTRIES') or 1024)
+    BUNDLE_MAX_SIZE = 6
+    
+    # Engagement Counters (write-behind)
+    ENGAGEMENT_FLUSH_INTERVAL = float(os.environ.get('ENGAGEMENT_FLUSH_INTERVAL') or 2)  # seconds between batched writes
+    ENGAGEMENT_SNAPSHOT_INTERVAL = float(os.environ.get('ENGAGEMENT_SNAPSHOT_INTERVAL') or 10)  # seconds between reloads
+    
+    # Metrics and Slow-Request Profiling
+    # /metrics requires "Authorization: Bearer <METRICS_TOKEN>" and is off without a token. METRICS_PUBLIC
+    # serves it to anyone, for deployments where only the scraper can reach the app (an internal port)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', 'false').lower() in ['true', 'on', '1']
+    PROFILE_SLOW_REQUESTS = os.environ.get('PROFILE_SLOW_REQUESTS', 'false').lower() in ['true', 'on', '1']
+    PROFILE_THRESHOLD_MS = float(os.environ.get('PROFILE_THRESHOLD_MS') or 500)
+    PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS') or 5)  # stack sampling period
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or '/tmp/persona-profiles'
+    PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES') or 200)
+    
     # Email Configuration (for notifications)
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
@@ -98,6 +202,9 @@ class TestingConfig(Config):
     # Faster password hashing for tests
     BCRYPT_LOG_ROUNDS = 4
     
+    # Run background jobs inline so tests can assert on their results
+    JOB_QUEUE_MODE = 'eager'
+    
     @staticmethod
     def init_app(app):
         Config.init_app(app)
@@ -0,0 +1,361 @@
+"""
+Database Engines - SQLite engine profile and read/write session routing
+A file-backed SQLite database runs in WAL mode with tuned pragmas, so readers
+never block the writer. Each process writes through a single connection that
+opens its transactions with BEGIN IMMEDIATE: request threads queue for it in
+the pool instead of racing for SQLite's lock, and the lock is taken before the
+first write rather than upgraded from a read, which is the case SQLite cannot
+wait out and reports as "database is locked". Plain reads go to a separate
+pool of query-only connections until the session writes something.
+
+That queue is per process, not a write queue for the database. Gunicorn
+workers and the job worker each hold their own writer connection, so their
+BEGIN IMMEDIATEs still contend for SQLite's lock; a writer waits up to
+SQLITE_BUSY_TIMEOUT_MS for it and then fails with "database is locked".
+Running more processes adds read capacity, not write throughput.
+
+Read replicas (DATABASE_REPLICA_URLS, e.g. Postgres standbys) serve the
+queries of views marked with replica_reads(). Writes, reads that follow a
+write in the same transaction, and every request from a user who wrote within
+the last few seconds (longer if a replica reports more lag) go to the primary.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import g, has_app_context, has_request_context, session as http_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+READER_BIND = 'reader'
+REPLICA_BIND_PREFIX = 'replica_'
+STICKY_SESSION_KEY = '_db_wrote_at'
+AFTER_COMMIT_KEY = 'database.after_commit'  # Session.info entry of calls waiting for the commit
+# Seconds since the standby last replayed a transaction; zero when it is caught up
+POSTGRES_LAG_SQL = ("SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END")
+
+
+def is_sqlite_file(uri: str) -> bool:
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def _replica_options(uri: str, config) -> Dict[str, Any]:
+    """Engine options for one replica: its own pool size, and read-only where the driver allows"""
+    options = {
+        'url': uri,
+        'pool_size': config['DB_REPLICA_POOL_SIZE'],
+        'max_overflow': config['DB_REPLICA_MAX_OVERFLOW'],
+        'pool_pre_ping': True
+    }
+    backend = make_url(uri).get_backend_name()
+    if backend == 'postgresql':
+        options['connect_args'] = {'options': '-c default_transaction_read_only=on'}
+        options['pool_recycle'] = 300
+    elif backend == 'sqlite':
+        options['connect_args'] = {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000, 'check_same_thread': False}
+    return options
+
+
+def configure(config):
+    """Engine options and binds for the primary, the SQLite read-only pool and any replicas.
+
+    The SQLite profile applies to file-backed databases when
+    SQLITE_ENGINE_PROFILE is on; other databases (except in-memory SQLite)
+    get the DB_POOL_SIZE primary pool.
+    """
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+
+    if config['SQLITE_ENGINE_PROFILE'] and is_sqlite_file(uri):
+        timeout = config['SQLITE_BUSY_TIMEOUT_MS'] / 1000
+        # No server to lose the connection, so pre-ping and recycling only cost round trips
+        config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': 1,
+            'max_overflow': 0,
+            'pool_timeout': timeout,
+            'connect_args': {'timeout': timeout, 'check_same_thread': False, 'isolation_level': None}
+        }
+        binds[READER_BIND] = {
+            'url': uri,
+            'pool_size': config['SQLITE_READ_POOL_SIZE'],
+            'max_overflow': config['SQLITE_READ_POOL_SIZE'],
+            'pool_timeout': timeout,
+            'connect_args': {'timeout': timeout, 'check_same_thread': False}
+        }
+    elif make_url(uri).get_backend_name() != 'sqlite' or is_sqlite_file(uri):
+        config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            **config['SQLALCHEMY_ENGINE_OPTIONS'],
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW']
+        }
+
+    for number, replica_uri in enumerate(config['DATABASE_REPLICA_URLS']):
+        binds[f'{REPLICA_BIND_PREFIX}{number}'] = _replica_options(replica_uri, config)
+
+    if binds:
+        config['SQLALCHEMY_BINDS'] = binds
+
+
+def _sqlite_pragmas(config) -> List[str]:
+    return [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',  # WAL stays consistent; only the last commits can be lost on power failure
+        f"PRAGMA busy_timeout={config['SQLITE_BUSY_TIMEOUT_MS']}",
+        f"PRAGMA mmap_size={config['SQLITE_MMAP_SIZE']}",
+        f"PRAGMA cache_size=-{config['SQLITE_CACHE_SIZE_KB']}",  # negative: KiB rather than pages
+        'PRAGMA temp_store=MEMORY'
+    ]
+
+
+def _on_connect(engine, statements: List[str]):
+    def run(dbapi_connection, record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+    event.listen(engine, 'connect', run)
+
+
+def init_app(app, db):
+    """Install connection pragmas and register the replicas of the engines set up by configure()"""
+    with app.app_context():
+        engines = db.engines
+
+    config = app.config
+    if READER_BIND in engines:
+        writer = engines[None]
+        _on_connect(writer, _sqlite_pragmas(config))
+        _on_connect(engines[READER_BIND], _sqlite_pragmas(config) + ['PRAGMA query_only=ON'])
+
+        # The driver's own transaction handling is off for the writer, so BEGIN is ours to choose
+        @event.listens_for(writer, 'begin')
+        def begin_immediate(conn):
+            conn.exec_driver_sql('BEGIN IMMEDIATE')
+
+    for key, engine in engines.items():
+        if key and key.startswith(REPLICA_BIND_PREFIX) and engine.dialect.name == 'sqlite':
+            _on_connect(engine, ['PRAGMA query_only=ON'])
+
+    replicas.configure(
+        [key for key in engines if key and key.startswith(REPLICA_BIND_PREFIX)],
+        sticky_seconds=config['DB_STICKY_SECONDS'],
+        max_lag=config['DB_REPLICA_MAX_LAG'],
+        check_interval=config['DB_REPLICA_CHECK_INTERVAL']
+    )
+
+
+class ReplicaSet:
+    """The replica binds with their last measured lag; hands out healthy ones in turn.
+
+    Lag is probed inline, by one thread at a time, at most once per check
+    interval per replica. A replica that cannot be reached or lags more than
+    `max_lag` is skipped until a later probe finds it usable again.
+    """
+
+    def __init__(self):
+        self.keys: List[str] = []
+        self.sticky_seconds = 5.0
+        self.max_lag = 30.0
+        self.check_interval = 5.0
+        self._lag: Dict[str, Optional[float]] = {}  # None: lag unknown (not Postgres)
+        self._healthy: Dict[str, bool] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._probe_lock = threading.Lock()
+        self._turn = count()
+        self.reads = 0
+        self.sticky_reads = 0
+
+    def configure(self, keys: List[str], sticky_seconds: float, max_lag: float, check_interval: float):
+        self.keys = list(keys)
+        self.sticky_seconds = sticky_seconds
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lag = {key: None for key in self.keys}
+        self._healthy = {key: True for key in self.keys}
+        self._checked_at = {key: 0.0 for key in self.keys}
+
+    def _probe(self, key: str, engine):
+        try:
+            with engine.connect() as conn:
+                if engine.dialect.name == 'postgresql':
+                    lag = conn.exec_driver_sql(POSTGRES_LAG_SQL).scalar()
+                    self._lag[key] = max(float(lag or 0), 0.0)
+                else:
+                    conn.exec_driver_sql('SELECT 1')
+            healthy = self._lag[key] is None or self._lag[key] <= self.max_lag
+        except Exception as e:
+            logger.warning(f"Replica {key} unavailable: {e}")
+            healthy = False
+        if healthy != self._healthy[key]:
+            logger.info(f"Replica {key} {'back in rotation' if healthy else 'taken out of rotation'}")
+        self._healthy[key] = healthy
+
+    def choose(self, engines) -> Optional[Any]:
+        """The next healthy replica engine, or None to read from the primary"""
+        if not self.keys:
+            return None
+        now = time.monotonic()
+        stale = [key for key in self.keys if now - self._checked_at[key] >= self.check_interval]
+        if stale and self._probe_lock.acquire(blocking=False):
+            try:
+                for key in stale:
+                    self._checked_at[key] = now
+                    self._probe(key, engines[key])
+            finally:
+                self._probe_lock.release()
+
+        healthy = [key for key in self.keys if self._healthy[key]]
+        if not healthy:
+            return None
+        self.reads += 1
+        return engines[healthy[next(self._turn) % len(healthy)]]
+
+    def sticky_window(self) -> float:
+        """How long a user reads from the primary after writing: the larger of the floor and the replica lag"""
+        lags = [lag for key, lag in self._lag.items() if lag is not None and self._healthy[key]]
+        return max([self.sticky_seconds] + [min(lag, self.max_lag) for lag in lags])
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {key: {'healthy': int(self._healthy[key]), 'lag_seconds': self._lag[key]} for key in self.keys}
+
+
+replicas = ReplicaSet()
+
+
+@contextmanager
+def replica_reads():
+    """Let queries in this block, or in a decorated view, read from a replica.
+
+    Only for read-only work: a replica can be a few seconds behind. Users who
+    wrote recently still read from the primary.
+    """
+    previous = g.get('replica_reads', False)
+    g.replica_reads = True
+    try:
+        yield
+    finally:
+        g.replica_reads = previous
+
+
+def _recently_wrote() -> bool:
+    if not has_request_context():
+        return False
+    wrote_at = http_session.get(STICKY_SESSION_KEY)
+    return wrote_at is not None and time.time() - wrote_at < replicas.sticky_window()
+
+
+def _is_read(clause) -> bool:
+    if clause is None:
+        return False
+    if getattr(clause, 'is_select', False):
+        return getattr(clause, '_for_update_arg', None) is None
+    text = getattr(clause, 'text', None)  # text() queries, e.g. full-text search
+    return isinstance(text, str) and text.lstrip().upper().startswith('SELECT')
+
+
+class RoutingSession(Session):
+    """Session that sends plain reads to a replica or the read-only bind until it writes.
+
+    Flushes, DML, bare connection() calls and anything else that is not a
+    SELECT use the default (primary) engine, and once the primary is in use
+    the rest of the transaction stays on it, so a request reads its own
+    writes. Committing a write makes the user's next requests read from the
+    primary for the sticky window. Without replicas or a read-only bind this
+    is the stock Flask-SQLAlchemy session.
+    """
+
+    _on_writer = False
+    _wrote = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._on_writer and not self._flushing and _is_read(clause):
+            engines = self._db.engines
+            if replicas.keys and has_app_context() and g.get('replica_reads'):
+                if _recently_wrote():
+                    replicas.sticky_reads += 1
+                else:
+                    replica = replicas.choose(engines)
+                    if replica is not None:
+                        return replica
+            reader = engines.get(READER_BIND)
+            if reader is not None:
+                return reader
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is None:
+            self._on_writer = True
+        return engine
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _flushed(session, flush_context):
+    session._wrote = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session._wrote = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session):
+    # Replicas may not have this write yet, so the user's next reads go to the primary
+    if session._wrote and replicas.keys and has_request_context():
+        http_session[STICKY_SESSION_KEY] = time.time()
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _release_writer(session, transaction):
+    if transaction.parent is None:
+        session._on_writer = False
+        session._wrote = False
+
+
+def after_commit(session, callback: Callable[..., Any], *args):
+    """Call callback(*args) once `session` commits its outermost transaction; a rollback drops the call.
+
+    For cache invalidation from flush-time events: invalidating before the
+    commit lets a concurrent request read the old rows, which are still the
+    committed ones, and cache them as current. The same call registered
+    several times in one transaction runs once.
+    """
+    session.info.setdefault(AFTER_COMMIT_KEY, {})[(callback, args)] = None
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_after_commit(session):
+    if session.in_nested_transaction():
+        return  # releasing a savepoint commits nothing yet
+    for callback, args in session.info.pop(AFTER_COMMIT_KEY, {}):
+        try:
+            callback(*args)
+        except Exception:
+            logger.exception(f'After-commit call {callback.__qualname__}{args} failed')
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _drop_after_commit(session, previous_transaction):
+    if previous_transaction.parent is None:  # a savepoint rollback leaves the outer writes' calls pending
+        session.info.pop(AFTER_COMMIT_KEY, None)
+
+
+def pool_stats(db) -> Dict[str, Dict[str, Any]]:
+    """Connections in use and idle per engine, for /metrics"""
+    stats = {}
+    for key, engine in db.engines.items():
+        pool = engine.pool
+        if hasattr(pool, 'checkedout'):
+            stats[key or 'default'] = {'size': pool.size(), 'checked_out': pool.checkedout(),
+                                       'idle': pool.checkedin(), 'overflow': max(pool.overflow(), 0)}
+    return stats
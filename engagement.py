@@ -0,0 +1,235 @@
+"""
+Engagement Counters - Write-behind likes, follows and bundle adds
+Taps only bump an in-memory delta. A background flusher folds each worker's
+deltas into the engagement_counter table with one batched UPSERT per interval,
+so a hot artisan costs one row write per flush instead of one per tap. Reads
+come from an in-memory snapshot of the table plus this worker's pending deltas.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+from upserts import insert_on_conflict
+
+logger = logging.getLogger(__name__)
+
+# Counter kind -> model whose ids it counts
+COUNTER_KINDS = {
+    'story_like': 'Artisan',
+    'artisan_follow': 'Artisan',
+    'bundle_add': 'Product',
+}
+
+Key = Tuple[str, int]
+
+
+class CounterBuffer:
+    """Per-worker pending deltas and the last snapshot of persisted counts"""
+
+    def __init__(self):
+        self._pending: Dict[Key, int] = defaultdict(int)
+        self._snapshot: Dict[str, Dict[int, int]] = {kind: {} for kind in COUNTER_KINDS}
+        self._lock = threading.Lock()
+        self.snapshot_at = 0.0
+        self.taps = 0
+        self.flushes = 0
+        self.rows_written = 0
+
+    def add(self, kind: str, subject_id: int, delta: int = 1) -> int:
+        """Record a tap and return the count this worker now reports"""
+        if kind not in COUNTER_KINDS:
+            raise ValueError(f'Unknown counter kind: {kind}')
+        with self._lock:
+            self._pending[(kind, subject_id)] += delta
+            self.taps += 1
+            return max(self._snapshot[kind].get(subject_id, 0) + self._pending[(kind, subject_id)], 0)
+
+    def get(self, kind: str, subject_id: int) -> int:
+        with self._lock:
+            return max(self._snapshot[kind].get(subject_id, 0) + self._pending.get((kind, subject_id), 0), 0)
+
+    def get_many(self, kind: str, subject_ids: Iterable[int]) -> Dict[int, int]:
+        with self._lock:
+            counts = self._snapshot[kind]
+            return {
+                subject_id: max(counts.get(subject_id, 0) + self._pending.get((kind, subject_id), 0), 0)
+                for subject_id in subject_ids
+            }
+
+    def drain(self) -> Dict[Key, int]:
+        """Take every non-zero pending delta, leaving the buffer empty"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+        return {key: delta for key, delta in pending.items() if delta}
+
+    def restore(self, deltas: Dict[Key, int]):
+        """Put deltas back after a failed flush so no taps are lost"""
+        with self._lock:
+            for key, delta in deltas.items():
+                self._pending[key] += delta
+
+    def apply_flushed(self, deltas: Dict[Key, int]):
+        """Fold flushed deltas into the snapshot until the next reload picks them up"""
+        with self._lock:
+            for (kind, subject_id), delta in deltas.items():
+                counts = self._snapshot[kind]
+                counts[subject_id] = counts.get(subject_id, 0) + delta
+
+    def replace_snapshot(self, snapshot: Dict[str, Dict[int, int]]):
+        with self._lock:
+            self._snapshot = snapshot
+            self.snapshot_at = time.time()
+
+    def stats(self) -> Dict[str, int]:
+        return {'taps': self.taps, 'flushes': self.flushes, 'rows_written': self.rows_written,
+                'pending': len(self._pending)}
+
+
+buffer = CounterBuffer()
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def record(kind: str, subject_id: int, delta: int = 1) -> int:
+    """Count a tap; it reaches the database on the next flush"""
+    from app import app
+
+    _ensure_flusher(app)
+    return buffer.add(kind, subject_id, delta)
+
+
+def get_count(kind: str, subject_id: int) -> int:
+    from app import app
+
+    _ensure_flusher(app)
+    return buffer.get(kind, subject_id)
+
+
+def get_counts(kind: str, subject_ids: Iterable[int]) -> Dict[int, int]:
+    from app import app
+
+    _ensure_flusher(app)
+    return buffer.get_many(kind, subject_ids)
+
+
+def _upsert(table):
+    """INSERT ... ON CONFLICT that adds the excluded delta to the stored count"""
+    from app import db
+
+    statement = insert_on_conflict(db.engine, table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.kind, table.c.subject_id],
+        set_={'count': table.c.count + statement.excluded['count'], 'updated_at': statement.excluded.updated_at}
+    )
+
+
+def _existing_ids(kind: str, subject_ids: Iterable[int]) -> set:
+    import app as models
+
+    db = models.db
+    model = getattr(models, COUNTER_KINDS[kind])
+    return set(db.session.scalars(db.select(model.id).where(model.id.in_(list(subject_ids)))))
+
+
+def flush() -> int:
+    """Write all pending deltas in one transaction. Returns the number of rows upserted."""
+    from datetime import datetime
+    from app import db, EngagementCounter
+
+    deltas = buffer.drain()
+    if not deltas:
+        return 0
+
+    try:
+        # Taps on ids that do not exist are dropped rather than stored
+        valid = set()
+        for kind in COUNTER_KINDS:
+            ids = {subject_id for k, subject_id in deltas if k == kind}
+            if ids:
+                valid.update((kind, subject_id) for subject_id in _existing_ids(kind, ids))
+        deltas = {key: delta for key, delta in deltas.items() if key in valid}
+
+        if deltas:
+            now = datetime.utcnow()
+            # Sorted so concurrent flushes from several workers lock rows in the same order
+            rows = [
+                {'kind': kind, 'subject_id': subject_id, 'count': delta, 'updated_at': now}
+                for (kind, subject_id), delta in sorted(deltas.items())
+            ]
+            db.session.execute(_upsert(EngagementCounter.__table__), rows)
+        db.session.commit()
+
+    except Exception:
+        db.session.rollback()
+        buffer.restore(deltas)
+        raise
+
+    buffer.apply_flushed(deltas)
+    buffer.flushes += 1
+    buffer.rows_written += len(deltas)
+    return len(deltas)
+
+
+def reload_snapshot():
+    """Replace the snapshot with the table's current counts, including other workers' flushes"""
+    from app import db, EngagementCounter
+
+    snapshot = {kind: {} for kind in COUNTER_KINDS}
+    rows = db.session.execute(db.select(
+        EngagementCounter.kind, EngagementCounter.subject_id, EngagementCounter.count
+    )).all()
+    for kind, subject_id, count in rows:
+        if kind in snapshot:
+            snapshot[kind][subject_id] = count
+    buffer.replace_snapshot(snapshot)
+
+
+class CounterFlusher(threading.Thread):
+    """Flushes pending deltas every interval and reloads the snapshot less often"""
+
+    def __init__(self, app):
+        super().__init__(name='engagement-flusher', daemon=True)
+        self.app = app
+        self.interval = app.config['ENGAGEMENT_FLUSH_INTERVAL']
+        self.snapshot_interval = app.config['ENGAGEMENT_SNAPSHOT_INTERVAL']
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def tick(self, reload: bool = False):
+        with self.app.app_context():
+            try:
+                flush()
+                if reload or time.time() - buffer.snapshot_at >= self.snapshot_interval:
+                    reload_snapshot()
+            except Exception as e:
+                logger.error(f"Engagement counter flush failed: {e}")
+            finally:
+                from app import db
+                db.session.remove()
+
+    def run(self):
+        # Load persisted counts right away so the first reads are not zero
+        self.tick(reload=True)
+        while not self._stopped.wait(self.interval):
+            self.tick()
+        self.tick()
+
+
+def _ensure_flusher(app) -> Optional[CounterFlusher]:
+    """Start this worker's flusher on first use and flush whatever is left at exit"""
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return _flusher
+
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = CounterFlusher(app)
+            _flusher.start()
+            atexit.register(_flusher.tick)
+    return _flusher
@@ -0,0 +1,187 @@
+"""
+Fragment Cache - Rendered HTML for story cards and homepage sections
+Fragments are keyed by artisan id and a per-artisan version counter kept in
+the fragment_version table, so every worker sees a bump. Mapper events on
+Artisan, Persona and Product bump the version in the same transaction as the
+write, so a changed artisan's old fragments are simply never looked up again
+by any worker and age out of each one's LRU. A request reads the versions it
+needs once, with one query per fragment or page section.
+
+A worker that read an artisan's rows just before a write committed and its
+version just after can still cache the old HTML under the new version; the
+TTL bounds how long that copy is served.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional
+
+from flask import g, has_request_context, render_template
+from markupsafe import Markup
+from sqlalchemy import event, inspect, select
+
+from upserts import insert_on_conflict
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered HTML bounded by total size in bytes"""
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, ttl: int = 300):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.time():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: str):
+        cost = len(value.encode('utf-8'))
+        if cost > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.time() + self.ttl, cost)
+            self.size += cost
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable):
+        self.size -= self._entries.pop(key)[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'bytes': self.size}
+
+
+fragment_cache = FragmentCache()
+
+
+def configure(config):
+    """Apply the app's size and TTL settings to the shared cache"""
+    fragment_cache.max_bytes = config['FRAGMENT_CACHE_MAX_BYTES']
+    fragment_cache.ttl = config['FRAGMENT_CACHE_TTL']
+
+
+def _version_table():
+    from app import FragmentVersion
+    return FragmentVersion.__table__
+
+
+def _request_versions() -> Dict[int, int]:
+    """Versions already read by this request; empty (and not kept) outside a request"""
+    if not has_request_context():
+        return {}
+    return g.setdefault('fragment_versions', {})
+
+
+def artisan_versions(artisan_ids: Iterable[int]) -> Dict[int, int]:
+    """Current fragment version of each artisan, reading the ones this request has not seen in one query"""
+    from app import db
+
+    artisan_ids = list(artisan_ids)
+    known = _request_versions()
+    missing = [artisan_id for artisan_id in artisan_ids if artisan_id not in known]
+    if missing:
+        table = _version_table()
+        stored = dict(db.session.execute(
+            select(table.c.artisan_id, table.c.version).where(table.c.artisan_id.in_(missing))
+        ).all())
+        known.update((artisan_id, stored.get(artisan_id, 0)) for artisan_id in missing)
+    return {artisan_id: known[artisan_id] for artisan_id in artisan_ids}
+
+
+def artisan_version(artisan_id: int) -> int:
+    return artisan_versions([artisan_id])[artisan_id]
+
+
+def invalidate_artisan(connection, *artisan_ids: Optional[int]):
+    """Bump the version of each artisan inside the caller's transaction.
+
+    Other workers see the bump, and stop using the old fragments, when that
+    transaction commits; a rollback leaves the versions as they were.
+    """
+    artisan_ids = sorted({artisan_id for artisan_id in artisan_ids if artisan_id is not None})
+    if not artisan_ids:
+        return
+
+    table = _version_table()
+    statement = insert_on_conflict(connection, table)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[table.c.artisan_id], set_={'version': table.c.version + 1}
+    ), [{'artisan_id': artisan_id, 'version': 1} for artisan_id in artisan_ids])
+
+    known = _request_versions()
+    for artisan_id in artisan_ids:
+        known.pop(artisan_id, None)
+
+
+def _owner_ids(target, attribute: str) -> Iterable[Optional[int]]:
+    """The artisan a row belongs to now, plus the previous one if it was reassigned"""
+    history = inspect(target).attrs[attribute].history
+    return [getattr(target, attribute), *history.deleted]
+
+
+def register_model_events(artisan_model, persona_model, product_model):
+    """Invalidate an artisan's fragments whenever a write to it, its persona or its products commits.
+
+    The versions are bumped in the flush's own transaction, so they commit or
+    roll back with the write. Bulk insert()/update() statements skip mapper
+    events, so code using them must call invalidate_artisan itself.
+    """
+    def artisan_changed(mapper, connection, target):
+        invalidate_artisan(connection, target.id)
+
+    def child_changed(mapper, connection, target):
+        invalidate_artisan(connection, *_owner_ids(target, 'artisan_id'))
+
+    for name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(artisan_model, name, artisan_changed)
+        event.listen(persona_model, name, child_changed)
+        event.listen(product_model, name, child_changed)
+
+
+def render_fragment(template_name: str, key: Hashable, **context) -> Markup:
+    """Render a template partial once per key and serve the cached HTML afterwards"""
+    cache_key = (template_name, key)
+    html = fragment_cache.get(cache_key)
+    if html is None:
+        html = render_template(template_name, **context)
+        fragment_cache.set(cache_key, html)
+    return Markup(html)
+
+
+def artisan_fragment(template_name: str, artisan, **context) -> Markup:
+    """Cached fragment for a single artisan, keyed by its id and current version"""
+    key = (artisan.id, artisan_version(artisan.id))
+    return render_fragment(template_name, key, artisan=artisan, **context)
+
+
+def artisans_fragment(template_name: str, artisans, **context) -> Markup:
+    """Cached fragment covering several artisans, e.g. a homepage section"""
+    versions = artisan_versions([artisan.id for artisan in artisans])
+    key = tuple((artisan.id, versions[artisan.id]) for artisan in artisans)
+    return render_fragment(template_name, key, artisans=artisans, **context)
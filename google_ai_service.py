@@ -4,87 +4,310 @@ Provides AI-powered features using Google's Gemini API and Google Translate
 """
 
 import os
+import re
 import json
 import logging
-from typing import Dict, List, Optional, Any
-
-try:
-    import google.generativeai as genai
-    from google.cloud import translate_v2 as translate
-    GOOGLE_AI_AVAILABLE = True
-except ImportError:
-    GOOGLE_AI_AVAILABLE = False
+import threading
+from contextlib import contextmanager
+from importlib.util import find_spec
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Any
+
+
+def _installed(module_name: str) -> bool:
+    try:
+        return find_spec(module_name) is not None
+    except ImportError:  # parent package missing
+        return False
+
+
+# The Google client libraries add hundreds of milliseconds to a cold start, so
+# only their presence is checked here; they are imported when a client is first used
+GOOGLE_AI_AVAILABLE = _installed('google.generativeai') and _installed('google.cloud.translate_v2')
+if not GOOGLE_AI_AVAILABLE:
     logging.warning("Google AI libraries not available. Install with: pip install google-generativeai google-cloud-translate")
 
+_google_libraries = None
+_google_libraries_lock = threading.Lock()
+
+
+def google_libraries():
+    """(google.auth, google.generativeai, translate_v2), imported on first call"""
+    global _google_libraries
+    with _google_libraries_lock:
+        if _google_libraries is None:
+            import google.auth
+            import google.generativeai as genai
+            from google.cloud import translate_v2 as translate
+            _google_libraries = (google.auth, genai, translate)
+    return _google_libraries
+
 from config import Config
+from llm_cache import build_llm_cache, make_cache_key
+from metrics import upstream_timer
+from upstream import UpstreamError, build_upstream_client, pooled_http_session
+
+GEMINI_MODEL_NAME = 'gemini-pro'
+FALLBACK_CHUNK_WORDS = 4  # words per chunk when streaming a fallback answer
+MAX_CAPTION_LENGTH = 2200  # Instagram's caption limit
+MAX_HASHTAGS = 30
+TOKENS_PER_POST = 150  # output budget per product in a batch prompt
+ONBOARDING_FIELDS = ('bio', 'title', 'cultural_context')
+ONBOARDING_PROFILE_TOKENS = 700  # bio, title and cultural context together
+
+# Response cache shared by every GoogleAIService instance in this process
+response_cache = build_llm_cache(Config)
+
+# Concurrency limits and circuit breakers are per process, shared by every instance
+upstreams = {
+    'gemini': build_upstream_client('gemini', Config),
+    'translate': build_upstream_client('translate', Config)
+}
+
+# Counting Gemini calls that actually went upstream
+class UpstreamCallCounter:
+    """Gemini calls made on the current thread while active; cache hits and fallbacks are not counted"""
+
+    def __init__(self):
+        self.count = 0
+
+
+_local = threading.local()
+
+
+@contextmanager
+def count_upstream_calls():
+    """Context manager yielding an UpstreamCallCounter for the Gemini calls made inside the block"""
+    counter = UpstreamCallCounter()
+    counters = _local.__dict__.setdefault('counters', [])
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+def _record_upstream_call():
+    for counter in getattr(_local, 'counters', ()):
+        counter.count += 1
+
 
 class GoogleAIService:
     """Main Google AI service class - Essential services only"""
     
-    def __init__(self):
+    def __init__(self, cache=None, gemini_upstream=None, translate_upstream=None, gemini_model=None):
         self.config = Config()
         self.logger = logging.getLogger(__name__)
-        
-        if GOOGLE_AI_AVAILABLE:
-            self._initialize_services()
-        else:
-            self.logger.warning("Google AI services not available")
+        self.cache = cache if cache is not None else response_cache
+        self.gemini_upstream = gemini_upstream or upstreams['gemini']
+        self.translate_upstream = translate_upstream or upstreams['translate']
+        self._gemini_model = gemini_model
+        self._translate_client = None
+        # Clients are created on first use; an injected model (e.g. a fake in benchmarks) needs no setup
+        self._initialized = gemini_model is not None
+        self._initialize_lock = threading.Lock()
+    
+    def _ensure_initialized(self):
+        if self._initialized:
+            return
+        with self._initialize_lock:
+            if not self._initialized:
+                if GOOGLE_AI_AVAILABLE:
+                    self._initialize_services()
+                else:
+                    self.logger.warning("Google AI services not available")
+                self._initialized = True
+    
+    # Unconfigured clients raise AttributeError, so hasattr() tells whether a service is usable
+    @property
+    def gemini_model(self):
+        self._ensure_initialized()
+        if self._gemini_model is None:
+            raise AttributeError('gemini_model')
+        return self._gemini_model
+    
+    @gemini_model.setter
+    def gemini_model(self, model):
+        self._gemini_model = model
+    
+    @gemini_model.deleter
+    def gemini_model(self):
+        self._initialized = True
+        self._gemini_model = None
+    
+    @property
+    def translate_client(self):
+        self._ensure_initialized()
+        if self._translate_client is None:
+            raise AttributeError('translate_client')
+        return self._translate_client
+    
+    @translate_client.setter
+    def translate_client(self, client):
+        self._translate_client = client
     
     def _initialize_services(self):
         """Initialize essential Google AI services"""
         try:
+            auth, genai, translate = google_libraries()
+            
             # Initialize Gemini API
             if self.config.GOOGLE_API_KEY:
                 genai.configure(api_key=self.config.GOOGLE_API_KEY)
-                self.gemini_model = genai.GenerativeModel('gemini-pro')
+                self.gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
                 self.logger.info("Gemini API initialized successfully")
             
             # Initialize Translation API
             if self.config.GOOGLE_CLOUD_PROJECT:
-                self.translate_client = translate.Client()
+                # Keep-alive pool sized to the concurrency limit so connections are reused, not reopened
+                credentials, _ = auth.default(scopes=translate.Client.SCOPE)
+                self.translate_client = translate.Client(
+                    _http=pooled_http_session(credentials, self.translate_upstream.max_concurrency)
+                )
                 self.logger.info("Google Translate initialized successfully")
                 
         except Exception as e:
             self.logger.error(f"Failed to initialize Google AI services: {e}")
     
-    def generate_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> str:
-        """Generate text using Gemini API"""
-        if not GOOGLE_AI_AVAILABLE or not hasattr(self, 'gemini_model'):
+    def generate_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7,
+                      use_cache: bool = True, cache_if: Optional[Callable[[str], bool]] = None) -> str:
+        """Generate text using Gemini API, serving repeated prompts from the response cache.
+        
+        `cache_if` vets an answer before it is cached, for prompts whose output
+        has to parse: a bad answer would otherwise be replayed for every repeat.
+        """
+        if not hasattr(self, 'gemini_model'):
             return self._fallback_text_generation(prompt)
         
+        cache_key = self._cache_key(prompt, max_tokens, temperature, use_cache)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        _record_upstream_call()
         try:
-            generation_config = genai.types.GenerationConfig(
-                max_output_tokens=max_tokens,
-                temperature=temperature,
-            )
+            with upstream_timer('gemini', 'generate'):
+                response = self.gemini_upstream.call(
+                    self.gemini_model.generate_content,
+                    prompt,
+                    generation_config={'max_output_tokens': max_tokens, 'temperature': temperature}
+                )
             
-            response = self.gemini_model.generate_content(
-                prompt,
-                generation_config=generation_config
-            )
+            if not response.text:
+                return self._fallback_text_generation(prompt)
+            
+            # Only real model output is cached; fallbacks are cheap and should be retried
+            if cache_key is not None and (cache_if is None or cache_if(response.text)):
+                self.cache.set(cache_key, response.text)
             
-            return response.text if response.text else self._fallback_text_generation(prompt)
+            return response.text
             
+        except UpstreamError as e:
+            # Open circuit, saturated pool or missed deadline: answer locally right away
+            self.logger.warning(f"Gemini unavailable, using fallback: {e}")
+            return self._fallback_text_generation(prompt)
         except Exception as e:
             self.logger.error(f"Gemini API error: {e}")
             return self._fallback_text_generation(prompt)
     
+    def generate_text_stream(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7,
+                             use_cache: bool = True) -> Iterator[str]:
+        """Like generate_text, but yields the text in chunks as Gemini produces them.
+
+        Failures before the first chunk stream the fallback instead; a failure
+        after text has been sent is raised, since it cannot be taken back.
+        """
+        if not hasattr(self, 'gemini_model'):
+            yield from self._chunk_text(self._fallback_text_generation(prompt))
+            return
+        
+        cache_key = self._cache_key(prompt, max_tokens, temperature, use_cache)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        parts = []
+        _record_upstream_call()
+        try:
+            with upstream_timer('gemini', 'generate_stream'):
+                for chunk in self.gemini_upstream.stream(
+                    self.gemini_model.generate_content,
+                    prompt,
+                    generation_config={'max_output_tokens': max_tokens, 'temperature': temperature},
+                    stream=True
+                ):
+                    if chunk.text:
+                        parts.append(chunk.text)
+                        yield chunk.text
+        
+        except Exception as e:
+            if parts:
+                raise
+            if isinstance(e, UpstreamError):
+                self.logger.warning(f"Gemini unavailable, using fallback: {e}")
+            else:
+                self.logger.error(f"Gemini API error: {e}")
+        
+        if not parts:
+            yield from self._chunk_text(self._fallback_text_generation(prompt))
+            return
+        
+        if cache_key is not None:
+            self.cache.set(cache_key, ''.join(parts))
+    
+    def _cache_key(self, prompt: str, max_tokens: int, temperature: float, use_cache: bool) -> Optional[str]:
+        """Response cache key, or None when this call should not be cached"""
+        if not use_cache or self.cache is None or temperature > self.config.LLM_CACHE_MAX_TEMPERATURE:
+            return None
+        return make_cache_key(prompt, GEMINI_MODEL_NAME, {
+            'max_output_tokens': max_tokens,
+            'temperature': temperature
+        })
+    
+    @staticmethod
+    def _chunk_text(text: str, words: int = FALLBACK_CHUNK_WORDS) -> Iterator[str]:
+        """Split text into runs of a few words, keeping the whitespace between them"""
+        tokens = re.findall(r'\S+\s*', text)
+        for i in range(0, len(tokens), words):
+            yield ''.join(tokens[i:i + words])
+    
     def translate_text(self, text: str, target_language: str = 'en', source_language: str = None) -> str:
         """Translate text using Google Translate API"""
-        if not GOOGLE_AI_AVAILABLE or not hasattr(self, 'translate_client'):
-            return text  # Return original text if translation not available
+        translated = self.translate_batch([text], target_language, source_language)
+        return translated[0] if translated else text  # Return original text if translation not available
+    
+    def translation_available(self) -> bool:
+        """Whether Google Translate is configured, i.e. translate_batch can return anything"""
+        return GOOGLE_AI_AVAILABLE and hasattr(self, 'translate_client')
+    
+    def translate_batch(self, texts: List[str], target_language: str = 'en',
+                        source_language: str = None) -> Optional[List[str]]:
+        """Translate many segments in one API call; None if translation is unavailable or failed"""
+        if not texts:
+            return []
+        if not self.translation_available():
+            return None
         
         try:
-            result = self.translate_client.translate(
-                text,
-                target_language=target_language,
-                source_language=source_language
-            )
-            return result['translatedText']
+            with upstream_timer('translate', 'translate'):
+                results = self.translate_upstream.call(
+                    self.translate_client.translate,
+                    list(texts),
+                    target_language=target_language,
+                    source_language=source_language,
+                    format_='text'
+                )
+            return [result['translatedText'] for result in results]
             
+        except UpstreamError as e:
+            self.logger.warning(f"Translate unavailable: {e}")
+            return None
         except Exception as e:
             self.logger.error(f"Translation error: {e}")
-            return text
+            return None
     
     def _fallback_text_generation(self, prompt: str) -> str:
         """Fallback text generation when AI services are unavailable"""
@@ -113,13 +336,23 @@ class GoogleAIService:
 class ArtisanStorytellingAgent:
     """AI agent for generating artisan stories and bios using Gemini"""
     
-    def __init__(self):
-        self.ai_service = GoogleAIService()
+    def __init__(self, ai_service=None):
+        # Shares the module's service, so its clients are set up once per process
+        self.ai_service = ai_service or google_ai_service
         self.logger = logging.getLogger(__name__)
     
     def generate_artisan_bio(self, artisan_data: Dict[str, Any], tone: str = "warm") -> str:
         """Generate artisan biography using Gemini"""
-        prompt = f"""
+        prompt = self._artisan_bio_prompt(artisan_data, tone)
+        return self.ai_service.generate_text(prompt, max_tokens=300, temperature=0.8)
+    
+    def stream_artisan_bio(self, artisan_data: Dict[str, Any], tone: str = "warm") -> Iterator[str]:
+        """Stream the artisan biography as it is generated"""
+        prompt = self._artisan_bio_prompt(artisan_data, tone)
+        return self.ai_service.generate_text_stream(prompt, max_tokens=300, temperature=0.8)
+    
+    def _artisan_bio_prompt(self, artisan_data: Dict[str, Any], tone: str) -> str:
+        return f"""
         Create a compelling artisan biography with the following details:
         
         Name: {artisan_data.get('name', 'Artisan')}
@@ -137,12 +370,24 @@ class ArtisanStorytellingAgent:
         
         Make it authentic, personal, and inspiring.
         """
-        
-        return self.ai_service.generate_text(prompt, max_tokens=300, temperature=0.8)
     
     def generate_story_title(self, artisan_data: Dict[str, Any], tone: str = "poetic") -> str:
         """Generate compelling story title using Gemini"""
-        prompt = f"""
+        prompt = self._story_title_prompt(artisan_data, tone)
+        title = self.ai_service.generate_text(prompt, max_tokens=50, temperature=0.9)
+        return self.clean_title(title)
+    
+    def stream_story_title(self, artisan_data: Dict[str, Any], tone: str = "poetic") -> Iterator[str]:
+        """Stream the raw story title; pass the joined text through clean_title"""
+        prompt = self._story_title_prompt(artisan_data, tone)
+        return self.ai_service.generate_text_stream(prompt, max_tokens=50, temperature=0.9)
+    
+    @staticmethod
+    def clean_title(title: str) -> str:
+        return title.strip().strip('"').strip("'")
+    
+    def _story_title_prompt(self, artisan_data: Dict[str, Any], tone: str) -> str:
+        return f"""
         Create a captivating story title for an artisan:
         
         Craft: {artisan_data.get('craft_type', 'Traditional Craft')}
@@ -159,13 +404,19 @@ class ArtisanStorytellingAgent:
         
         Return only the title, no explanation.
         """
-        
-        title = self.ai_service.generate_text(prompt, max_tokens=50, temperature=0.9)
-        return title.strip().strip('"').strip("'")
     
     def generate_product_description(self, product_data: Dict[str, Any], artisan_persona: str = "warm") -> str:
         """Generate product description with artisan's voice using Gemini"""
-        prompt = f"""
+        prompt = self._product_description_prompt(product_data, artisan_persona)
+        return self.ai_service.generate_text(prompt, max_tokens=250, temperature=0.7)
+    
+    def stream_product_description(self, product_data: Dict[str, Any], artisan_persona: str = "warm") -> Iterator[str]:
+        """Stream the product description as it is generated"""
+        prompt = self._product_description_prompt(product_data, artisan_persona)
+        return self.ai_service.generate_text_stream(prompt, max_tokens=250, temperature=0.7)
+    
+    def _product_description_prompt(self, product_data: Dict[str, Any], artisan_persona: str) -> str:
+        return f"""
         Write a product description in the artisan's voice:
         
         Product: {product_data.get('name', 'Handcrafted Item')}
@@ -182,10 +433,293 @@ class ArtisanStorytellingAgent:
         
         Write in first person as if the artisan is speaking directly to the customer.
         """
-        
+    
+    def generate_cultural_context(self, craft_type: str, location: str) -> str:
+        """Generate the cultural background of a craft and region using Gemini"""
+        prompt = self._cultural_context_prompt(craft_type, location)
         return self.ai_service.generate_text(prompt, max_tokens=250, temperature=0.7)
+    
+    def _cultural_context_prompt(self, craft_type: str, location: str) -> str:
+        return f"""
+        Describe the cultural context of a traditional craft:
+        
+        Craft: {craft_type or 'Traditional Craft'}
+        Region: {location or 'India'}
+        
+        Write 80-120 words covering:
+        1. The history and origins of the craft in this region
+        2. Its role in local festivals, rituals or daily life
+        3. The techniques and materials that make it distinctive
+        
+        Be accurate and respectful; avoid exaggerated claims.
+        """
+    
+    def generate_onboarding_profile(self, artisan_data: Dict[str, Any], tone: str = "warm",
+                                    title_tone: str = "poetic") -> Dict[str, Any]:
+        """Bio, story title and cultural context for a new artisan in one Gemini call.
+        
+        Any field the structured answer is missing falls back to its own
+        prompt, and those prompts run concurrently rather than one after another.
+        """
+        profile: Dict[str, str] = {}
+        calls = 0
+        composite = hasattr(self.ai_service, 'gemini_model')
+        if composite:
+            with count_upstream_calls() as upstream:
+                # Only complete answers are cached, so an unusable one is asked again next time
+                text = self.ai_service.generate_text(
+                    self._onboarding_profile_prompt(artisan_data, tone, title_tone),
+                    max_tokens=ONBOARDING_PROFILE_TOKENS, temperature=0.8,
+                    cache_if=lambda text: self.is_complete_profile(parse_json_object(text))
+                )
+            calls += upstream.count
+            profile = self.validate_profile(parse_json_object(text))
+        
+        generators = {
+            'bio': lambda: self.generate_artisan_bio(artisan_data, tone),
+            'title': lambda: self.generate_story_title(artisan_data, title_tone),
+            'cultural_context': lambda: self.generate_cultural_context(artisan_data.get('craft_type', ''),
+                                                                       artisan_data.get('location', ''))
+        }
+        
+        def generate(field):
+            with count_upstream_calls() as upstream:
+                return generators[field](), upstream.count
+        
+        missing = [field for field in ONBOARDING_FIELDS if field not in profile]
+        if missing:
+            if composite:
+                self.logger.info(f"Onboarding profile missing {', '.join(missing)}, generating separately")
+            with ThreadPoolExecutor(len(missing)) as pool:
+                for field, (value, field_calls) in zip(missing, pool.map(generate, missing)):
+                    profile[field] = value
+                    calls += field_calls
+        
+        if not missing:
+            source = 'composite'
+        else:
+            source = 'separate' if len(missing) == len(ONBOARDING_FIELDS) else 'partial'
+        return {
+            **{field: profile[field] for field in ONBOARDING_FIELDS},
+            'source': source,
+            'upstream_calls': calls
+        }
+    
+    def is_complete_profile(self, item: Any) -> bool:
+        return len(self.validate_profile(item)) == len(ONBOARDING_FIELDS)
+    
+    def validate_profile(self, item: Any) -> Dict[str, str]:
+        """The usable fields of a structured onboarding answer"""
+        if not isinstance(item, dict):
+            return {}
+        profile = {}
+        for field in ONBOARDING_FIELDS:
+            value = item.get(field)
+            if isinstance(value, str) and value.strip():
+                profile[field] = self.clean_title(value) if field == 'title' else value.strip()
+        return profile
+    
+    def _onboarding_profile_prompt(self, artisan_data: Dict[str, Any], tone: str, title_tone: str) -> str:
+        return f"""
+        Create the opening profile for a new artisan on a handcraft marketplace:
+        
+        Name: {artisan_data.get('name', 'Artisan')}
+        Craft: {artisan_data.get('craft_type', 'Traditional Craft')}
+        Location: {artisan_data.get('location', 'India')}
+        Experience: {artisan_data.get('experience_years', 10)} years
+        
+        Write three things:
+        1. bio: a {tone}, engaging biography (150-200 words) telling their journey into the craft,
+           their techniques, their passion and how their work connects to cultural heritage
+        2. title: a {title_tone} story title (3-6 words) that captures the essence of the craft,
+           e.g. "Clay Whispers Ancient Secrets" or "Threads of Heritage"
+        3. cultural_context: 80-120 accurate, respectful words on the history of this craft in
+           this region, its place in local life and what makes its techniques distinctive
+        
+        Respond with only a JSON object:
+        {{"bio": "<biography>", "title": "<title>", "cultural_context": "<cultural context>"}}
+        """
+
+
+def parse_json_object(text: str) -> Optional[Any]:
+    """The first JSON object in model output, ignoring code fences and surrounding prose"""
+    start = text.find('{')
+    if start < 0:
+        return None
+    try:
+        return json.JSONDecoder().raw_decode(text, start)[0]
+    except ValueError:
+        return None
+
+
+def parse_json_items(text: str) -> List[Any]:
+    """The elements of a JSON array in model output, tolerating code fences and truncation.
+
+    Elements are decoded one at a time, so a response cut off by the token
+    limit still yields every complete element before the cut.
+    """
+    start = text.find('[')
+    if start < 0:
+        return []
+    decoder = json.JSONDecoder()
+    items = []
+    position = start + 1
+    while position < len(text):
+        while position < len(text) and text[position] in ' \t\r\n,':
+            position += 1
+        if position >= len(text) or text[position] == ']':
+            break
+        try:
+            item, position = decoder.raw_decode(text, position)
+        except ValueError:
+            break
+        items.append(item)
+    return items
+
+
+class MarketingContentAgent:
+    """AI agent for social posts and email campaigns, batched across a whole catalog"""
+    
+    def __init__(self, ai_service=None, batch_size: int = None, max_retries: int = None):
+        self.ai_service = ai_service or google_ai_service
+        self.batch_size = batch_size or Config.MARKETING_BATCH_SIZE
+        self.max_retries = Config.MARKETING_MAX_RETRIES if max_retries is None else max_retries
+        self.logger = logging.getLogger(__name__)
+    
+    def generate_social_media_post(self, platform: str, artisan_data: Dict[str, Any],
+                                   product_data: Dict[str, Any]) -> str:
+        """Generate one social media post for a product"""
+        prompt = f"""
+        Write a {platform} post for {artisan_data.get('name', 'an artisan')}, a
+        {artisan_data.get('craft_type', 'traditional craft')} artisan from {artisan_data.get('location', 'India')}.
+        
+        Product: {product_data.get('name', 'Handcrafted Item')}
+        Description: {product_data.get('description', '')}
+        
+        Keep it under 300 characters, warm and authentic, and end with 3-5 relevant hashtags.
+        Return only the post.
+        """
+        return self.ai_service.generate_text(prompt, max_tokens=TOKENS_PER_POST, temperature=0.8)
+    
+    def generate_email_campaign(self, campaign_type: str, target_audience: str) -> str:
+        """Generate a marketing email for a campaign type and audience"""
+        prompt = f"""
+        Write a {campaign_type} marketing email for {target_audience} of a marketplace of
+        handcrafted products by traditional artisans.
+        
+        Include a subject line, a short story-led body (120-180 words) and a call to action.
+        """
+        return self.ai_service.generate_text(prompt, max_tokens=500, temperature=0.7)
+    
+    def generate_catalog_posts(self, artisan_data: Dict[str, Any], products: List[Dict[str, Any]],
+                               platform: str = 'Instagram') -> Dict[str, Any]:
+        """Social posts for every product, packing `batch_size` products into each Gemini call.
+        
+        Each returned item is validated on its own; only the products whose
+        item was missing or invalid are asked for again, up to `max_retries`
+        times, and any still without a post get a template one.
+        """
+        by_id = {product['id']: product for product in products}
+        posts: Dict[int, Dict[str, Any]] = {}
+        pending = list(by_id)
+        calls = 0
+        
+        for attempt in range(self.max_retries + 1):
+            if not pending or not hasattr(self.ai_service, 'gemini_model'):
+                break
+            batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+            workers = max(1, min(len(batches), self.ai_service.gemini_upstream.max_concurrency))
+            with ThreadPoolExecutor(workers) as pool:
+                # Retries skip the cache: the same prompt would return the same bad answer
+                results = list(pool.map(
+                    lambda batch: self._post_batch(artisan_data, [by_id[i] for i in batch], platform, attempt == 0),
+                    batches
+                ))
+            for batch_posts, batch_calls in results:
+                posts.update(batch_posts)
+                calls += batch_calls
+            pending = [product_id for product_id in pending if product_id not in posts]
+            if pending:
+                self.logger.info(f"{len(pending)} marketing posts failed validation (attempt {attempt + 1})")
+        
+        for product_id in pending:
+            posts[product_id] = self._fallback_post(artisan_data, by_id[product_id])
+        
+        return {
+            'posts': {str(product_id): posts[product_id] for product_id in by_id},
+            'upstream_calls': calls,
+            'fallbacks': len(pending)
+        }
+    
+    def _post_batch(self, artisan_data: Dict[str, Any], products: List[Dict[str, Any]], platform: str,
+                    use_cache: bool) -> Tuple[Dict[int, Dict[str, Any]], int]:
+        """Validated posts for one batch, and how many Gemini calls went upstream for it"""
+        prompt = self._catalog_posts_prompt(artisan_data, products, platform)
+        product_ids = [product['id'] for product in products]
+        with count_upstream_calls() as upstream:
+            # Only answers with a valid post for every product are cached
+            text = self.ai_service.generate_text(
+                prompt, max_tokens=TOKENS_PER_POST * len(products) + 100, temperature=0.7, use_cache=use_cache,
+                cache_if=lambda text: len(self.validate_posts(parse_json_items(text), product_ids)) == len(product_ids)
+            )
+        return self.validate_posts(parse_json_items(text), product_ids), upstream.count
+    
+    @staticmethod
+    def validate_posts(items: Iterable[Any], expected_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """{product id: post} for the well-formed items about products that were asked for"""
+        expected = set(expected_ids)
+        posts = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                product_id = int(item.get('id'))
+            except (TypeError, ValueError):
+                continue
+            caption = item.get('caption')
+            hashtags = item.get('hashtags', [])
+            if product_id not in expected or not isinstance(caption, str) or not caption.strip() \
+                    or len(caption) > MAX_CAPTION_LENGTH or not isinstance(hashtags, list):
+                continue
+            tags = ['#' + str(tag).strip().lstrip('#').replace(' ', '') for tag in hashtags if str(tag).strip('# ')]
+            posts[product_id] = {'caption': caption.strip(), 'hashtags': tags[:MAX_HASHTAGS], 'source': 'ai'}
+        return posts
+    
+    def _catalog_posts_prompt(self, artisan_data: Dict[str, Any], products: List[Dict[str, Any]],
+                              platform: str) -> str:
+        lines = '\n'.join(json.dumps({
+            'id': product['id'],
+            'name': product.get('name'),
+            'category': product.get('category'),
+            'price': product.get('price'),
+            'description': (product.get('description') or '')[:300]
+        }, ensure_ascii=False) for product in products)
+        return f"""
+        Write one {platform} post for each product below, in the voice of
+        {artisan_data.get('name', 'the artisan')}, a {artisan_data.get('craft_type', 'traditional craft')}
+        artisan from {artisan_data.get('location', 'India')}.
+        
+        Products, one JSON object per line:
+        {lines}
+        
+        Each caption should be warm and authentic, under 300 characters, and mention the product.
+        Respond with only a JSON array with one object per product, in the same order:
+        [{{"id": <product id>, "caption": "<post text>", "hashtags": ["#tag", "..."]}}]
+        """
+    
+    @staticmethod
+    def _fallback_post(artisan_data: Dict[str, Any], product: Dict[str, Any]) -> Dict[str, Any]:
+        craft = artisan_data.get('craft_type') or product.get('category') or 'Handmade'
+        return {
+            'caption': f"Meet the {product.get('name', 'latest piece')}, handcrafted by "
+                       f"{artisan_data.get('name', 'our artisan')} in {artisan_data.get('location', 'India')}. "
+                       f"Each piece carries generations of {craft.lower()} tradition.",
+            'hashtags': ['#handmade', '#' + re.sub(r'\W', '', craft.lower()), '#artisan'],
+            'source': 'fallback'
+        }
 
 
-# Initialize global AI service instances
+# Initialize global AI service instances (cheap: clients are created on first use)
 google_ai_service = GoogleAIService()
 artisan_storytelling_agent = ArtisanStorytellingAgent()
+marketing_content_agent = MarketingContentAgent()
@@ -0,0 +1,164 @@
+"""
+Request Identity - The signed-in user, artisan profile and persona, once per request
+The first lookup in a request loads all three with one outer-joined query
+and keeps them on flask.g, so handlers can ask as often as they like. With
+SESSION_IDENTITY_CLAIMS on, the user type and artisan id are also written to
+the signed session cookie at login, built from the rows the login already
+loaded, and authorization checks read them from there without touching the
+database.
+
+Writes that change a user's type or artisan profile clear the claims of the
+session that made them once they commit; the next check rebuilds them with
+the usual identity query. A change made from another session (e.g. an admin
+tool) only reaches a user's claims at their next login.
+"""
+
+from typing import Optional
+
+from flask import current_app, g, has_request_context, session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import contains_eager, object_session
+
+import database
+
+CLAIMS_KEY = '_identity'
+
+
+class Identity:
+    """The signed-in user with their artisan profile and persona, either of which may be None"""
+
+    __slots__ = ('user', 'artisan', 'persona')
+
+    def __init__(self, user, artisan=None, persona=None):
+        self.user = user
+        self.artisan = artisan
+        self.persona = persona
+
+
+def _load(*criteria) -> Optional[Identity]:
+    from app import db, Artisan, User
+
+    row = db.session.execute(
+        select(User, Artisan)
+        .outerjoin(Artisan, Artisan.user_id == User.id)
+        .outerjoin(Artisan.persona)
+        .options(contains_eager(Artisan.persona))
+        .where(*criteria)
+        .order_by(Artisan.id)
+        .limit(1)
+    ).first()
+    if row is None:
+        return None
+    user, artisan = row
+    return Identity(user, artisan, artisan.persona if artisan else None)
+
+
+def find_by_username(username: str) -> Optional[Identity]:
+    """The identity a login is for, loaded with one query so remember() needs none"""
+    from app import User
+
+    return _load(User.username == username)
+
+
+def current_identity() -> Optional[Identity]:
+    """The signed-in identity, loaded on first use in this request; None when signed out"""
+    user_id = session.get('user_id')
+    if user_id is None:
+        return None
+    if g.get('identity_user_id') != user_id:
+        from app import User
+
+        g.identity = _load(User.id == user_id)
+        g.identity_user_id = user_id
+    return g.identity
+
+
+def current_user():
+    identity = current_identity()
+    return identity.user if identity else None
+
+
+def current_artisan():
+    identity = current_identity()
+    return identity.artisan if identity else None
+
+
+def _claims() -> Optional[dict]:
+    """The session's claims, rebuilt from the database if they are missing or for another user"""
+    if not current_app.config['SESSION_IDENTITY_CLAIMS']:
+        return None
+    claims = session.get(CLAIMS_KEY)
+    if not claims or claims.get('user_id') != session.get('user_id'):
+        identity = current_identity()
+        if identity is None:
+            return None
+        claims = _store_claims(identity.user, identity.artisan)
+    return claims
+
+
+def _store_claims(user, artisan) -> dict:
+    claims = {
+        'user_id': user.id,
+        'user_type': user.user_type,
+        'artisan_id': artisan.id if artisan else None
+    }
+    session[CLAIMS_KEY] = claims
+    return claims
+
+
+def user_type() -> Optional[str]:
+    """The signed-in user's type, from the session claims when enabled"""
+    claims = _claims()
+    if claims is not None:
+        return claims['user_type']
+    user = current_user()
+    return user.user_type if user else None
+
+
+def artisan_id() -> Optional[int]:
+    """The signed-in user's artisan profile id, from the session claims when enabled"""
+    claims = _claims()
+    if claims is not None:
+        return claims['artisan_id']
+    artisan = current_artisan()
+    return artisan.id if artisan else None
+
+
+def remember(user, artisan=None):
+    """Sign `user` in, or refresh their claims after their profile changed.
+
+    `artisan` is the user's artisan profile, None if they have none. Both come
+    from rows the caller already loaded, so this runs no queries.
+    """
+    session['user_id'] = user.id
+    g.pop('identity_user_id', None)
+    if current_app.config['SESSION_IDENTITY_CLAIMS']:
+        _store_claims(user, artisan)
+    else:
+        session.pop(CLAIMS_KEY, None)
+
+
+def _forget_claims(user_id: int):
+    if has_request_context() and session.get('user_id') == user_id:
+        session.pop(CLAIMS_KEY, None)
+        g.pop('identity_user_id', None)
+
+
+def register_model_events(user_model, artisan_model):
+    """Clear the current session's claims when a commit changes its user's type or artisan profile"""
+    def user_changed(mapper, connection, target):
+        if inspect(target).attrs.user_type.history.has_changes():
+            database.after_commit(object_session(target), _forget_claims, target.id)
+
+    def artisan_added_or_removed(mapper, connection, target):
+        database.after_commit(object_session(target), _forget_claims, target.user_id)
+
+    def artisan_moved(mapper, connection, target):
+        history = inspect(target).attrs.user_id.history
+        for user_id in [*history.added, *history.deleted]:
+            database.after_commit(object_session(target), _forget_claims, user_id)
+
+    event.listen(user_model, 'after_update', user_changed)
+    event.listen(artisan_model, 'after_insert', artisan_added_or_removed)
+    event.listen(artisan_model, 'after_delete', artisan_added_or_removed)
+    event.listen(artisan_model, 'after_update', artisan_moved)
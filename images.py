@@ -0,0 +1,225 @@
+"""
+Product Images - Content-addressed uploads with background WebP variants
+Uploads are streamed to disk in chunks while being hashed, so a 16 MB file
+never sits in memory, and identical files share one original named by its
+SHA-256. New files must open as an image in Pillow before they are stored.
+A background job renders a square thumbnail and several widths as WebP in a
+process pool; re-uploading a stored file queues it again if any variant is
+missing. Image URLs name the bytes they serve, so they are sent with
+long-lived immutable cache headers.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+from typing import IO, Dict, Iterable, List, Optional, Tuple
+
+# Pillow is imported lazily: to verify new uploads and in the worker processes that render variants
+PILLOW_AVAILABLE = find_spec('PIL') is not None
+if not PILLOW_AVAILABLE:
+    logging.warning("Pillow not available, images are served without thumbnails. Install with: pip install Pillow")
+
+logger = logging.getLogger(__name__)
+
+URL_PREFIX = '/images'
+CHUNK_SIZE = 64 * 1024
+THUMBNAIL = 'thumb'
+ORIGINAL = 'original'
+KEY_PATTERN = re.compile(r'^[0-9a-f]{64}\.(png|jpg|gif|webp)$')
+MIMETYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'gif': 'image/gif', 'webp': 'image/webp'}
+# Files are typed by their first bytes, never by the name the client sent
+SIGNATURES = ((b'\x89PNG\r\n\x1a\n', 'png'), (b'\xff\xd8\xff', 'jpg'), (b'GIF87a', 'gif'), (b'GIF89a', 'gif'))
+
+_settings = {
+    'root': '/tmp/uploads',
+    'widths': (320, 640, 1280),
+    'thumbnail_size': 320,
+    'quality': 80,
+    'workers': 2
+}
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ImageUploadError(ValueError):
+    """Raised when an upload is not an image we accept"""
+
+
+def configure(config):
+    """Apply the app's storage and variant settings"""
+    _settings.update(
+        root=config['UPLOAD_FOLDER'],
+        widths=tuple(config['IMAGE_VARIANT_WIDTHS']),
+        thumbnail_size=config['IMAGE_THUMBNAIL_SIZE'],
+        quality=config['IMAGE_WEBP_QUALITY'],
+        workers=config['IMAGE_PROCESS_WORKERS']
+    )
+
+
+def variant_names() -> List[str]:
+    return [THUMBNAIL] + [f'w{width}' for width in _settings['widths']]
+
+
+def _sniff(head: bytes) -> Optional[str]:
+    for signature, extension in SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def original_path(key: str) -> str:
+    return os.path.join(_settings['root'], 'originals', key[:2], key)
+
+
+def variant_path(key: str, name: str) -> str:
+    digest = key.split('.', 1)[0]
+    return os.path.join(_settings['root'], 'variants', key[:2], f'{digest}-{name}.webp')
+
+
+def _verify(path: str):
+    """Raise ImageUploadError unless Pillow can parse the file as an image (without decoding it)"""
+    if not PILLOW_AVAILABLE:
+        return
+    from PIL import Image
+
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception as e:  # Pillow raises a mix of OSError, SyntaxError and its own errors
+        logger.info(f"Rejected upload that is not a readable image: {e}")
+        raise ImageUploadError('Upload is not a readable image')
+
+
+def save_upload(stream: IO[bytes], allowed_extensions: Iterable[str], max_bytes: int) -> Tuple[str, bool]:
+    """Write an uploaded image to content-addressed storage. Returns (key, whether it was new)."""
+    incoming = os.path.join(_settings['root'], 'incoming')
+    os.makedirs(incoming, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    extension = None
+
+    fd, temp_path = tempfile.mkstemp(dir=incoming)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if extension is None:
+                    extension = _sniff(chunk[:16])
+                    if extension not in allowed_extensions and not (extension == 'jpg' and 'jpeg' in allowed_extensions):
+                        raise ImageUploadError('Upload a PNG, JPEG, GIF or WebP image')
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageUploadError(f'Images are limited to {max_bytes // (1024 * 1024)} MB')
+                digest.update(chunk)
+                f.write(chunk)
+
+        if extension is None:
+            raise ImageUploadError('Upload is empty')
+
+        key = f'{digest.hexdigest()}.{extension}'
+        path = original_path(key)
+        if os.path.exists(path):
+            return key, False
+        _verify(temp_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)  # Atomic, so a concurrent upload of the same bytes is harmless
+        return key, True
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def render_variants(source: str, targets: Dict[str, str], widths: Tuple[int, ...], thumbnail_size: int,
+                    quality: int) -> List[str]:
+    """Render the WebP thumbnail and width variants of one original. Runs in a worker process."""
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as opened:
+        image = ImageOps.exif_transpose(opened)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+    renders = {THUMBNAIL: ImageOps.fit(image, (thumbnail_size, thumbnail_size), Image.LANCZOS)}
+    for width in widths:
+        # Never upscale; a narrow original is re-encoded at its own width
+        height = max(1, round(image.height * min(width, image.width) / image.width))
+        renders[f'w{width}'] = image.resize((min(width, image.width), height), Image.LANCZOS)
+
+    written = []
+    for name, render in renders.items():
+        target = targets[name]
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = f'{target}.{os.getpid()}.tmp'
+        render.save(temp_path, 'WEBP', quality=quality, method=4)
+        os.replace(temp_path, target)
+        written.append(name)
+    return written
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_settings['workers'])
+        return _pool
+
+
+def variants_missing(key: str) -> bool:
+    """Whether any variant of a stored image still has to be rendered"""
+    return PILLOW_AVAILABLE and not all(os.path.exists(variant_path(key, name)) for name in variant_names())
+
+
+def generate_variants(key: str) -> List[str]:
+    """Render any missing variants of an uploaded image in the process pool"""
+    if not variants_missing(key):
+        return []
+    targets = {name: variant_path(key, name) for name in variant_names()}
+    return _get_pool().submit(render_variants, original_path(key), targets, _settings['widths'],
+                              _settings['thumbnail_size'], _settings['quality']).result()
+
+
+def resolve(key: str, name: str) -> Tuple[Optional[str], Optional[str], bool]:
+    """(path, mimetype, final) for a requested variant; falls back to the original until it is rendered"""
+    if not KEY_PATTERN.match(key) or name not in variant_names() + [ORIGINAL]:
+        return None, None, False
+
+    if name != ORIGINAL:
+        path = variant_path(key, name)
+        if os.path.exists(path):
+            return path, 'image/webp', True
+
+    path = original_path(key)
+    if not os.path.exists(path):
+        return None, None, False
+    return path, MIMETYPES[key.rsplit('.', 1)[1]], name == ORIGINAL
+
+
+def image_url(image: Optional[str], name: str = THUMBNAIL) -> Optional[str]:
+    """URL of a variant for a stored image key; other values (external URLs) pass through"""
+    if image and KEY_PATTERN.match(image):
+        return f'{URL_PREFIX}/{image}/{name}'
+    return image
+
+
+def image_srcset(image: Optional[str]) -> str:
+    if not image or not KEY_PATTERN.match(image):
+        return ''
+    return ', '.join(f'{image_url(image, f"w{width}")} {width}w' for width in _settings['widths'])
+
+
+def first_image(images: Optional[str]) -> Optional[str]:
+    """The first entry of a product's JSON images column, or None"""
+    try:
+        parsed = json.loads(images or '[]')
+    except ValueError:
+        return None
+    return parsed[0] if isinstance(parsed, list) and parsed else None
@@ -0,0 +1,239 @@
+"""
+Background Jobs - Database-backed job queue for slow AI work
+Jobs are rows in the `job` table, so the queue needs no broker and survives restarts.
+A running job holds a lease (its updated_at) that the worker renews while the
+handler runs; only a job whose worker stopped renewing is reclaimed.
+
+Run a standalone worker with: python -m jobs
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import and_, or_, update
+
+logger = logging.getLogger(__name__)
+
+_handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def job_handler(kind: str):
+    """Register a function as the handler for jobs of the given kind"""
+    def decorator(f):
+        _handlers[kind] = f
+        return f
+    return decorator
+
+
+def enqueue(kind: str, payload: Dict[str, Any], user_id: Optional[int] = None):
+    """Add a job to the current session.
+
+    The job is committed together with the caller's own changes; call
+    dispatch() after the commit so it gets picked up.
+    """
+    from app import app, db, Job
+
+    if kind not in _handlers:
+        raise ValueError(f'No handler registered for job kind: {kind}')
+
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        user_id=user_id,
+        max_attempts=app.config['JOB_MAX_ATTEMPTS']
+    )
+    db.session.add(job)
+    db.session.flush()  # Get job ID
+    return job
+
+
+def dispatch(job):
+    """Hand a committed job to the configured backend"""
+    from app import app
+
+    mode = app.config['JOB_QUEUE_MODE']
+    if mode == 'eager':
+        run_job(job.id)
+    elif mode == 'thread':
+        _ensure_worker(app).wake()
+    # 'external': a separate `python -m jobs` process polls the table
+
+
+def _due_filter(now: datetime, lease_seconds: int):
+    """Pending jobs whose backoff has elapsed, plus running jobs whose worker went away"""
+    from app import Job
+
+    return or_(
+        and_(Job.status == 'pending', Job.run_after <= now),
+        and_(Job.status == 'running', Job.updated_at < now - timedelta(seconds=lease_seconds))
+    )
+
+
+def renew_lease(job_id: int, attempt: int) -> bool:
+    """Extend a running job's lease. False once the job finished or another worker reclaimed it."""
+    from app import db, Job
+
+    with db.engine.begin() as conn:
+        return bool(conn.execute(update(Job.__table__).where(
+            Job.id == job_id, Job.status == 'running', Job.attempts == attempt
+        ).values(updated_at=datetime.utcnow())).rowcount)
+
+
+class LeaseRenewer(threading.Thread):
+    """Renews a job's lease every third of JOB_LEASE_SECONDS until stopped"""
+
+    def __init__(self, app, job_id: int, attempt: int):
+        super().__init__(name=f'job-lease-{job_id}', daemon=True)
+        self.app = app
+        self.job_id = job_id
+        self.attempt = attempt
+        self.interval = app.config['JOB_LEASE_SECONDS'] / 3
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    if not renew_lease(self.job_id, self.attempt):
+                        logger.warning(f"Job {self.job_id} lost its lease to another worker")
+                        return
+            except Exception as e:
+                logger.error(f"Job {self.job_id} lease renewal failed: {e}")
+
+
+def run_job(job_id: int) -> bool:
+    """Claim and execute a single job. Returns False if another worker got it first."""
+    from app import app, db, Job
+
+    now = datetime.utcnow()
+    claimed = Job.query.filter(
+        Job.id == job_id,
+        _due_filter(now, app.config['JOB_LEASE_SECONDS'])
+    ).update({
+        Job.status: 'running',
+        Job.attempts: Job.attempts + 1,
+        Job.updated_at: now
+    }, synchronize_session=False)
+    db.session.commit()
+
+    if not claimed:
+        return False
+
+    job = db.session.get(Job, job_id)
+    handler = _handlers.get(job.kind)
+
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for job kind: {job.kind}')
+
+        renewer = LeaseRenewer(app, job_id, job.attempts)
+        renewer.start()
+        try:
+            result = handler(json.loads(job.payload))
+        finally:
+            renewer.stop()
+
+        job.status = 'succeeded'
+        job.result = json.dumps(result)
+        job.last_error = None
+
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.last_error = str(e)
+
+        if job.attempts < job.max_attempts:
+            # Exponential backoff: base, 2x base, 4x base, ...
+            delay = app.config['JOB_RETRY_BACKOFF'] * 2 ** (job.attempts - 1)
+            job.status = 'pending'
+            job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+            logger.warning(f"Job {job_id} ({job.kind}) failed, retrying in {delay}s: {e}")
+        else:
+            job.status = 'failed'
+            logger.error(f"Job {job_id} ({job.kind}) failed permanently: {e}")
+
+    job.updated_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+def run_due_jobs(limit: int = 10) -> int:
+    """Run up to `limit` jobs that are due now. Returns how many were executed."""
+    from app import app, db, Job
+
+    due_ids = [row.id for row in db.session.query(Job.id).filter(
+        _due_filter(datetime.utcnow(), app.config['JOB_LEASE_SECONDS'])
+    ).order_by(Job.run_after).limit(limit)]
+
+    return sum(1 for job_id in due_ids if run_job(job_id))
+
+
+class JobWorker(threading.Thread):
+    """Polls the job table and runs due jobs until stopped"""
+
+    def __init__(self, app, poll_interval: Optional[float] = None):
+        super().__init__(name='job-worker', daemon=True)
+        self.app = app
+        self.poll_interval = poll_interval or app.config['JOB_POLL_INTERVAL']
+        self._wake_event = threading.Event()
+        self._stopped = False
+
+    def wake(self):
+        self._wake_event.set()
+
+    def stop(self):
+        self._stopped = True
+        self.wake()
+
+    def run(self):
+        while not self._stopped:
+            try:
+                with self.app.app_context():
+                    executed = run_due_jobs()
+            except Exception as e:
+                logger.error(f"Job worker error: {e}")
+                executed = 0
+
+            if not executed:
+                self._wake_event.wait(self.poll_interval)
+                self._wake_event.clear()
+
+
+def _ensure_worker(app) -> JobWorker:
+    """Start the in-process worker thread on first use"""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = JobWorker(app)
+            _worker.start()
+    return _worker
+
+
+def main():
+    """Run a standalone worker process in the foreground"""
+    logging.basicConfig(level=logging.INFO)
+    from app import create_app
+
+    app = create_app()
+    logger.info('Job worker started')
+
+    worker = JobWorker(app)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        logger.info('Job worker stopped')
+
+
+if __name__ == '__main__':
+    # Re-import by name so this worker shares the handler registry populated by app.py
+    import jobs
+    jobs.main()
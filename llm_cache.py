@@ -0,0 +1,244 @@
+"""
+LLM Response Cache - Two-tier cache for generated text
+In-process LRU in front of a SQLite tier shared by all gunicorn workers
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def make_cache_key(prompt: str, model: str, generation_config: Dict[str, Any]) -> str:
+    """Hash a prompt together with the model and generation settings.
+
+    Whitespace is collapsed first so that the indented f-string prompts built by
+    the agents hash identically regardless of formatting.
+    """
+    normalized_prompt = " ".join(prompt.split())
+    payload = json.dumps({
+        'prompt': normalized_prompt,
+        'model': model,
+        'config': generation_config
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class MemoryLRUCache:
+    """Thread-safe in-process LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 512, ttl: int = 86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
+class SQLiteCache:
+    """Persistent cache tier stored in a SQLite file, shared across processes.
+
+    Entries expire after `ttl` seconds; once the table grows past `max_entries`
+    the least recently accessed rows are evicted. Eviction runs every
+    `evict_every` writes, or sooner if this process's writes could have taken
+    the table past `max_entries`, and trims a little below the limit so that
+    a full table is not swept on every write.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl: int = 86400, evict_every: int = 100):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evict_every = max(1, evict_every)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.logger = logging.getLogger(__name__)
+        self._initialized = False
+        self._lock = threading.Lock()
+        self._rows = 0  # table size at the last count
+        self._writes_since_evict = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            with self._lock:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS llm_cache (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        expires_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                """)
+                conn.execute('CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)')
+                conn.execute('CREATE INDEX IF NOT EXISTS ix_llm_cache_expires_at ON llm_cache (expires_at)')
+                conn.commit()
+                self._rows = conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+                self._initialized = True
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            conn = self._connect()
+            try:
+                now = time.time()
+                row = conn.execute(
+                    'SELECT value FROM llm_cache WHERE key = ? AND expires_at > ?', (key, now)
+                ).fetchone()
+                if row:
+                    conn.execute('UPDATE llm_cache SET accessed_at = ? WHERE key = ?', (now, key))
+                    conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.logger.error(f"LLM cache read error: {e}")
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return row[0]
+
+    def set(self, key: str, value: str):
+        try:
+            conn = self._connect()
+            try:
+                now = time.time()
+                conn.execute(
+                    'INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                    (key, value, now + self.ttl, now)
+                )
+                if self._eviction_due():
+                    self._evict(conn, now)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.logger.error(f"LLM cache write error: {e}")
+
+    def _eviction_due(self) -> bool:
+        """Count a write; True once every `evict_every` writes or when the table may be over its limit"""
+        with self._lock:
+            self._writes_since_evict += 1
+            if (self._writes_since_evict < self.evict_every
+                    and self._rows + self._writes_since_evict <= self.max_entries):
+                return False
+            self._writes_since_evict = 0
+            return True
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        # Both deletes walk an index rather than the table
+        conn.execute('DELETE FROM llm_cache WHERE expires_at <= ?', (now,))
+        rows = conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+        if rows > self.max_entries:
+            keep = self.max_entries - min(self.evict_every, self.max_entries // 10)
+            conn.execute("""
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?
+                )
+            """, (rows - keep,))
+            self.evictions += rows - keep
+            rows = keep
+        self._rows = rows
+
+    def clear(self):
+        try:
+            conn = self._connect()
+            try:
+                conn.execute('DELETE FROM llm_cache')
+                conn.commit()
+                self._rows = self._writes_since_evict = 0
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.logger.error(f"LLM cache clear error: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+class TwoTierCache:
+    """Memory LRU backed by a persistent tier; disk hits are promoted to memory"""
+
+    def __init__(self, memory: MemoryLRUCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: str):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        stats = {'memory': self.memory.stats()}
+        if self.disk is not None:
+            stats['disk'] = self.disk.stats()
+        return stats
+
+
+def build_llm_cache(config) -> Optional[TwoTierCache]:
+    """Build the response cache described by the app config, or None if disabled"""
+    if not config.LLM_CACHE_ENABLED:
+        return None
+
+    memory = MemoryLRUCache(config.LLM_CACHE_MEMORY_MAX_ENTRIES, config.LLM_CACHE_TTL)
+    disk = None
+    if config.LLM_CACHE_PATH:
+        os.makedirs(os.path.dirname(config.LLM_CACHE_PATH) or '.', exist_ok=True)
+        disk = SQLiteCache(config.LLM_CACHE_PATH, config.LLM_CACHE_DISK_MAX_ENTRIES, config.LLM_CACHE_TTL,
+                           config.LLM_CACHE_EVICT_EVERY)
+
+    return TwoTierCache(memory, disk)
@@ -0,0 +1,426 @@
+"""
+Request Metrics - Latency histograms, SQL and template timing, slow-request profiles
+WSGI middleware times every request by route. SQLAlchemy cursor hooks, Jinja
+render signals and AI upstream timers attribute time within the request.
+Everything is exported in Prometheus text format from /metrics, which needs
+METRICS_TOKEN as a bearer token unless METRICS_PUBLIC is set. An opt-in
+stack sampler writes folded stacks (flamegraph.pl / speedscope input) for
+requests slower than a threshold.
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import before_render_template, request, request_started, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from werkzeug.wsgi import ClosingIterator
+
+from upstream import CircuitOpenError, UpstreamBusyError, UpstreamTimeoutError
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+UNMATCHED_ROUTE = '<unmatched>'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, in the Prometheus exposition layout"""
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, List[float]] = {}  # bucket counts..., sum, count
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple((name, str(labels.get(name, ''))) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{_format_labels(labels, ("le", _format_value(bound)))} {count}')
+            lines.append(f'{self.name}_bucket{_format_labels(labels, ("le", "+Inf"))} {values[-1]}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(round(values[-2], 6))}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {values[-1]}')
+        return lines
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple((name, str(labels.get(name, ''))) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(labels)} {_format_value(value)}')
+        return lines
+
+
+def gauge_lines(name: str, documentation: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    """Exposition lines for a gauge computed at scrape time"""
+    lines = [f'# HELP {name} {documentation}', f'# TYPE {name} gauge']
+    for labels, value in samples:
+        lines.append(f'{name}{_format_labels(tuple(labels.items()))} {_format_value(value)}')
+    return lines
+
+
+def stats_gauges(prefix: str, label: str, stats: Dict[str, Dict]) -> List[str]:
+    """Gauges from component stats() dicts: {label value: stats}, one family per numeric stat.
+
+    Nested dicts are flattened one level (latency_ms.p95 -> latency_ms_p95);
+    strings and missing values are skipped.
+    """
+    families: Dict[str, List[Tuple[Dict[str, str], float]]] = {}
+    for label_value, values in stats.items():
+        flat = {}
+        for key, value in values.items():
+            if isinstance(value, dict):
+                flat.update({f'{key}_{sub}': sub_value for sub, sub_value in value.items()})
+            else:
+                flat[key] = value
+        for key, value in flat.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                families.setdefault(key, []).append(({label: label_value}, value))
+
+    lines = []
+    for key, samples in sorted(families.items()):
+        lines += gauge_lines(f'{prefix}_{key}', f'{prefix} {key} from stats()', samples)
+    return lines
+
+
+class Registry:
+    """Metrics rendered by /metrics, plus collectors called at scrape time"""
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors: List[Callable[[], List[str]]] = []
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        for collector in self.collectors:
+            try:
+                lines += collector()
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.histogram(
+    'persona_http_request_duration_seconds', 'Request latency, until the response body is closed',
+    ('route', 'method', 'status'))
+REQUEST_QUERIES = registry.histogram(
+    'persona_db_queries_per_request', 'SQL statements executed per request', ('route',), QUERY_COUNT_BUCKETS)
+REQUEST_QUERY_TIME = registry.histogram(
+    'persona_db_time_per_request_seconds', 'Time spent executing SQL per request', ('route',))
+TEMPLATE_RENDER = registry.histogram(
+    'persona_template_render_seconds', 'Jinja render time per template', ('template',))
+UPSTREAM_DURATION = registry.histogram(
+    'persona_upstream_duration_seconds', 'Gemini and Translate call latency, including queueing for a slot',
+    ('upstream', 'operation', 'outcome'))
+SLOW_REQUESTS = registry.counter(
+    'persona_slow_requests_total', 'Requests slower than the profiling threshold', ('route',))
+
+
+# Per-request accounting
+class RequestTimings:
+    """Where one request's time went; lives on the thread serving it"""
+
+    __slots__ = ('route', 'started', 'queries', 'query_seconds', 'template_seconds', 'upstream_seconds',
+                 '_query_started', '_render_started')
+
+    def __init__(self):
+        self.route = UNMATCHED_ROUTE
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.template_seconds = 0.0
+        self.upstream_seconds = 0.0
+        self._query_started = None
+        self._render_started = []
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, shown per request in browser dev tools"""
+        return (f'db;dur={self.query_seconds * 1000:.1f};desc="{self.queries} queries", '
+                f'tpl;dur={self.template_seconds * 1000:.1f}, ai;dur={self.upstream_seconds * 1000:.1f}')
+
+
+_local = threading.local()
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return getattr(_local, 'timings', None)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    timings = current_timings()
+    if timings is not None:
+        timings._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    timings = current_timings()
+    if timings is not None and timings._query_started is not None:
+        timings.queries += 1
+        timings.query_seconds += time.perf_counter() - timings._query_started
+        timings._query_started = None
+
+
+def _route_matched(sender, **extra):
+    timings = current_timings()
+    if timings is not None and request.url_rule is not None:
+        timings.route = request.url_rule.rule
+
+
+def _render_started(sender, template, context, **extra):
+    timings = current_timings()
+    if timings is not None:
+        timings._render_started.append(time.perf_counter())
+
+
+def _render_finished(sender, template, context, **extra):
+    timings = current_timings()
+    if timings is not None and timings._render_started:
+        elapsed = time.perf_counter() - timings._render_started.pop()
+        # Nested renders (cached fragments) are already inside their parent's time
+        if not timings._render_started:
+            timings.template_seconds += elapsed
+        TEMPLATE_RENDER.observe(elapsed, template=template.name or '<string>')
+
+
+_UPSTREAM_OUTCOMES = ((UpstreamTimeoutError, 'timeout'), (UpstreamBusyError, 'busy'),
+                      (CircuitOpenError, 'circuit_open'))
+
+
+@contextmanager
+def upstream_timer(upstream: str, operation: str):
+    """Time one AI upstream call into the histogram and the current request's timings"""
+    started = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield
+    except GeneratorExit:
+        outcome = 'cancelled'
+        raise
+    except Exception as e:
+        outcome = next((name for error, name in _UPSTREAM_OUTCOMES if isinstance(e, error)), 'error')
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        UPSTREAM_DURATION.observe(elapsed, upstream=upstream, operation=operation, outcome=outcome)
+        timings = current_timings()
+        if timings is not None:
+            timings.upstream_seconds += elapsed
+
+
+# Slow-request profiling
+class StackSampler(threading.Thread):
+    """Samples the stacks of threads serving requests every `interval` seconds.
+
+    Only threads registered with start() are walked, so idle cost is one
+    sys._current_frames() call per interval.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(name='metrics-stack-sampler', daemon=True)
+        self.interval = interval
+        self._active: Dict[int, StackCounter] = {}
+        self._lock = threading.Lock()
+
+    def start_thread(self, thread_id: int):
+        with self._lock:
+            self._active[thread_id] = StackCounter()
+
+    def stop_thread(self, thread_id: int) -> StackCounter:
+        with self._lock:
+            return self._active.pop(thread_id, StackCounter())
+
+    @staticmethod
+    def _folded(frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                thread_ids = list(self._active)
+            if not thread_ids:
+                continue
+            frames = sys._current_frames()
+            samples = {tid: self._folded(frames[tid]) for tid in thread_ids if tid in frames}
+            with self._lock:
+                for tid, stack in samples.items():
+                    if tid in self._active:
+                        self._active[tid][stack] += 1
+
+
+class SlowRequestProfiler:
+    """Writes the sampled stacks of requests slower than the threshold as .folded files"""
+
+    def __init__(self, threshold: float, interval: float, directory: str, max_files: int):
+        self.threshold = threshold
+        self.directory = directory
+        self.max_files = max_files
+        self.sampler = StackSampler(interval)
+        self.sampler.start()
+        os.makedirs(directory, exist_ok=True)
+
+    def begin(self):
+        self.sampler.start_thread(threading.get_ident())
+
+    def end(self, route: str, duration: float):
+        stacks = self.sampler.stop_thread(threading.get_ident())
+        if duration < self.threshold or not stacks:
+            return
+        SLOW_REQUESTS.inc(route=route)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'}" \
+               f"-{duration * 1000:.0f}ms.folded"
+        try:
+            with open(os.path.join(self.directory, name), 'w') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f'{stack} {count}\n')
+            self._prune()
+        except OSError as e:
+            logger.error(f"Could not write request profile {name}: {e}")
+
+    def _prune(self):
+        profiles = sorted(entry for entry in os.listdir(self.directory) if entry.endswith('.folded'))
+        for entry in profiles[:-self.max_files]:
+            os.remove(os.path.join(self.directory, entry))
+
+
+class MetricsMiddleware:
+    """WSGI middleware timing each request from first byte in to body closed"""
+
+    def __init__(self, wsgi_app, profiler: Optional[SlowRequestProfiler] = None):
+        self.wsgi_app = wsgi_app
+        self.profiler = profiler
+
+    def __call__(self, environ, start_response):
+        timings = _local.timings = RequestTimings()
+        status = []
+
+        def capture_status(status_line, headers, exc_info=None):
+            status[:] = [status_line.split(' ', 1)[0]]
+            return start_response(status_line, headers, exc_info)
+
+        if self.profiler is not None:
+            self.profiler.begin()
+        try:
+            body = self.wsgi_app(environ, capture_status)
+        except Exception:
+            self._finish(timings, environ, ['500'])
+            raise
+        return ClosingIterator(body, lambda: self._finish(timings, environ, status))
+
+    def _finish(self, timings: RequestTimings, environ, status):
+        duration = time.perf_counter() - timings.started
+        REQUEST_DURATION.observe(duration, route=timings.route, method=environ.get('REQUEST_METHOD', ''),
+                                 status=status[0] if status else '')
+        REQUEST_QUERIES.observe(timings.queries, route=timings.route)
+        REQUEST_QUERY_TIME.observe(timings.query_seconds, route=timings.route)
+        if self.profiler is not None:
+            self.profiler.end(timings.route, duration)
+        if current_timings() is timings:
+            _local.timings = None
+
+
+def init_app(app):
+    """Install the middleware, the route and template hooks and the Server-Timing header"""
+    profiler = None
+    if app.config['PROFILE_SLOW_REQUESTS']:
+        profiler = SlowRequestProfiler(
+            app.config['PROFILE_THRESHOLD_MS'] / 1000,
+            app.config['PROFILE_INTERVAL_MS'] / 1000,
+            app.config['PROFILE_DIR'],
+            app.config['PROFILE_MAX_FILES']
+        )
+    app.wsgi_app = MetricsMiddleware(app.wsgi_app, profiler)
+
+    request_started.connect(_route_matched, app)
+    before_render_template.connect(_render_started, app)
+    template_rendered.connect(_render_finished, app)
+
+    @app.after_request
+    def add_server_timing_header(response):
+        timings = current_timings()
+        if timings is not None:
+            response.headers['Server-Timing'] = timings.server_timing()
+        return response
@@ -0,0 +1,264 @@
+"""
+Persona Template Engine - Precompiled bio and product description templates
+Each template is compiled once into a printf-style pattern, so rendering is a
+single `%` substitution against the data dict. The render_* functions go one
+step further and bind each template to its literal segments, so a render
+joins those with the field values without parsing a pattern at all.
+
+Packs are keyed by locale. The built-in English pack lives here; extra packs
+(new locales, tones or tone/style variants) are JSON files in PERSONA_TEMPLATE_DIR:
+
+    {
+        "default_tone": "friendly",
+        "bio": {"friendly": {"intro": "...", "craft": "...", "story": "..."},
+                "warm/modern": {"intro": "...", "craft": "...", "story": "..."}},
+        "bio_cultural": "...",
+        "bio_personal": "...",
+        "product": {"friendly": "..."}
+    }
+"""
+
+import glob
+import json
+import logging
+import os
+from operator import itemgetter
+from string import Formatter
+from typing import Any, Callable, Dict, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+BIO_FIELDS = frozenset({'name', 'craft_type', 'location'})
+PRODUCT_FIELDS = frozenset({'category', 'description'})
+# Value order for the bound bio and product renderers
+BIO_ARGS = ('name', 'craft_type', 'location')
+PRODUCT_ARGS = ('category', 'description')
+DEFAULT_LOCALE = 'en'
+PRODUCT_RENDERER_CACHE_SIZE = 256  # (locale, tone) pairs
+
+# Storytelling depth (0-10) -> which of the four precompiled bio variants to use
+_DEPTH_VARIANT = (0, 0, 0, 0, 0, 1, 1, 2, 2, 3, 3)
+
+DEFAULT_PACK = {
+    'default_tone': 'friendly',
+    'bio': {
+        'friendly': {
+            'intro': "Hi there! I'm {name}, and I'm passionate about {craft_type}.",
+            'craft': "I've been creating beautiful {craft_type} pieces from my workshop in {location}.",
+            'story': "Each piece I create tells a story - a blend of traditional techniques passed down through generations and my own creative vision."
+        },
+        'formal': {
+            'intro': "I am {name}, a dedicated {craft_type} artisan.",
+            'craft': "My workshop in {location} serves as the foundation for creating exceptional {craft_type} works.",
+            'story': "My commitment lies in preserving traditional craftsmanship while incorporating contemporary design elements."
+        },
+        'poetic': {
+            'intro': "In the heart of {location}, where tradition meets creativity, I am {name}.",
+            'craft': "My hands dance with clay and dreams, shaping {craft_type} that whisper ancient stories.",
+            'story': "Every creation is a poem written in form and texture, a bridge between the wisdom of ancestors and the hopes of tomorrow."
+        },
+        'warm': {
+            'intro': "Welcome to my world! I'm {name}, and {craft_type} is not just my craft - it's my heart's language.",
+            'craft': "From my cozy workshop in {location}, I pour love into every piece I create.",
+            'story': "I believe that handmade items carry the warmth of human touch and the joy of creation. Each piece is made with care, just for you."
+        }
+    },
+    'bio_cultural': "My {craft_type} reflects the rich cultural heritage of {location}, where this art form has flourished for centuries.",
+    'bio_personal': "When you choose my work, you're not just buying a product - you're becoming part of a story that connects past, present, and future.",
+    'product': {
+        'friendly': "This beautiful {category} piece is one of my favorites to create! {description} I put so much care into every detail, and I hope you'll love it as much as I enjoyed making it.",
+        'formal': "This {category} represents the finest in traditional craftsmanship. {description} Each element has been carefully considered to ensure both aesthetic appeal and functional excellence.",
+        'poetic': "Behold this {category}, born from inspiration and shaped by skilled hands. {description} It carries within it the essence of creativity and the soul of artisanal tradition.",
+        'warm': "I'm so excited to share this special {category} with you! {description} Made with love in my workshop, it's ready to bring joy and beauty to your space."
+    }
+}
+
+
+class CompiledTemplate:
+    """A `{field}` template compiled once into a printf-style `%(field)s` pattern.
+
+    Only plain fields from `allowed_fields` are accepted and literal `%` signs
+    are escaped, so rendering is one C-level substitution with no format-string
+    parsing in Python.
+    """
+
+    __slots__ = ('source', 'pattern', 'literals', 'fields')
+
+    def __init__(self, source: str, allowed_fields: frozenset):
+        segments = []
+        literals = ['']
+        fields = []
+        for literal, field, format_spec, conversion in Formatter().parse(source):
+            segments.append(literal.replace('%', '%%'))
+            literals[-1] += literal
+            if field is None:
+                continue
+            if field not in allowed_fields or format_spec or conversion:
+                raise ValueError(f"Unsupported template field '{field}' in: {source[:60]}")
+            segments.append(f'%({field})s')
+            fields.append(field)
+            literals.append('')
+
+        self.source = source
+        self.pattern = ''.join(segments)
+        self.literals = tuple(literals)  # the text around the fields, one more than there are fields
+        self.fields = tuple(fields)
+
+    def render(self, data: Dict[str, Any]) -> str:
+        return self.pattern % data
+
+    def bind(self, names: Tuple[str, ...]) -> Callable[[Tuple[str, ...]], str]:
+        """Renderer taking a tuple of string values ordered like `names`.
+
+        The literals and values are picked into output order by one itemgetter
+        and joined, so a call copies strings rather than parsing a pattern.
+        """
+        literals = self.literals
+        order = []
+        for i, literal in enumerate(literals):
+            if literal:
+                order.append(i)
+            if i < len(self.fields):
+                order.append(len(literals) + names.index(self.fields[i]))
+
+        if not order:
+            return lambda values: ''
+        if len(order) == 1:
+            index = order[0]
+            return lambda values: (literals + values)[index]
+        pick = itemgetter(*order)
+        return lambda values: ''.join(pick(literals + values))
+
+
+class TemplatePack:
+    """All compiled templates for one locale"""
+
+    def __init__(self, locale: str, data: Dict[str, Any]):
+        self.locale = locale
+        self.default_tone = data.get('default_tone', 'friendly')
+
+        # Every tone's bio is compiled into one template per depth variant so rendering
+        # never builds or joins lists of parts
+        cultural = data.get('bio_cultural', '')
+        personal = data.get('bio_personal', '')
+        self.bios = {}
+        for key, parts in data.get('bio', {}).items():
+            sentences = [parts['intro'], parts['craft'], parts['story'], cultural, personal]
+            self.bios[key] = tuple(
+                CompiledTemplate(' '.join(s for s in sentences[:count] if s), BIO_FIELDS)
+                for count in (2, 3, 4, 5)
+            )
+        self.bio_renderers = {
+            key: tuple(template.bind(BIO_ARGS) for template in variants) for key, variants in self.bios.items()
+        }
+
+        self.products = {
+            tone: CompiledTemplate(source, PRODUCT_FIELDS)
+            for tone, source in data.get('product', {}).items()
+        }
+        self.product_renderers = {tone: template.bind(PRODUCT_ARGS) for tone, template in self.products.items()}
+
+        if self.default_tone not in self.bios or self.default_tone not in self.products:
+            raise ValueError(f"Template pack '{locale}' has no templates for its default tone '{self.default_tone}'")
+
+        # Only pay for the tone/style lookup when the pack actually defines style variants
+        self.styled = any('/' in key for key in self.bios)
+
+    def _bio_key(self, tone: str, style: str) -> str:
+        if self.styled and f'{tone}/{style}' in self.bios:
+            return f'{tone}/{style}'
+        return tone if tone in self.bios else self.default_tone
+
+    def bio_template(self, tone: str, style: str, depth: int) -> CompiledTemplate:
+        return self.bios[self._bio_key(tone, style)][_DEPTH_VARIANT[min(max(depth, 0), 10)]]
+
+    def bio_renderer(self, tone: str, style: str, depth: int) -> Callable[[Tuple[str, ...]], str]:
+        return self.bio_renderers[self._bio_key(tone, style)][_DEPTH_VARIANT[min(max(depth, 0), 10)]]
+
+    def product_template(self, tone: str) -> CompiledTemplate:
+        return self.products.get(tone) or self.products[self.default_tone]
+
+    def product_renderer(self, tone: str) -> Callable[[Tuple[str, ...]], str]:
+        return self.product_renderers.get(tone) or self.product_renderers[self.default_tone]
+
+
+_pack_sources: Dict[str, Dict[str, Any]] = {}
+_packs: Dict[str, TemplatePack] = {}
+# (language_preference, tone) -> product renderer, with the locale and tone fallbacks already applied
+_product_renderers: Dict[Tuple[Any, Any], Callable[[Tuple[str, ...]], str]] = {}
+_generation = 0
+
+
+def register_pack(locale: str, data: Dict[str, Any]) -> TemplatePack:
+    """Register (or extend) the template pack for a locale.
+
+    Tones and tone/style variants in `data` are merged over any already
+    registered for the locale, so a pack can add a single new tone.
+    """
+    merged = dict(_pack_sources.get(locale, {}))
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+
+    global _generation
+    pack = TemplatePack(locale, merged)
+    _pack_sources[locale] = merged
+    _packs[locale] = pack
+    _product_renderers.clear()
+    _generation += 1
+    return pack
+
+
+def pack_generation() -> int:
+    """Counter bumped on every registration, for keying caches of rendered output"""
+    return _generation
+
+
+def load_pack_directory(path: str) -> int:
+    """Register every <locale>.json pack in a directory. Returns how many were loaded."""
+    loaded = 0
+    for filename in sorted(glob.glob(os.path.join(path, '*.json'))):
+        locale = os.path.splitext(os.path.basename(filename))[0]
+        try:
+            with open(filename, encoding='utf-8') as f:
+                register_pack(locale, json.load(f))
+            loaded += 1
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to load persona template pack {filename}: {e}")
+    return loaded
+
+
+def get_pack(locale: str = DEFAULT_LOCALE) -> TemplatePack:
+    return _packs.get(locale) or _packs[DEFAULT_LOCALE]
+
+
+def render_bio(artisan_data: Dict[str, Any], persona_data: Dict[str, Any]) -> str:
+    """Render an artisan bio for the persona's locale, tone, style and storytelling depth"""
+    pack = get_pack(persona_data.get('language_preference') or DEFAULT_LOCALE)
+    renderer = pack.bio_renderer(
+        persona_data.get('tone'),
+        persona_data.get('style', 'traditional'),
+        int(persona_data.get('storytelling_depth', 5))
+    )
+    return renderer((str(artisan_data['name']), str(artisan_data['craft_type']), str(artisan_data['location'])))
+
+
+def render_product_description(product_data: Dict[str, Any], persona) -> str:
+    """Render a product description in the voice of a Persona model instance"""
+    key = (persona.language_preference, persona.tone)
+    renderer = _product_renderers.get(key)
+    if renderer is None:
+        renderer = get_pack(key[0] or DEFAULT_LOCALE).product_renderer(key[1])
+        if len(_product_renderers) >= PRODUCT_RENDERER_CACHE_SIZE:
+            _product_renderers.clear()
+        _product_renderers[key] = renderer
+    return renderer((str(product_data.get('category', 'handcraft')), str(product_data.get('description', ''))))
+
+
+register_pack(DEFAULT_LOCALE, DEFAULT_PACK)
+if Config.PERSONA_TEMPLATE_DIR and os.path.isdir(Config.PERSONA_TEMPLATE_DIR):
+    load_pack_directory(Config.PERSONA_TEMPLATE_DIR)
@@ -0,0 +1,168 @@
+"""
+Bulk Product Import - CSV / JSON Lines catalog ingestion
+Validates a whole file in one pass and inserts every row in a single transaction
+"""
+
+import csv
+import io
+import json
+import math
+from typing import Any, Dict, IO, List, Tuple
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+REQUIRED_FIELDS = ('name', 'description', 'price')
+MAX_NAME_LENGTH = 200
+MAX_CATEGORY_LENGTH = 100
+
+
+class ImportFileError(ValueError):
+    """Raised when the uploaded file cannot be parsed at all"""
+
+
+def detect_format(filename: str = '', content_type: str = '') -> str:
+    """Infer the import format from the upload's filename or content type"""
+    filename = (filename or '').lower()
+    content_type = (content_type or '').lower()
+
+    if filename.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    if filename.endswith(('.jsonl', '.ndjson')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'jsonl'
+
+    raise ImportFileError('Unsupported import format; upload a .csv or .jsonl file')
+
+
+def parse_rows(stream: IO[bytes], file_format: str, max_rows: int) -> List[Tuple[int, Dict[str, Any]]]:
+    """Parse an uploaded file into (line_number, row) pairs"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    rows = []
+
+    if file_format == 'csv':
+        reader = csv.DictReader(text)
+        missing = [field for field in REQUIRED_FIELDS if field not in (reader.fieldnames or [])]
+        if missing:
+            raise ImportFileError(f"CSV header is missing columns: {', '.join(missing)}")
+
+        for row in reader:
+            rows.append((reader.line_num, row))
+            if len(rows) > max_rows:
+                break
+
+    elif file_format == 'jsonl':
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ImportFileError(f'Line {line_number}: invalid JSON ({e.msg})')
+            if not isinstance(row, dict):
+                raise ImportFileError(f'Line {line_number}: expected a JSON object')
+            rows.append((line_number, row))
+            if len(rows) > max_rows:
+                break
+
+    else:
+        raise ImportFileError(f'Unsupported import format: {file_format}')
+
+    if len(rows) > max_rows:
+        raise ImportFileError(f'Import files are limited to {max_rows} rows')
+
+    return rows
+
+
+def _parse_images(value) -> List[str]:
+    if isinstance(value, list):
+        return [str(image) for image in value]
+    return [image.strip() for image in str(value or '').split(';') if image.strip()]
+
+
+def _text(value: Any) -> str:
+    return '' if value is None else str(value).strip()
+
+
+def _number(value: Any) -> float:
+    """float() of a CSV string or JSON number; JSON true/false are not numbers"""
+    if isinstance(value, bool):
+        raise ValueError(f'not a number: {value!r}')
+    return float(value)
+
+
+def _whole_number(value: Any) -> int:
+    """int() of a CSV string or JSON number, refusing to truncate a fractional part"""
+    number = _number(value)
+    if not number.is_integer():
+        raise ValueError(f'not a whole number: {value!r}')
+    return int(number)
+
+
+def validate_rows(rows: List[Tuple[int, Dict[str, Any]]], artisan_id: int,
+                  default_category: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Validate parsed rows in a single pass.
+
+    Returns (records, errors): records are column dicts ready for a bulk insert,
+    errors hold every problem found, grouped per source line.
+    """
+    records = []
+    errors = []
+
+    for line_number, row in rows:
+        row_errors = []
+
+        # Whitespace-only values count as missing
+        for field in REQUIRED_FIELDS:
+            if not _text(row.get(field)):
+                row_errors.append(f'{field} is required')
+
+        name = _text(row.get('name'))
+        if len(name) > MAX_NAME_LENGTH:
+            row_errors.append(f'name must be at most {MAX_NAME_LENGTH} characters')
+
+        category = _text(row.get('category')) or default_category.strip()
+        if len(category) > MAX_CATEGORY_LENGTH:
+            row_errors.append(f'category must be at most {MAX_CATEGORY_LENGTH} characters')
+
+        price = None
+        if _text(row.get('price')):
+            try:
+                price = _number(row['price'])
+                if not math.isfinite(price):
+                    row_errors.append('price must be a finite number')
+                elif price <= 0:
+                    row_errors.append('price must be greater than zero')
+            except (TypeError, ValueError):
+                row_errors.append('price must be a number')
+
+        stock_quantity = 1
+        if _text(row.get('stock_quantity')):
+            try:
+                stock_quantity = _whole_number(row['stock_quantity'])
+                if stock_quantity < 0:
+                    row_errors.append('stock_quantity cannot be negative')
+            except (TypeError, ValueError):
+                row_errors.append('stock_quantity must be a whole number')
+
+        if row_errors:
+            errors.append({'row': line_number, 'errors': row_errors})
+            continue
+
+        records.append({
+            'artisan_id': artisan_id,
+            'name': name,
+            'description': _text(row['description']),
+            'price': price,
+            'stock_quantity': stock_quantity,
+            'category': category,
+            'images': json.dumps(_parse_images(row.get('images'))),
+            'cultural_significance': str(row.get('cultural_significance') or ''),
+            'creation_story': str(row.get('creation_story') or ''),
+            'status': 'draft'
+        })
+
+    return records, errors
+
+
+def chunked(items: List[Any], size: int):
+    """Yield successive slices of `items` with at most `size` elements"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -0,0 +1,400 @@
+"""
+Bundle Recommendations - Vectorized compatibility index over published products
+The catalog is loaded once into NumPy arrays (tag matrix, category codes,
+prices). Bundle search scores a theme's top candidates pairwise in one matrix
+product and extends bundles with a beam search under a price band. NumPy is
+imported by the functions that use it, so it stays off the cold-start path.
+
+Committed catalog writes mark the snapshot stale. Requests keep using it
+while a background thread builds the next one, so suggestions stay fast while
+artisans edit their products.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from config import Config
+from images import first_image, image_url
+from llm_cache import MemoryLRUCache
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Tag -> words in a product's name, description, category or cultural notes that imply it
+TAG_KEYWORDS = {
+    'traditional': ('traditional', 'heritage', 'classic', 'ethnic', 'ancestral', 'handloom', 'vintage'),
+    'modern': ('modern', 'contemporary', 'sleek', 'fusion'),
+    'festive': ('festive', 'festival', 'celebration', 'diwali', 'ornate', 'puja'),
+    'minimalist': ('minimal', 'minimalist', 'simple', 'clean', 'elegant', 'plain'),
+    'decorative': ('decorative', 'decor', 'ornamental', 'vase', 'wall', 'painting', 'sculpture'),
+    'functional': ('functional', 'everyday', 'kitchen', 'storage', 'utility', 'pot', 'bowl', 'box'),
+    'ceramic': ('ceramic', 'clay', 'terracotta', 'pottery', 'glazed', 'earthen', 'porcelain'),
+    'textile': ('silk', 'cotton', 'embroidered', 'handwoven', 'woven', 'dupatta', 'saree', 'shawl', 'fabric'),
+    'wood': ('wood', 'wooden', 'teak', 'carved', 'sheesham', 'sandalwood', 'woodwork'),
+    'metal': ('brass', 'copper', 'bronze', 'iron', 'metal', 'dhokra', 'metalwork'),
+    'jewelry': ('silver', 'gold', 'bangle', 'bangles', 'necklace', 'earrings', 'filigree', 'beads', 'jewelry'),
+    'lighting': ('lamp', 'diya', 'lantern', 'candle', 'lighting'),
+    'gift': ('gift', 'set', 'collection', 'hamper', 'pair'),
+    'wedding': ('wedding', 'bridal', 'marriage', 'trousseau'),
+}
+TAGS = tuple(TAG_KEYWORDS)
+_WORD_TAGS = {word: TAGS.index(tag) for tag, words in TAG_KEYWORDS.items() for word in words}
+
+# Categories that pair well across crafts; the relation is symmetric
+COMPATIBLE_CATEGORIES = {
+    'pottery': ('textiles', 'woodwork', 'metalwork'),
+    'woodwork': ('textiles', 'jewelry', 'metalwork'),
+    'textiles': ('jewelry',),
+    'jewelry': (),
+    'metalwork': (),
+}
+SAME_CATEGORY_SCORE = 0.4
+COMPATIBLE_SCORE = 1.0
+UNRELATED_SCORE = 0.2
+
+# Theme -> tag weights; 'complementary' has none and leans on cross-category compatibility
+THEMES = {
+    'complementary': {},
+    'traditional': {'traditional': 1.0, 'ceramic': 0.3, 'textile': 0.3, 'wood': 0.3, 'metal': 0.3},
+    'modern': {'modern': 1.0, 'minimalist': 0.5, 'functional': 0.4},
+    'festive': {'festive': 1.0, 'lighting': 0.6, 'decorative': 0.5, 'jewelry': 0.4},
+    'minimalist': {'minimalist': 1.0, 'modern': 0.4, 'functional': 0.4},
+    'wedding': {'wedding': 1.0, 'jewelry': 0.6, 'textile': 0.5, 'gift': 0.5, 'festive': 0.4},
+}
+
+CANDIDATE_POOL = 300  # products per theme scored pairwise
+BEAM_WIDTH = 48
+RELEVANCE_WEIGHT = 0.4
+PAIR_WEIGHT = 0.6
+PLACEHOLDER_IMAGE = 'https://images.unsplash.com/photo-1578662996442-48f60103fc96?w=300&h=300&fit=crop'
+
+_WORD_PATTERN = re.compile(r'[a-z]+')
+
+
+def _normalize_category(category: Optional[str]) -> str:
+    return (category or 'other').strip().lower() or 'other'
+
+
+def _first_image(images: Optional[str]) -> str:
+    return image_url(first_image(images)) or PLACEHOLDER_IMAGE
+
+
+def _compatible(a: str, b: str) -> bool:
+    return b in COMPATIBLE_CATEGORIES.get(a, ()) or a in COMPATIBLE_CATEGORIES.get(b, ())
+
+
+class BundleIndex:
+    """Immutable, array-backed snapshot of the published catalog"""
+
+    def __init__(self, rows: Sequence[Dict[str, Any]], generation: int = 0, built_at: Optional[float] = None):
+        import numpy as np
+
+        self.generation = generation
+        self.built_at = built_at or time.time()  # when `rows` were read
+        n = len(rows)
+
+        self.ids = np.fromiter((row['id'] for row in rows), dtype=np.int64, count=n)
+        self.prices = np.fromiter((row['price'] or 0 for row in rows), dtype=np.float64, count=n)
+        self.position = {int(product_id): i for i, product_id in enumerate(self.ids)}
+
+        self.categories = sorted({_normalize_category(row['category']) for row in rows})
+        category_codes = {category: code for code, category in enumerate(self.categories)}
+        self.category_codes = np.fromiter(
+            (category_codes[_normalize_category(row['category'])] for row in rows), dtype=np.int32, count=n
+        )
+
+        # Category x category compatibility lookup table
+        k = len(self.categories)
+        self.category_matrix = np.full((k, k), UNRELATED_SCORE, dtype=np.float32)
+        for i, a in enumerate(self.categories):
+            for j, b in enumerate(self.categories):
+                if i == j:
+                    self.category_matrix[i, j] = SAME_CATEGORY_SCORE
+                elif _compatible(a, b):
+                    self.category_matrix[i, j] = COMPATIBLE_SCORE
+
+        # Binary product x tag matrix, L2-normalized so row dot products are cosines
+        tags = np.zeros((n, len(TAGS)), dtype=np.float32)
+        for i, row in enumerate(rows):
+            text = ' '.join(filter(None, (row['name'], row['description'], row['category'],
+                                          row['cultural_significance']))).lower()
+            for word in set(_WORD_PATTERN.findall(text)):
+                tag = _WORD_TAGS.get(word)
+                if tag is not None:
+                    tags[i, tag] = 1.0
+        self.tag_counts = tags.sum(axis=1)
+        self.tags = tags / np.maximum(np.sqrt(self.tag_counts), 1.0)[:, None]
+
+        # Display fields for the bundle builder, kept as plain lists
+        self.names = [row['name'] for row in rows]
+        self.artisans = [row['artisan_name'] for row in rows]
+        self.images = [_first_image(row['images']) for row in rows]
+        self.display_categories = [_normalize_category(row['category']) for row in rows]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def relevance(self, theme: str) -> 'np.ndarray':
+        """Per-product theme relevance in [0, 1], with a small prior for well-described products"""
+        import numpy as np
+
+        weights = THEMES.get(theme, {})
+        prior = 0.1 * np.minimum(self.tag_counts, 3) / 3
+        if not weights:
+            return prior
+        vector = np.array([weights.get(tag, 0.0) for tag in TAGS], dtype=np.float32)
+        vector /= np.linalg.norm(vector)
+        return self.tags @ vector + prior
+
+    def pair_scores(self, rows: 'np.ndarray', cols: 'np.ndarray') -> 'np.ndarray':
+        """Compatibility of every product in `rows` with every product in `cols`"""
+        category = self.category_matrix[self.category_codes[rows][:, None], self.category_codes[cols][None, :]]
+        return 0.6 * category + 0.4 * (self.tags[rows] @ self.tags[cols].T)
+
+    def product(self, i: int) -> Dict[str, Any]:
+        import numpy as np
+
+        category = self.display_categories[i]
+        return {
+            'id': int(self.ids[i]),
+            'name': self.names[i],
+            'price': float(self.prices[i]),
+            'category': category,
+            'artisan': self.artisans[i],
+            'image': self.images[i],
+            'tags': [TAGS[t] for t in np.flatnonzero(self.tags[i])],
+            'compatibility': [category] + [c for c in self.categories if c != category and _compatible(category, c)]
+        }
+
+    def top_products(self, theme: str, limit: int) -> List[Dict[str, Any]]:
+        relevance = self.relevance(theme)
+        top = _top_indices(relevance, limit)
+        return [self.product(i) for i in top]
+
+    def suggest(self, theme: str, selected_ids: Sequence[int] = (), size: int = 3, limit: int = 3,
+                min_price: Optional[float] = None, max_price: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Top-`limit` bundles of `size` products that complete the current selection.
+
+        Bundles are scored by mean theme relevance and mean pairwise
+        compatibility (including with the selection); the bundle total,
+        selection included, must fall inside [min_price, max_price].
+        """
+        import numpy as np
+
+        selected = np.array([self.position[i] for i in selected_ids if i in self.position], dtype=np.int64)
+        to_add = max(size - len(selected), 1)
+        base_price = float(self.prices[selected].sum()) if len(selected) else 0.0
+        max_price = np.inf if max_price is None else max_price
+        min_price = 0.0 if min_price is None else min_price
+
+        relevance = self.relevance(theme)
+        eligible = self.prices + base_price <= max_price
+        eligible[selected] = False
+        rank = relevance
+        if len(selected):
+            # Shortlist by fit with what is already in the bundle as well as the theme
+            rank = relevance + self.pair_scores(np.arange(len(self)), selected).mean(axis=1)
+        candidates = _top_indices(np.where(eligible, rank, -np.inf), CANDIDATE_POOL)
+        candidates = candidates[eligible[candidates]]
+        # Small catalogs get smaller bundles rather than none
+        to_add = min(to_add, len(candidates))
+        if to_add + len(selected) < 2:
+            return []
+
+        pairs = self.pair_scores(candidates, candidates)
+        with_selection = self.pair_scores(candidates, selected).sum(axis=1) if len(selected) else \
+            np.zeros(len(candidates), dtype=np.float32)
+        cand_relevance = relevance[candidates]
+        cand_prices = self.prices[candidates]
+
+        # Beam search over candidate positions; members are kept in increasing order so
+        # each set is generated once
+        beams = [((), 0.0, 0.0, 0.0, 0.0)]  # (members, relevance sum, pair sum, price, score)
+        for step in range(to_add):
+            members = [beam[0] for beam in beams]
+            rel_sum = np.array([beam[1] for beam in beams])[:, None] + cand_relevance[None, :]
+            pair_sum = np.array([beam[2] for beam in beams])[:, None] + with_selection[None, :]
+            pair_sum += np.stack([pairs[list(m)].sum(axis=0) if m else np.zeros(len(candidates)) for m in members])
+            price = np.array([beam[3] for beam in beams])[:, None] + cand_prices[None, :]
+
+            valid = price + base_price <= max_price
+            for b, m in enumerate(members):
+                if m:
+                    valid[b, :m[-1] + 1] = False
+
+            count = step + 1
+            pair_count = count * (count - 1) / 2 + count * len(selected)
+            scores = RELEVANCE_WEIGHT * rel_sum / count
+            if pair_count:
+                scores = scores + PAIR_WEIGHT * pair_sum / pair_count
+            scores = np.where(valid, scores, -np.inf).ravel()
+
+            best = _top_indices(scores, BEAM_WIDTH)
+            beams = []
+            for flat in best[np.isfinite(scores[best])]:
+                b, j = divmod(int(flat), len(candidates))
+                beams.append((members[b] + (j,), rel_sum[b, j], pair_sum[b, j], price[b, j], scores[flat]))
+            if not beams:
+                return []
+
+        results = []
+        used = []
+        for members, _, _, price, score in beams:
+            if price + base_price < min_price:
+                continue
+            # Keep suggestions varied: each new bundle must differ from earlier ones in most items
+            if any(len(set(members) & other) > len(members) // 2 for other in used):
+                continue
+            used.append(set(members))
+            results.append(self._describe(theme, candidates[list(members)], selected, price + base_price, score))
+            if len(results) >= limit:
+                break
+        return results
+
+    def _describe(self, theme: str, members: 'np.ndarray', selected: 'np.ndarray', total: float,
+                  score: float) -> Dict[str, Any]:
+        import numpy as np
+
+        everything = np.concatenate([selected, members])
+        categories = sorted({self.display_categories[i] for i in everything})
+        shared = self.tags[everything].min(axis=0)
+        common_tags = [TAGS[t] for t in np.flatnonzero(shared)] or \
+            [TAGS[t] for t in np.argsort(-self.tags[everything].sum(axis=0))[:2]]
+        label = theme.title() if theme in THEMES and theme != 'complementary' else 'Complementary'
+
+        return {
+            'title': f"{label} {' & '.join(c.title() for c in categories[:2])} Bundle",
+            'description': f"{len(everything)} handcrafted pieces across {len(categories)} "
+                           f"{'craft' if len(categories) == 1 else 'crafts'}",
+            'products': [int(self.ids[i]) for i in members],
+            'product_details': [self.product(i) for i in members],
+            'reason': f"Pairs well on {', '.join(common_tags)} and complementary crafts",
+            'confidence': round(float(min(max(score, 0.0), 1.0)), 2),
+            'total_price': round(total, 2)
+        }
+
+
+def _top_indices(values: 'np.ndarray', k: int) -> 'np.ndarray':
+    """Indices of the k largest values, best first, without a full sort"""
+    import numpy as np
+
+    if k >= len(values):
+        return np.argsort(-values, kind='stable')
+    top = np.argpartition(-values, k)[:k]
+    return top[np.argsort(-values[top], kind='stable')]
+
+
+_index: Optional[BundleIndex] = None
+_index_generation = 0
+_index_invalidated_at = 0.0  # time of the last committed catalog write
+_rebuild_started = False  # a background rebuild is scheduled or running
+_rebuild_lock = threading.Lock()
+suggestion_cache = MemoryLRUCache(Config.BUNDLE_CACHE_MAX_ENTRIES, Config.BUNDLE_INDEX_TTL)
+
+
+def invalidate_index():
+    """Mark the catalog snapshot stale; the next request starts a background rebuild"""
+    global _index_invalidated_at
+    _index_invalidated_at = time.time()
+
+
+def register_model_events(product_model, artisan_model):
+    """Mark the index stale when product or artisan writes that go through the ORM commit"""
+    import database
+    from sqlalchemy import event
+    from sqlalchemy.orm import object_session
+
+    def changed(mapper, connection, target):
+        database.after_commit(object_session(target), invalidate_index)
+
+    for model in (product_model, artisan_model):
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(model, name, changed)
+
+
+def load_rows() -> List[Dict[str, Any]]:
+    from app import db, Artisan, Product
+
+    query = db.session.query(
+        Product.id, Product.name, Product.description, Product.category,
+        Product.cultural_significance, Product.price, Product.images,
+        Artisan.name.label('artisan_name')
+    ).join(Artisan, Artisan.id == Product.artisan_id).filter(
+        Product.status == 'published',
+        Product.stock_quantity > 0
+    ).order_by(Product.id)
+    return [row._asdict() for row in query]
+
+
+def _is_fresh(index: Optional[BundleIndex]) -> bool:
+    return index is not None and index.built_at > _index_invalidated_at and \
+        time.time() - index.built_at < Config.BUNDLE_INDEX_TTL
+
+
+def _build():
+    global _index, _index_generation
+    _index_generation += 1
+    start = time.perf_counter()
+    loaded_at = time.time()  # writes committed after this may be missing from the snapshot
+    _index = BundleIndex(load_rows(), _index_generation, loaded_at)
+    logger.info(f"Built bundle index over {len(_index)} products in "
+                f"{(time.perf_counter() - start) * 1000:.0f}ms")
+
+
+def _rebuild_in_background(app):
+    global _rebuild_started
+    try:
+        # Catalog edits come in bursts; rebuild at most once per interval
+        time.sleep(max(0.0, _index.built_at + Config.BUNDLE_INDEX_REBUILD_INTERVAL - time.time()))
+        with app.app_context():
+            _build()
+    except Exception as e:
+        logger.error(f"Bundle index rebuild failed: {e}")
+    finally:
+        with _rebuild_lock:
+            _rebuild_started = False
+
+
+def get_index() -> BundleIndex:
+    """Current catalog snapshot, rebuilt when invalidated or older than BUNDLE_INDEX_TTL.
+
+    Only the first call builds inline. A stale snapshot keeps being served
+    while a background thread builds its replacement.
+    """
+    global _rebuild_started
+    from flask import current_app
+
+    index = _index
+    if index is None:
+        with _rebuild_lock:
+            if _index is None:
+                _build()
+        return _index
+
+    if not _is_fresh(index):
+        with _rebuild_lock:
+            start = not _rebuild_started
+            _rebuild_started = True
+        if start:
+            threading.Thread(target=_rebuild_in_background, args=(current_app._get_current_object(),),
+                             name='bundle-index', daemon=True).start()
+    return index
+
+
+def suggest_bundles(theme: str = 'complementary', selected_ids: Sequence[int] = (), size: int = 3,
+                    limit: int = 3, min_price: Optional[float] = None,
+                    max_price: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Cached bundle suggestions for a theme, selection and price band"""
+    index = get_index()
+    key = json.dumps([index.generation, theme, sorted(selected_ids), size, limit, min_price, max_price])
+    bundles = suggestion_cache.get(key)
+    if bundles is None:
+        bundles = index.suggest(theme, selected_ids, size, limit, min_price, max_price)
+        suggestion_cache.set(key, bundles)
+    return bundles
@@ -0,0 +1,220 @@
+"""
+Query Repository - Eager-loading data access for page views
+Loads each page's artisan/persona/product graph in a fixed number of queries
+"""
+
+import base64
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import g, has_app_context
+from sqlalchemy import event, func, or_, select, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import aliased, selectinload
+
+FEED_PRODUCTS_PER_STORY = 3
+FEATURED_PRODUCTS_PER_ARTISAN = 2
+
+
+# Query counting
+class QueryCounter:
+    """Counts SQL statements executed on the current thread while active"""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def record(self, statement):
+        self.count += 1
+        self.statements.append(statement)
+
+
+_local = threading.local()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    """Attribute every executed statement to the active counters and the current request"""
+    for counter in getattr(_local, 'counters', ()):
+        counter.record(statement)
+
+    if has_app_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+
+@contextmanager
+def count_queries():
+    """Context manager yielding a QueryCounter for the statements run inside the block"""
+    counter = QueryCounter()
+    counters = _local.__dict__.setdefault('counters', [])
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+def get_query_count():
+    """Number of SQL statements executed so far in the current request"""
+    return g.get('query_count', 0) if has_app_context() else 0
+
+
+# Feed cursors
+def encode_feed_cursor(artisan):
+    """Encode an artisan's (created_at, id) keyset position as an opaque cursor"""
+    created_at = artisan.created_at.isoformat() if artisan.created_at else ''  # NULL for rows written outside the ORM
+    raw = f"{created_at}|{artisan.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_feed_cursor(cursor):
+    """Decode a feed cursor back into (created_at or None, id), raising ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, artisan_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at) if created_at else None, int(artisan_id)
+    except ValueError:
+        raise ValueError('Invalid feed cursor')
+
+
+# Loaders
+def load_top_products(artisan_ids, per_artisan, status='published'):
+    """Load at most `per_artisan` products for each artisan in a single windowed query.
+
+    Returns a dict mapping every requested artisan id to its (possibly empty)
+    list of products, ordered by product id.
+    """
+    from app import db, Product
+
+    products_by_artisan = {artisan_id: [] for artisan_id in artisan_ids}
+    if not products_by_artisan:
+        return products_by_artisan
+
+    ranked = select(
+        Product,
+        func.row_number().over(
+            partition_by=Product.artisan_id,
+            order_by=Product.id
+        ).label('rank')
+    ).where(
+        Product.artisan_id.in_(products_by_artisan.keys()),
+        Product.status == status
+    ).subquery()
+
+    ranked_product = aliased(Product, ranked)
+    products = db.session.query(ranked_product).filter(
+        ranked.c.rank <= per_artisan
+    ).order_by(ranked.c.artisan_id, ranked.c.id).all()
+
+    for product in products:
+        products_by_artisan[product.artisan_id].append(product)
+
+    return products_by_artisan
+
+
+def _published_artisans_query():
+    """Artisans with at least one published product, personas eager-loaded"""
+    from app import db, Artisan, Product
+
+    published_artisan_ids = db.session.query(Product.artisan_id).filter(Product.status == 'published')
+    return Artisan.query.options(selectinload(Artisan.persona)).filter(
+        Artisan.id.in_(published_artisan_ids)
+    )
+
+
+def load_homepage(artisan_limit=6, product_limit=8):
+    """Load the homepage featured sections in four queries.
+
+    Returns a tuple of (featured_artisans, products_by_artisan, featured_products).
+    """
+    from app import Artisan, Product
+
+    featured_artisans = _published_artisans_query().order_by(
+        Artisan.created_at.desc(), Artisan.id.desc()
+    ).limit(artisan_limit).all()
+
+    products_by_artisan = load_top_products(
+        [artisan.id for artisan in featured_artisans], FEATURED_PRODUCTS_PER_ARTISAN
+    )
+    featured_products = Product.query.filter_by(status='published').limit(product_limit).all()
+
+    return featured_artisans, products_by_artisan, featured_products
+
+
+def load_marketplace_page(cursor=None, limit=12):
+    """Return one page of artisans with published products, newest first.
+
+    Pages are keyset-paginated on (created_at, id) so every page costs the same
+    regardless of how deep the user has scrolled. Returns a tuple of
+    (artisans, products_by_artisan, next_cursor).
+    """
+    from app import Artisan
+
+    query = _published_artisans_query()
+
+    # Artisans without a created_at sort after every dated one, on any dialect
+    if cursor:
+        created_at, artisan_id = decode_feed_cursor(cursor)
+        if created_at is None:
+            query = query.filter(Artisan.created_at.is_(None), Artisan.id < artisan_id)
+        else:
+            query = query.filter(or_(tuple_(Artisan.created_at, Artisan.id) < tuple_(created_at, artisan_id),
+                                     Artisan.created_at.is_(None)))
+
+    # Fetch one extra row to know whether another page exists
+    artisans = query.order_by(Artisan.created_at.desc().nulls_last(), Artisan.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_feed_cursor(artisans[limit - 1]) if len(artisans) > limit else None
+    artisans = artisans[:limit]
+
+    products_by_artisan = load_top_products(
+        [artisan.id for artisan in artisans], FEED_PRODUCTS_PER_STORY
+    )
+
+    return artisans, products_by_artisan, next_cursor
+
+
+def load_products_by_status(artisan_id, per_status):
+    """Newest `per_status` products of each status for one artisan, in a single windowed query.
+
+    Returns a dict mapping each status present to its products, newest first.
+    """
+    from app import db, Product
+
+    ranked = select(
+        Product,
+        func.row_number().over(
+            partition_by=Product.status,
+            order_by=Product.id.desc()
+        ).label('rank')
+    ).where(Product.artisan_id == artisan_id).subquery()
+
+    ranked_product = aliased(Product, ranked)
+    products = db.session.query(ranked_product).filter(
+        ranked.c.rank <= per_status
+    ).order_by(ranked.c.id.desc()).all()
+
+    products_by_status = {}
+    for product in products:
+        products_by_status.setdefault(product.status, []).append(product)
+    return products_by_status
+
+
+def load_artisan_products(artisan_id, status=None, before_id=None, limit=20):
+    """Return one page of an artisan's products, newest first.
+
+    Keyset-paginated on product id so deep pages cost the same as the first.
+    Returns a tuple of (products, next_before_id).
+    """
+    from app import Product
+
+    query = Product.query.filter(Product.artisan_id == artisan_id)
+    if status:
+        query = query.filter(Product.status == status)
+    if before_id:
+        query = query.filter(Product.id < before_id)
+
+    # Fetch one extra row to know whether another page exists
+    products = query.order_by(Product.id.desc()).limit(limit + 1).all()
+    next_before_id = products[limit - 1].id if len(products) > limit else None
+    return products[:limit], next_before_id
@@ -0,0 +1,70 @@
+"""
+Schema Version - Skip schema creation when the models have not changed
+A fingerprint of the model metadata (plus any extra DDL, such as the search
+index) is stored in the schema_version table. A cold start compares it with
+one SELECT and only runs create_all() and the extra installers on a mismatch,
+instead of issuing a round of existence checks for every table on each boot.
+"""
+
+import hashlib
+import logging
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(metadata, extra: Iterable[str] = ()) -> str:
+    """Stable hash of every table, column, index and constraint in `metadata`"""
+    digest = hashlib.sha256()
+    for table in metadata.sorted_tables:
+        digest.update(f'table {table.name}\n'.encode())
+        for column in table.columns:
+            digest.update(f'  {column.name} {column.type!r} {column.nullable} {column.primary_key} '
+                          f'{sorted(fk.target_fullname for fk in column.foreign_keys)}\n'.encode())
+        for index in sorted(table.indexes, key=lambda i: i.name or ''):
+            digest.update(f'  index {index.name} {[c.name for c in index.columns]} {index.unique}\n'.encode())
+        for constraint in sorted(table.constraints, key=lambda c: c.name or ''):
+            digest.update(f'  constraint {type(constraint).__name__} {constraint.name} '
+                          f'{sorted(c.name for c in constraint.columns)}\n'.encode())
+    for statement in extra:
+        digest.update(statement.encode())
+    return digest.hexdigest()
+
+
+def stored_fingerprint(engine, version_table) -> Optional[str]:
+    """The fingerprint the database was last brought up to, or None if it never was"""
+    try:
+        with engine.connect() as conn:
+            return conn.scalar(select(version_table.c.fingerprint).where(version_table.c.id == 1))
+    except SQLAlchemyError:
+        return None  # No schema_version table yet
+
+
+def ensure_schema(db, version_table, extra_ddl: Iterable[str] = (),
+                  install: Optional[Callable[[object], object]] = None, force: bool = False) -> bool:
+    """Create missing tables (and run `install`) unless the stored fingerprint matches.
+
+    `force` skips the comparison, e.g. for explicit setup scripts. Returns
+    whether the schema was (re)applied.
+    """
+    current = fingerprint(db.metadata, extra_ddl)
+    if not force and stored_fingerprint(db.engine, version_table) == current:
+        return False
+
+    logger.info('Model schema changed, creating missing tables')
+    db.create_all()
+    if install:
+        install(db.engine)
+
+    values = {'fingerprint': current, 'applied_at': datetime.utcnow()}
+    try:
+        with db.engine.begin() as conn:
+            if not conn.execute(version_table.update().where(version_table.c.id == 1).values(**values)).rowcount:
+                conn.execute(version_table.insert().values(id=1, **values))
+    except IntegrityError:
+        pass  # Another process recorded it first
+    return True
@@ -0,0 +1,288 @@
+"""
+Marketplace Search - SQLite FTS5 full-text index over products and artisans
+Triggers keep the index in sync with every write, including bulk inserts
+that bypass ORM events. Other databases fall back to LIKE scans.
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_, text
+
+logger = logging.getLogger(__name__)
+
+# Column weights for bm25(); the order must match the product_search columns
+PRODUCT_SEARCH_WEIGHTS = (10.0, 2.0, 1.0, 5.0, 1.0, 5.0, 4.0, 3.0)
+
+_PRODUCT_COLUMNS = ('name', 'description', 'ai_enriched_description', 'category', 'cultural_significance')
+
+_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS product_search USING fts5(
+        name, description, ai_enriched_description, category, cultural_significance,
+        artisan_name, craft_type, location,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS artisan_search USING fts5(
+        name, craft_type, location,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS product_search_insert AFTER INSERT ON product BEGIN
+        INSERT INTO product_search (rowid, name, description, ai_enriched_description, category,
+                                    cultural_significance, artisan_name, craft_type, location)
+        SELECT new.id, new.name, new.description, new.ai_enriched_description, new.category,
+               new.cultural_significance, a.name, a.craft_type, a.location
+        FROM artisan a WHERE a.id = new.artisan_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS product_search_update
+    AFTER UPDATE OF name, description, ai_enriched_description, category, cultural_significance, artisan_id
+    ON product BEGIN
+        DELETE FROM product_search WHERE rowid = old.id;
+        INSERT INTO product_search (rowid, name, description, ai_enriched_description, category,
+                                    cultural_significance, artisan_name, craft_type, location)
+        SELECT new.id, new.name, new.description, new.ai_enriched_description, new.category,
+               new.cultural_significance, a.name, a.craft_type, a.location
+        FROM artisan a WHERE a.id = new.artisan_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS product_search_delete AFTER DELETE ON product BEGIN
+        DELETE FROM product_search WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS artisan_search_insert AFTER INSERT ON artisan BEGIN
+        INSERT INTO artisan_search (rowid, name, craft_type, location)
+        VALUES (new.id, new.name, new.craft_type, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS artisan_search_update AFTER UPDATE OF name, craft_type, location ON artisan BEGIN
+        DELETE FROM artisan_search WHERE rowid = old.id;
+        INSERT INTO artisan_search (rowid, name, craft_type, location)
+        VALUES (new.id, new.name, new.craft_type, new.location);
+        UPDATE product_search
+        SET artisan_name = new.name, craft_type = new.craft_type, location = new.location
+        WHERE rowid IN (SELECT id FROM product WHERE artisan_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS artisan_search_delete AFTER DELETE ON artisan BEGIN
+        DELETE FROM artisan_search WHERE rowid = old.id;
+    END
+    """,
+]
+
+_REBUILD_SQL = [
+    "DELETE FROM product_search",
+    """
+    INSERT INTO product_search (rowid, name, description, ai_enriched_description, category,
+                                cultural_significance, artisan_name, craft_type, location)
+    SELECT p.id, p.name, p.description, p.ai_enriched_description, p.category,
+           p.cultural_significance, a.name, a.craft_type, a.location
+    FROM product p JOIN artisan a ON a.id = p.artisan_id
+    """,
+    "DELETE FROM artisan_search",
+    """
+    INSERT INTO artisan_search (rowid, name, craft_type, location)
+    SELECT id, name, craft_type, location FROM artisan
+    """,
+]
+
+_TERM_PATTERN = re.compile(r'\w+', re.UNICODE)
+LIKE_ESCAPE = '\\'  # escape character in LIKE patterns built from user input
+_fts_support = {}
+
+
+def fts_available(engine) -> bool:
+    """True when the engine is SQLite with the FTS5 extension compiled in"""
+    key = str(engine.url)
+    if key not in _fts_support:
+        supported = False
+        if engine.dialect.name == 'sqlite':
+            with engine.connect() as conn:
+                options = {row[0] for row in conn.exec_driver_sql('PRAGMA compile_options')}
+            supported = 'ENABLE_FTS5' in options
+        _fts_support[key] = supported
+    return _fts_support[key]
+
+
+def search_index_ddl() -> List[str]:
+    """The FTS DDL, so schema fingerprints change when it does"""
+    return list(_SEARCH_DDL)
+
+
+def install_search_index(engine) -> bool:
+    """Create the FTS tables and sync triggers, building the index on first install"""
+    if not fts_available(engine):
+        logger.warning("SQLite FTS5 not available, search will fall back to LIKE scans")
+        return False
+
+    with engine.begin() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_search'"
+        ).first()
+        for statement in _SEARCH_DDL:
+            conn.exec_driver_sql(statement)
+        if not exists:
+            for statement in _REBUILD_SQL:
+                conn.exec_driver_sql(statement)
+
+    return True
+
+
+def rebuild_search_index(engine):
+    """Repopulate both FTS tables from the source tables"""
+    with engine.begin() as conn:
+        for statement in _REBUILD_SQL:
+            conn.exec_driver_sql(statement)
+
+
+def build_match_query(query: str, prefix: bool = False) -> Optional[str]:
+    """Turn free user input into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted phrase so FTS5 operators in the input are
+    treated as text. With `prefix`, the last word also matches as a prefix.
+    """
+    terms = _TERM_PATTERN.findall(query.lower())
+    if not terms:
+        return None
+
+    phrases = [f'"{term}"' for term in terms]
+    if prefix:
+        phrases[-1] += '*'
+    return ' '.join(phrases)
+
+
+def search_products(query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+    """Rank published products for a query with BM25 and count facets over all matches"""
+    from app import db
+
+    match = build_match_query(query)
+    if match is None:
+        return {'total': 0, 'product_ids': [], 'facets': {'category': [], 'location': []}}
+
+    if not fts_available(db.engine):
+        return like_search_products(query, limit, offset)
+
+    weights = ', '.join(str(weight) for weight in PRODUCT_SEARCH_WEIGHTS)
+    matches = f"""
+        FROM product_search
+        JOIN product p ON p.id = product_search.rowid
+        JOIN artisan a ON a.id = p.artisan_id
+        WHERE product_search MATCH :match AND p.status = 'published'
+    """
+    params = {'match': match, 'limit': limit, 'offset': offset}
+
+    product_ids = db.session.execute(text(f"""
+        SELECT p.id {matches}
+        ORDER BY bm25(product_search, {weights})
+        LIMIT :limit OFFSET :offset
+    """), params).scalars().all()
+
+    category_facets = db.session.execute(text(f"""
+        SELECT p.category, COUNT(*) AS count {matches}
+        GROUP BY p.category ORDER BY count DESC
+    """), params).all()
+
+    location_facets = db.session.execute(text(f"""
+        SELECT a.location, COUNT(*) AS count {matches}
+        GROUP BY a.location ORDER BY count DESC
+    """), params).all()
+
+    return {
+        'total': sum(count for _, count in category_facets),
+        'product_ids': product_ids,
+        'facets': {
+            'category': [{'value': value, 'count': count} for value, count in category_facets],
+            'location': [{'value': value, 'count': count} for value, count in location_facets]
+        }
+    }
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so `value` matches literally; pair with escape=LIKE_ESCAPE"""
+    return value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2).replace('%', LIKE_ESCAPE + '%').replace('_', LIKE_ESCAPE + '_')
+
+
+def like_search_products(query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+    """Unranked LIKE scan over the same columns, used where FTS5 is unavailable"""
+    from app import db, Artisan, Product
+
+    terms = _TERM_PATTERN.findall(query.lower())
+    if not terms:
+        return {'total': 0, 'product_ids': [], 'facets': {'category': [], 'location': []}}
+
+    columns = [getattr(Product, column) for column in _PRODUCT_COLUMNS]
+    columns += [Artisan.name, Artisan.craft_type, Artisan.location]
+    base = db.session.query(Product.id).join(Artisan, Artisan.id == Product.artisan_id).filter(
+        Product.status == 'published',
+        *[or_(*[column.ilike(f'%{escape_like(term)}%', escape=LIKE_ESCAPE) for column in columns])
+          for term in terms]
+    )
+
+    product_ids = [row.id for row in base.order_by(Product.id).limit(limit).offset(offset)]
+    matched = base.subquery()
+
+    category_facets = db.session.query(Product.category, db.func.count()).filter(
+        Product.id.in_(db.select(matched.c.id))
+    ).group_by(Product.category).order_by(db.func.count().desc()).all()
+
+    location_facets = db.session.query(Artisan.location, db.func.count()).join(
+        Product, Product.artisan_id == Artisan.id
+    ).filter(Product.id.in_(db.select(matched.c.id))).group_by(Artisan.location).order_by(
+        db.func.count().desc()
+    ).all()
+
+    return {
+        'total': sum(count for _, count in category_facets),
+        'product_ids': product_ids,
+        'facets': {
+            'category': [{'value': value, 'count': count} for value, count in category_facets],
+            'location': [{'value': value, 'count': count} for value, count in location_facets]
+        }
+    }
+
+
+def autocomplete(query: str, limit: int = 8) -> List[Dict[str, Any]]:
+    """Prefix suggestions drawn from product and artisan names"""
+    from app import db, Artisan, Product
+
+    match = build_match_query(query, prefix=True)
+    if match is None:
+        return []
+
+    if fts_available(db.engine):
+        products = db.session.execute(text("""
+            SELECT p.id, p.name FROM product_search
+            JOIN product p ON p.id = product_search.rowid
+            WHERE product_search MATCH :match AND p.status = 'published'
+            ORDER BY bm25(product_search, 10.0, 0.0, 0.0, 1.0, 0.0, 2.0, 1.0, 1.0)
+            LIMIT :limit
+        """), {'match': match, 'limit': limit}).all()
+
+        artisans = db.session.execute(text("""
+            SELECT rowid, name FROM artisan_search
+            WHERE artisan_search MATCH :match
+            ORDER BY bm25(artisan_search, 10.0, 3.0, 2.0)
+            LIMIT :limit
+        """), {'match': match, 'limit': limit}).all()
+    else:
+        pattern = f"{escape_like(query.strip())}%"
+        products = db.session.query(Product.id, Product.name).filter(
+            Product.status == 'published', Product.name.ilike(pattern, escape=LIKE_ESCAPE)
+        ).limit(limit).all()
+        artisans = db.session.query(Artisan.id, Artisan.name).filter(
+            Artisan.name.ilike(pattern, escape=LIKE_ESCAPE)
+        ).limit(limit).all()
+
+    suggestions = [{'type': 'artisan', 'id': row[0], 'text': row[1]} for row in artisans]
+    suggestions += [{'type': 'product', 'id': row[0], 'text': row[1]} for row in products]
+    return suggestions[:limit]
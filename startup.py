@@ -0,0 +1,38 @@
+"""
+Startup Timing - Where a cold start spends its time
+app.py marks the end of each startup phase (imports, models, routes, schema);
+the durations are logged once the app is created and exported at /metrics.
+benchmarks/cold_start.py adds the per-package -X importtime breakdown.
+"""
+
+import logging
+import time
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+_started = time.perf_counter()  # first import of this module, at the top of app.py
+_last = _started
+_phases: Dict[str, float] = {}
+
+
+def mark(phase: str):
+    """Record the time since the previous mark as `phase`"""
+    global _last
+    now = time.perf_counter()
+    _phases[phase] = _phases.get(phase, 0.0) + now - _last
+    _last = now
+
+
+def phases() -> Dict[str, float]:
+    """Seconds per phase, in the order they ran"""
+    return dict(_phases)
+
+
+def total() -> float:
+    return sum(_phases.values())
+
+
+def log_report():
+    logger.info('Startup took %.0f ms (%s)', total() * 1000,
+                ', '.join(f'{phase} {seconds * 1000:.0f} ms' for phase, seconds in _phases.items()))
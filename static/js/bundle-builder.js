@@ -1,4 +1,6 @@
 // Bundle Builder Canvas - AI-Suggested Product Combinations
+const BUNDLE_BUDGET = 10000;  // upper bound for suggested bundle totals
+
 class BundleBuilder {
     constructor() {
         this.selectedProducts = [];
@@ -14,6 +16,8 @@ class BundleBuilder {
             occasion: ''
         };
         this.aiSuggestions = [];
+        this.availableProducts = [];
+        this.suggestionRequest = null;
         this.draggedProduct = null;
         
         this.init();
@@ -28,71 +32,27 @@ class BundleBuilder {
     }
     
     loadAvailableProducts() {
-        // Mock product data - in real app, load from backend
-        this.availableProducts = [
-            {
-                id: 101,
-                name: "Handcrafted Water Pot",
-                price: 1200,
-                category: "pottery",
-                artisan: "Priya Sharma",
-                image: "https://images.unsplash.com/photo-1578662996442-48f60103fc96?w=300&h=300&fit=crop",
-                tags: ["traditional", "functional", "ceramic"],
-                compatibility: ["pottery", "textiles", "woodwork"]
-            },
-            {
-                id: 102,
-                name: "Decorative Vase Set",
-                price: 2500,
-                category: "pottery",
-                artisan: "Priya Sharma",
-                image: "https://images.unsplash.com/photo-1610701596007-11502861dcfa?w=300&h=300&fit=crop",
-                tags: ["decorative", "ceramic", "set"],
-                compatibility: ["pottery", "textiles"]
-            },
-            {
-                id: 201,
-                name: "Carved Wooden Box",
-                price: 3500,
-                category: "woodwork",
-                artisan: "Ravi Kumar",
-                image: "https://images.unsplash.com/photo-1586023492125-27b2c045efd7?w=300&h=300&fit=crop",
-                tags: ["storage", "carved", "teak"],
-                compatibility: ["woodwork", "textiles", "jewelry"]
-            },
-            {
-                id: 301,
-                name: "Embroidered Dupatta",
-                price: 1800,
-                category: "textiles",
-                artisan: "Meera Devi",
-                image: "https://images.unsplash.com/photo-1610030469983-98e550d6193c?w=300&h=300&fit=crop",
-                tags: ["clothing", "embroidered", "silk"],
-                compatibility: ["textiles", "jewelry"]
-            },
-            {
-                id: 401,
-                name: "Silver Bangles Set",
-                price: 4200,
-                category: "jewelry",
-                artisan: "Lakshmi Bai",
-                image: "https://images.unsplash.com/photo-1515562141207-7a88fb7ce338?w=300&h=300&fit=crop",
-                tags: ["silver", "traditional", "set"],
-                compatibility: ["jewelry", "textiles"]
-            },
-            {
-                id: 501,
-                name: "Brass Lamp",
-                price: 2800,
-                category: "metalwork",
-                artisan: "Suresh Patel",
-                image: "https://images.unsplash.com/photo-1513475382585-d06e58bcb0e0?w=300&h=300&fit=crop",
-                tags: ["brass", "lighting", "traditional"],
-                compatibility: ["metalwork", "pottery", "woodwork"]
+        // Published catalog, most relevant to the current theme first
+        $.getJSON('/api/bundle/products', { theme: this.currentBundle.theme || 'complementary', limit: 24 })
+            .done((response) => {
+                this.availableProducts = response.products || [];
+                this.renderProductGrid();
+                this.renderAISuggestions();
+            })
+            .fail((xhr) => {
+                console.error('Failed to load products:', xhr);
+                this.availableProducts = [];
+                this.renderProductGrid();
+            });
+    }
+    
+    mergeProducts(products) {
+        // Suggestions can reference products beyond the loaded grid
+        products.forEach(product => {
+            if (!this.availableProducts.some(p => p.id === product.id)) {
+                this.availableProducts.push(product);
             }
-        ];
-        
-        this.renderProductGrid();
+        });
     }
     
     renderProductGrid() {
@@ -313,101 +273,34 @@ class BundleBuilder {
     }
     
     generateAISuggestions() {
-        // AI-powered suggestions based on current bundle
-        this.aiSuggestions = [];
-        
-        if (this.currentBundle.products.length === 0) {
-            // Suggest popular starter bundles
-            this.aiSuggestions = [
-                {
-                    title: "Traditional Home Decor",
-                    description: "Perfect for decorating your living space with authentic crafts",
-                    products: [101, 102, 501], // Water pot, vase set, brass lamp
-                    reason: "These items complement each other beautifully and create a cohesive traditional aesthetic",
-                    confidence: 0.92
-                },
-                {
-                    title: "Wedding Gift Collection",
-                    description: "Thoughtful gifts for newlyweds",
-                    products: [201, 301, 401], // Wooden box, dupatta, bangles
-                    reason: "Traditional wedding essentials that represent good fortune and prosperity",
-                    confidence: 0.88
-                },
-                {
-                    title: "Artisan Sampler",
-                    description: "Experience crafts from different regions",
-                    products: [101, 201, 301], // One from each major artisan
-                    reason: "Diverse collection showcasing various traditional Indian crafts",
-                    confidence: 0.85
-                }
-            ];
-        } else {
-            // Suggest complementary products
-            const currentCategories = this.currentBundle.products.map(p => p.category);
-            const availableProducts = this.availableProducts.filter(p => 
-                !this.currentBundle.products.some(bp => bp.id === p.id)
-            );
-            
-            // Find compatible products
-            const compatibleProducts = availableProducts.filter(product => {
-                return this.currentBundle.products.some(bundleProduct => 
-                    bundleProduct.compatibility.includes(product.category) ||
-                    product.compatibility.includes(bundleProduct.category)
-                );
-            });
-            
-            if (compatibleProducts.length > 0) {
-                // Create suggestions based on themes
-                const themes = ['traditional', 'modern', 'festive', 'minimalist'];
-                
-                themes.forEach(theme => {
-                    const themeProducts = compatibleProducts.filter(p => 
-                        p.tags.includes(theme) || this.getThemeCompatibility(p, theme) > 0.7
-                    ).slice(0, 2);
-                    
-                    if (themeProducts.length > 0) {
-                        this.aiSuggestions.push({
-                            title: `${theme.charAt(0).toUpperCase() + theme.slice(1)} Enhancement`,
-                            description: `Add ${theme} elements to your bundle`,
-                            products: themeProducts.map(p => p.id),
-                            reason: `These items enhance the ${theme} aesthetic of your current selection`,
-                            confidence: 0.75 + (themeProducts.length * 0.1)
-                        });
-                    }
-                });
-            }
-            
-            // Price-based suggestions
-            const budgetRemaining = 10000 - this.currentBundle.totalPrice; // Assume 10k budget
-            if (budgetRemaining > 0) {
-                const affordableProducts = availableProducts.filter(p => p.price <= budgetRemaining);
-                if (affordableProducts.length > 0) {
-                    const bestValue = affordableProducts.sort((a, b) => b.price - a.price).slice(0, 2);
-                    this.aiSuggestions.push({
-                        title: "Best Value Addition",
-                        description: "Maximize your bundle value within budget",
-                        products: bestValue.map(p => p.id),
-                        reason: "These items offer the best value for your remaining budget",
-                        confidence: 0.80
-                    });
-                }
-            }
+        // Scored server-side against the whole catalog; only the latest request matters
+        if (this.suggestionRequest) {
+            this.suggestionRequest.abort();
         }
         
-        this.renderAISuggestions();
-    }
-    
-    getThemeCompatibility(product, theme) {
-        const themeKeywords = {
-            traditional: ['traditional', 'heritage', 'classic', 'ethnic'],
-            modern: ['modern', 'contemporary', 'sleek', 'minimalist'],
-            festive: ['festive', 'celebration', 'decorative', 'ornate'],
-            minimalist: ['simple', 'clean', 'minimal', 'elegant']
-        };
-        
-        const keywords = themeKeywords[theme] || [];
-        const matches = product.tags.filter(tag => keywords.includes(tag)).length;
-        return matches / keywords.length;
+        this.suggestionRequest = $.ajax({
+            url: '/api/generate/product-bundles',
+            method: 'POST',
+            contentType: 'application/json',
+            data: JSON.stringify({
+                products: this.currentBundle.products.map(p => p.id),
+                theme: this.currentBundle.theme || 'complementary',
+                size: Math.max(3, this.currentBundle.products.length + 1),
+                max_price: BUNDLE_BUDGET,
+                limit: 3
+            }),
+            success: (response) => {
+                this.aiSuggestions = response.bundles || [];
+                this.aiSuggestions.forEach(suggestion => this.mergeProducts(suggestion.product_details || []));
+                this.renderAISuggestions();
+            },
+            error: (xhr, status) => {
+                if (status === 'abort') return;
+                console.error('Failed to load bundle suggestions:', xhr);
+                this.aiSuggestions = [];
+                this.renderAISuggestions();
+            }
+        });
     }
     
     renderAISuggestions() {
@@ -474,6 +367,7 @@ class BundleBuilder {
         $(`.theme-btn[data-theme="${theme}"]`).addClass('active');
         this.calculateBundlePrice();
         this.updateBundleDisplay();
+        this.loadAvailableProducts();
         this.generateAISuggestions();
     }
     
@@ -420,9 +420,78 @@ $.ajaxSetup({
     }
 });
 
+// Stream generated text from a POST endpoint that answers with Server-Sent Events.
+// handlers.onChunk(text) runs per chunk, handlers.onDone(payload) with the final
+// payload, handlers.onError(message) on failure. Returns an AbortController.
+function streamGeneration(url, payload, handlers = {}) {
+    const controller = new AbortController();
+    const headers = { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' };
+    const csrfToken = $('meta[name=csrf-token]').attr('content');
+    if (csrfToken) {
+        headers['X-CSRFToken'] = csrfToken;
+    }
+    
+    function dispatchEvent(block) {
+        let event = 'message';
+        let data = '';
+        block.split('\n').forEach(line => {
+            if (line.startsWith('event:')) {
+                event = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                data += line.slice(5).trim();
+            }
+        });
+        if (!data) {
+            return;
+        }
+        
+        const message = JSON.parse(data);
+        if (event === 'chunk' && handlers.onChunk) {
+            handlers.onChunk(message.text);
+        } else if (event === 'done' && handlers.onDone) {
+            handlers.onDone(message);
+        } else if (event === 'error' && handlers.onError) {
+            handlers.onError(message.error);
+        }
+    }
+    
+    fetch(url, {
+        method: 'POST',
+        headers,
+        body: JSON.stringify(payload),
+        signal: controller.signal
+    }).then(async response => {
+        if (!response.ok || !response.headers.get('Content-Type').startsWith('text/event-stream')) {
+            const body = await response.json().catch(() => ({}));
+            throw new Error(body.error || `Request failed (${response.status})`);
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            const blocks = buffer.split('\n\n');
+            buffer = blocks.pop();
+            blocks.forEach(dispatchEvent);
+        }
+    }).catch(error => {
+        if (error.name !== 'AbortError' && handlers.onError) {
+            handlers.onError(error.message);
+        }
+    });
+    
+    return controller;
+}
+
 // Export functions for use in other scripts
 window.PersonaApp = {
     showAlert,
+    streamGeneration,
     showLoginModal,
     showRegisterModal,
     animateCounter,
@@ -7,6 +7,8 @@ class StoryScroll {
         this.touchStartY = 0;
         this.touchEndY = 0;
         this.autoScrollTimer = null;
+        this.nextCursor = null;
+        this.isLoadingMore = false;
         this.filters = {
             craft: 'all',
             era: 'all',
@@ -42,6 +44,7 @@ class StoryScroll {
         // Get stories from DOM instead of mock data
         const storyCards = document.querySelectorAll('.story-card');
         this.stories = [];
+        this.nextCursor = document.querySelector('.story-scroll-container').dataset.nextCursor || null;
         
         if (storyCards.length === 0) {
             console.warn('No story cards found in DOM');
@@ -73,6 +76,133 @@ class StoryScroll {
         this.renderStories();
     }
     
+    async loadMoreStories() {
+        // Fetch the next keyset page of the marketplace feed and append its cards
+        if (!this.nextCursor || this.isLoadingMore) return;
+        
+        this.isLoadingMore = true;
+        try {
+            const response = await fetch(`/api/marketplace/feed?cursor=${encodeURIComponent(this.nextCursor)}`);
+            const data = await response.json();
+            
+            if (!data.success) {
+                throw new Error(data.message);
+            }
+            
+            const container = document.querySelector('.story-scroll-container');
+            data.artisans.forEach((artisan) => {
+                const card = this.buildStoryCard(artisan, this.stories.length);
+                container.appendChild(card);
+                
+                this.stories.push({
+                    id: this.stories.length + 1,
+                    element: card,
+                    artisan: {
+                        name: artisan.name,
+                        craft: `${artisan.craft_type} • ${artisan.location}`
+                    },
+                    story: {
+                        title: 'Artisan Story',
+                        content: artisan.bio || ''
+                    }
+                });
+            });
+            
+            this.nextCursor = data.next_cursor;
+            this.updateProgressIndicator();
+        } catch (error) {
+            console.error('Failed to load more stories:', error);
+        } finally {
+            this.isLoadingMore = false;
+        }
+    }
+    
+    buildStoryCard(artisan, index) {
+        // Mirrors the story card markup rendered by marketplace.html
+        const escape = (value) => String(value ?? '').replace(/[&<>"']/g, (c) => ({
+            '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+        }[c]));
+        const randomCount = (min, max) => Math.floor(min + Math.random() * (max - min));
+        
+        const products = artisan.products.map((product) => `
+            <div class="product-card-mini" data-product-id="${product.id}">
+                <img src="${escape(product.image || 'https://images.unsplash.com/photo-1578662996442-48f60103fc96?w=300&h=300&fit=crop')}" 
+                     alt="${escape(product.name || 'Product')}" class="product-image" loading="lazy">
+                <div class="product-info">
+                    <h6 class="product-name">${escape(product.name || 'Handcrafted Item')}</h6>
+                    <p class="product-price">₹${Math.trunc(product.price || 1000).toLocaleString('en-US')}</p>
+                    <button class="btn btn-primary btn-sm add-to-bundle-btn">
+                        <i class="fas fa-plus me-1"></i>Add to Bundle
+                    </button>
+                </div>
+            </div>`).join('');
+        
+        const card = document.createElement('div');
+        card.className = 'story-card';
+        card.dataset.storyIndex = index;
+        card.innerHTML = `
+            <div class="story-header">
+                <div class="artisan-info">
+                    <img src="https://images.unsplash.com/photo-1494790108755-2616b612b786?w=150&h=150&fit=crop&crop=face" 
+                         alt="${escape(artisan.name || 'Artisan')}" class="artisan-avatar" loading="lazy">
+                    <div class="artisan-details">
+                        <h4 class="artisan-name">${escape(artisan.name || 'Anonymous Artisan')}</h4>
+                        <p class="artisan-craft">${escape(artisan.craft_type || 'Craftsperson')} • ${escape(artisan.location || 'India')}</p>
+                    </div>
+                </div>
+                <div class="story-actions">
+                    <button class="btn-icon follow-btn" data-artisan-id="${artisan.id}">
+                        <i class="fas fa-user-plus"></i>
+                    </button>
+                    <button class="btn-icon share-btn" data-story-id="${artisan.id}">
+                        <i class="fas fa-share"></i>
+                    </button>
+                </div>
+            </div>
+            
+            <div class="story-content">
+                <h3 class="story-title">Artisan Story</h3>
+                <p class="story-text">${escape(artisan.bio || 'Passionate artisan creating beautiful handcrafted pieces with traditional techniques passed down through generations.')}</p>
+                <div class="cultural-context">
+                    <i class="fas fa-info-circle me-2"></i>
+                    <span>Traditional ${escape(artisan.craft_type || 'Craft')} from ${escape(artisan.location || 'India')}</span>
+                </div>
+            </div>
+            
+            <div class="story-products">
+                <h5 class="products-title">Featured Creations</h5>
+                <div class="products-grid">${products}</div>
+            </div>
+            
+            <div class="story-stats">
+                <div class="stat-item">
+                    <button class="btn-icon like-btn" data-story-id="${artisan.id}">
+                        <i class="far fa-heart"></i>
+                    </button>
+                    <span class="stat-count">${artisan.likes ?? 0}</span>
+                </div>
+                <div class="stat-item">
+                    <i class="fas fa-eye"></i>
+                    <span class="stat-count">${randomCount(100, 2000)}</span>
+                </div>
+                <div class="stat-item">
+                    <i class="fas fa-shopping-bag"></i>
+                    <span class="stat-count">${randomCount(5, 100)} sold</span>
+                </div>
+            </div>
+            
+            <div class="story-footer">
+                <button class="btn btn-outline-primary chat-btn" data-artisan-id="${artisan.id}">
+                    <i class="fas fa-comments me-2"></i>Chat with ${escape(artisan.name || 'Artisan')}
+                </button>
+                <button class="btn btn-primary view-profile-btn" data-artisan-id="${artisan.id}">
+                    <i class="fas fa-user me-2"></i>View Profile
+                </button>
+            </div>`;
+        
+        return card;
+    }
+    
     renderStories() {
         // Stories are already rendered by Flask template
         // Just ensure the first one is active
@@ -213,6 +343,15 @@ class StoryScroll {
     nextStory() {
         if (this.isScrolling) return;
         
+        // At the end of the loaded stories, pull the next page before advancing
+        if (this.currentStoryIndex === this.stories.length - 1 && this.nextCursor) {
+            const loadedCount = this.stories.length;
+            this.loadMoreStories().then(() => {
+                if (this.stories.length > loadedCount) this.nextStory();
+            });
+            return;
+        }
+        
         this.isScrolling = true;
         this.currentStoryIndex = (this.currentStoryIndex + 1) % this.stories.length;
         this.showStory(this.currentStoryIndex);
@@ -247,12 +386,18 @@ class StoryScroll {
         
         // Update progress indicator
         this.updateProgressIndicator();
+        
+        // Prefetch the next page while the user is still reading
+        if (index >= this.stories.length - 2) {
+            this.loadMoreStories();
+        }
     }
     
     updateProgressIndicator() {
         const progress = ((this.currentStoryIndex + 1) / this.stories.length) * 100;
         document.querySelector('.story-progress-bar').style.width = `${progress}%`;
-        document.querySelector('.story-counter').textContent = `${this.currentStoryIndex + 1} / ${this.stories.length}`;
+        const total = this.nextCursor ? `${this.stories.length}+` : this.stories.length;
+        document.querySelector('.story-counter').textContent = `${this.currentStoryIndex + 1} / ${total}`;
     }
     
     startAutoScroll() {
@@ -395,6 +540,14 @@ class StoryScroll {
                 liked: isLiked
             })
         })
+        .then((response) => response.ok ? response.json() : null)
+        .then((data) => {
+            // Reconcile the optimistic count with the server's aggregate
+            const button = document.querySelector(`.story-card .like-btn[data-story-id="${storyId}"]`);
+            if (data && data.success && button) {
+                button.parentNode.querySelector('.stat-count').textContent = data.likes;
+            }
+        })
         .catch((error) => console.error('Failed to update story like:', error));
     }
     
@@ -0,0 +1,59 @@
+"""
+Streaming Responses - Server-Sent Events for generated text
+Generate endpoints can answer with a text/event-stream instead of one JSON
+body: a `chunk` event per piece of text as the model produces it, then a
+`done` event carrying the same payload the JSON response would have had.
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from flask import Response, request, stream_with_context
+
+logger = logging.getLogger(__name__)
+
+
+def wants_stream() -> bool:
+    """Whether the client asked for SSE, via ?stream=1 or an Accept header"""
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Format one SSE message; the JSON payload always fits on a single data line"""
+    message = f'event: {event}\n' if event else ''
+    return f'{message}data: {json.dumps(data)}\n\n'
+
+
+def stream_generation(chunks: Iterable[str], field: str, extra: Optional[Dict[str, Any]] = None,
+                      finish: Optional[Callable[[str], str]] = None) -> Response:
+    """Stream text chunks as SSE, ending with a `done` event holding {field: full text, **extra}.
+
+    `finish` post-processes the joined text for the done event. An error while
+    streaming ends the stream with an `error` event instead. If the client
+    goes away first, `chunks` is closed so the upstream stream is cancelled.
+    """
+    def events():
+        parts = []
+        try:
+            for text in chunks:
+                parts.append(text)
+                yield sse_event({'text': text}, 'chunk')
+        except Exception as e:
+            logger.error(f"Streaming generation failed after {len(parts)} chunks: {e}")
+            yield sse_event({'success': False, 'error': str(e)}, 'error')
+            return
+        finally:
+            # Not left to garbage collection: an open upstream stream holds a concurrency slot
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+        text = ''.join(parts)
+        yield sse_event({'success': True, field: finish(text) if finish else text, **(extra or {})}, 'done')
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # keep nginx from buffering the stream
+    })
@@ -0,0 +1,113 @@
+"""
+Synthetic Data - Deterministic marketplace dataset for load tests and benchmarks
+Seeds artisan users, artisans, personas and products in bulk INSERTs, from a
+fixed random seed, so runs at the same scale are comparable between commits.
+"""
+
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Dict
+
+from werkzeug.security import generate_password_hash
+
+from persona_templates import render_bio
+from product_import import chunked
+
+logger = logging.getLogger(__name__)
+
+USERNAME_PREFIX = 'synthetic_'
+SYNTHETIC_PASSWORD = 'synthetic123'
+INSERT_BATCH_SIZE = 5000
+
+FIRST_NAMES = ['Maya', 'Arjun', 'Lakshmi', 'Ravi', 'Meera', 'Kabir', 'Anita', 'Suresh', 'Farah', 'Gopal',
+               'Kavya', 'Imran', 'Deepa', 'Harish', 'Nisha', 'Vikram']
+LAST_NAMES = ['Sharma', 'Patel', 'Iyer', 'Khan', 'Das', 'Reddy', 'Bhatt', 'Menon', 'Singh', 'Gupta']
+CRAFTS = ['Pottery', 'Textiles', 'Jewelry', 'Woodwork', 'Metalwork', 'Painting', 'Leather', 'Glass']
+LOCATIONS = ['Jaipur, Rajasthan', 'Varanasi, Uttar Pradesh', 'Kutch, Gujarat', 'Channapatna, Karnataka',
+             'Moradabad, Uttar Pradesh', 'Madhubani, Bihar', 'Kolhapur, Maharashtra', 'Firozabad, Uttar Pradesh']
+TONES = ['friendly', 'formal', 'poetic', 'warm']
+STYLES = ['traditional', 'modern', 'artistic']
+WORDS = ('handwoven indigo terracotta brass carved lacquered embroidered block printed silk cotton teak clay '
+         'glazed filigree silver mirror-work heritage festival wedding village river lamp bowl vase shawl '
+         'box diya tray').split()
+PRODUCT_STATUSES = ['published'] * 17 + ['draft'] * 2 + ['sold_out']
+
+
+def is_seeded() -> bool:
+    from app import db, User
+
+    return db.session.scalar(db.select(User.id).where(User.username.startswith(USERNAME_PREFIX)).limit(1)) is not None
+
+
+def seed(artisans: int, products: int, seed: int = 7) -> Dict[str, int]:
+    """Insert `artisans` artisans (each with a user and persona) and `products` products.
+
+    Skips seeding if a synthetic dataset is already present. Returns the row
+    counts inserted.
+    """
+    from app import db, User, Artisan, Persona, Product
+
+    if is_seeded():
+        logger.info('Synthetic dataset already present, skipping')
+        return {'artisans': 0, 'products': 0}
+
+    artisans = max(artisans, 1 if products else 0)
+    rng = random.Random(seed)
+    # One hash for every synthetic account; hashing per user would dominate seeding time
+    password_hash = generate_password_hash(SYNTHETIC_PASSWORD)
+    now = datetime.utcnow()
+
+    users = [{
+        'username': f'{USERNAME_PREFIX}{i}',
+        'email': f'{USERNAME_PREFIX}{i}@example.com',
+        'password_hash': password_hash,
+        'user_type': 'artisan',
+        'created_at': now
+    } for i in range(artisans)]
+    user_ids = []
+    for batch in chunked(users, INSERT_BATCH_SIZE):
+        user_ids += db.session.scalars(db.insert(User).returning(User.id), batch).all()
+
+    artisan_rows, persona_rows = [], []
+    for i, user_id in enumerate(user_ids):
+        artisan_data = {
+            'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'craft_type': rng.choice(CRAFTS),
+            'location': rng.choice(LOCATIONS)
+        }
+        persona_data = {'tone': rng.choice(TONES), 'style': rng.choice(STYLES),
+                        'storytelling_depth': rng.randint(1, 10), 'language_preference': 'en'}
+        bio = render_bio(artisan_data, persona_data)
+        artisan_rows.append({**artisan_data, 'user_id': user_id, 'bio': bio,
+                             'created_at': now - timedelta(minutes=i)})
+        persona_rows.append({**persona_data, 'generated_bio': bio, 'communication_style': 'conversational'})
+
+    artisan_ids = []
+    for batch in chunked(artisan_rows, INSERT_BATCH_SIZE):
+        artisan_ids += db.session.scalars(db.insert(Artisan).returning(Artisan.id), batch).all()
+    for row, artisan_id in zip(persona_rows, artisan_ids):
+        row['artisan_id'] = artisan_id
+    for batch in chunked(persona_rows, INSERT_BATCH_SIZE):
+        db.session.execute(db.insert(Persona), batch)
+
+    crafts = {artisan_id: row['craft_type'] for artisan_id, row in zip(artisan_ids, artisan_rows)}
+    product_rows = []
+    for i in range(products):
+        artisan_id = rng.choice(artisan_ids)
+        words = rng.sample(WORDS, 3)
+        product_rows.append({
+            'artisan_id': artisan_id,
+            'name': ' '.join(words).title(),
+            'description': ' '.join(rng.choices(WORDS, k=14)).capitalize() + '.',
+            'price': float(rng.randint(200, 12000)),
+            'stock_quantity': rng.randint(0, 20),
+            'category': crafts[artisan_id],
+            'status': rng.choice(PRODUCT_STATUSES),
+            'created_at': now - timedelta(minutes=i)
+        })
+    for batch in chunked(product_rows, INSERT_BATCH_SIZE):
+        db.session.execute(db.insert(Product), batch)
+
+    db.session.commit()
+    return {'artisans': len(artisan_ids), 'products': len(product_rows)}
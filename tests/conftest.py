@@ -0,0 +1,118 @@
+"""
+Shared test fixtures - the app against a throwaway SQLite database, seeded
+once per session with the sample admin, artisan and products from init_db().
+Tests add their own rows with unique names instead of resetting the database.
+"""
+
+import itertools
+import os
+import tempfile
+
+# config.Config reads these when app is imported below
+_db_dir = tempfile.mkdtemp(prefix='persona-test-')
+os.environ['PERSONA_DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ['JOB_QUEUE_MODE'] = 'eager'  # background jobs run inline, so tests can assert on their results
+os.environ['LLM_CACHE_PATH'] = ''  # memory tier only; nothing shared with other runs
+
+import pytest  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+import app as application  # noqa: E402
+
+_unique = itertools.count(1)
+
+
+@pytest.fixture(scope='session')
+def app():
+    application.init_db()
+    application.app.config['TESTING'] = True
+    return application.app
+
+
+@pytest.fixture
+def db(app):
+    """The Flask-SQLAlchemy handle, inside an app context"""
+    with app.app_context():
+        yield application.db
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope='session')
+def sample_artisan(app):
+    """(user id, artisan id) of the seeded sample artisan"""
+    with app.app_context():
+        artisan = application.Artisan.query.order_by(application.Artisan.id).first()
+        return artisan.user_id, artisan.id
+
+
+@pytest.fixture
+def signed_in(app):
+    """Factory for test clients signed in as the given user id"""
+    def make(user_id):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+        return client
+    return make
+
+
+@pytest.fixture
+def artisan_client(signed_in, sample_artisan):
+    """A test client signed in as the sample artisan"""
+    return signed_in(sample_artisan[0])
+
+
+@pytest.fixture
+def make_product(app, sample_artisan):
+    """Factory for products of the sample artisan; returns the new product's id"""
+    def make(**fields):
+        n = next(_unique)
+        values = {'name': f'Test Product {n}', 'description': 'Wheel-thrown stoneware', 'price': 100.0,
+                  'stock_quantity': 5, 'category': 'Pottery', 'status': 'published',
+                  'artisan_id': sample_artisan[1], **fields}
+        with app.app_context():
+            product = application.Product(**values)
+            application.db.session.add(product)
+            application.db.session.commit()
+            return product.id
+    return make
+
+
+@pytest.fixture
+def make_artisan(app):
+    """Factory for artisan accounts with a profile; returns the new artisan's id"""
+    password_hash = generate_password_hash('artisan123')
+
+    def make(**fields):
+        n = next(_unique)
+        with app.app_context():
+            user = application.User(username=f'test_artisan_{n}', email=f'artisan_{n}@example.com',
+                                    password_hash=password_hash, user_type='artisan')
+            application.db.session.add(user)
+            application.db.session.flush()
+            artisan = application.Artisan(user_id=user.id, **{'name': f'Test Artisan {n}', 'craft_type': 'Pottery',
+                                                              'location': 'Jaipur, Rajasthan', **fields})
+            application.db.session.add(artisan)
+            application.db.session.commit()
+            return artisan.id
+    return make
+
+
+@pytest.fixture
+def make_customer(app):
+    """Factory for customer accounts; returns the new user's id"""
+    password_hash = generate_password_hash('customer123')
+
+    def make():
+        n = next(_unique)
+        with app.app_context():
+            user = application.User(username=f'test_customer_{n}', email=f'customer_{n}@example.com',
+                                    password_hash=password_hash, user_type='customer')
+            application.db.session.add(user)
+            application.db.session.commit()
+            return user.id
+    return make
@@ -0,0 +1,100 @@
+import pytest
+
+import artisan_stats
+
+
+def stored(db, artisan_id):
+    from app import ArtisanStats
+
+    db.session.expire_all()
+    row = db.session.get(ArtisanStats, artisan_id)
+    return None if row is None else {key: getattr(row, key) for key in artisan_stats.COUNTERS}
+
+
+def assert_current(db, artisan_id):
+    """The summary row holds what a fresh GROUP BY computes"""
+    expected = artisan_stats.compute(db.session.connection(), [artisan_id])[artisan_id]
+    assert stored(db, artisan_id) == pytest.approx(expected)
+
+
+def test_product_writes_keep_the_row_current(db, make_artisan, make_product):
+    from app import Product
+
+    artisan_id = make_artisan()
+    first = make_product(artisan_id=artisan_id, price=250.0, stock_quantity=4)
+    make_product(artisan_id=artisan_id, status='draft', price=80.0)
+    assert_current(db, artisan_id)
+
+    product = db.session.get(Product, first)
+    product.status, product.price, product.stock_quantity = 'sold_out', 275.5, 0
+    db.session.commit()
+    assert_current(db, artisan_id)
+
+    db.session.delete(db.session.get(Product, first))
+    db.session.commit()
+    assert_current(db, artisan_id)
+    assert stored(db, artisan_id)['product_count'] == 1
+
+
+def test_moving_a_product_moves_its_counters(db, make_artisan, make_product):
+    from app import Product
+
+    source, target = make_artisan(), make_artisan()
+    product_id = make_product(artisan_id=source, price=120.0, stock_quantity=3)
+    make_product(artisan_id=target)
+
+    db.session.get(Product, product_id).artisan_id = target
+    db.session.commit()
+
+    assert_current(db, source)
+    assert_current(db, target)
+    assert (stored(db, source)['product_count'], stored(db, target)['product_count']) == (0, 2)
+
+
+def test_orders_add_units_and_revenue(db, signed_in, make_customer, make_artisan, make_product):
+    artisan_id = make_artisan()
+    vase = make_product(artisan_id=artisan_id, price=300.0, stock_quantity=2)
+    bowl = make_product(artisan_id=artisan_id, price=45.0, stock_quantity=10)
+    buyer = signed_in(make_customer())
+
+    response = buyer.post('/api/orders/checkout', json={'items': [
+        {'product_id': vase, 'quantity': 2}, {'product_id': bowl, 'quantity': 3}
+    ]})
+
+    assert response.status_code == 200
+    assert_current(db, artisan_id)
+    assert stored(db, artisan_id)['units_sold'] == 5
+    assert stored(db, artisan_id)['sold_out_count'] == 1
+
+
+def test_reading_stats_does_not_build_the_row(db, make_artisan, make_product):
+    from app import ArtisanStats
+
+    artisan_id = make_artisan()
+    make_product(artisan_id=artisan_id, price=60.0)
+    db.session.execute(db.delete(ArtisanStats).where(ArtisanStats.artisan_id == artisan_id))
+    db.session.commit()
+
+    stats = artisan_stats.get_stats(artisan_id)
+
+    assert (stats['product_count'], stats['total_value']) == (1, 60.0)
+    assert not db.session.new and not db.session.dirty
+    db.session.rollback()
+    assert stored(db, artisan_id) is None
+
+
+def test_backfill_builds_missing_rows_only(db, make_artisan, make_product):
+    from app import ArtisanStats
+
+    missing, present = make_artisan(), make_artisan()
+    make_product(artisan_id=missing, price=70.0)
+    make_product(artisan_id=present, price=90.0)
+    db.session.execute(db.delete(ArtisanStats).where(ArtisanStats.artisan_id == missing))
+    db.session.execute(db.update(ArtisanStats).where(ArtisanStats.artisan_id == present).values(units_sold=99))
+    db.session.commit()
+
+    assert artisan_stats.backfill(db.session.connection()) >= 1  # other tests may leave artisans without rows
+    db.session.commit()
+
+    assert_current(db, missing)
+    assert stored(db, present)['units_sold'] == 99  # left alone, even though it disagrees with GROUP BY
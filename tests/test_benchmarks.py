@@ -0,0 +1,22 @@
+import json
+import os
+import subprocess
+import sys
+
+SUITE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'suite.py')
+
+
+def test_suite_runs_every_scenario_against_a_small_synthetic_dataset(tmp_path):
+    output = tmp_path / 'results.json'
+
+    run = subprocess.run([sys.executable, SUITE, '--scale', '20', '--requests', '3', '--concurrency', '2',
+                          '--ai-latency', '0', '--output', str(output)],
+                         capture_output=True, text=True, timeout=120)
+
+    assert run.returncode == 0, run.stderr
+    results = json.loads(output.read_text())
+    assert results['meta']['scale'] == 20
+    assert {'marketplace', 'persona_preview', 'product_create', 'generate_bio'} <= set(results['scenarios'])
+    for name, stats in results['scenarios'].items():
+        assert (stats['requests'], stats['errors']) == (3, 0), name
+        assert stats['queries_max'] is not None, name  # the Server-Timing header reached the client
@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+import checkout
+
+
+def stock_of(db, product_id):
+    from app import Product
+
+    db.session.expire_all()
+    product = db.session.get(Product, product_id)
+    return product.stock_quantity, product.status
+
+
+def test_parse_cart_merges_repeated_products():
+    cart = checkout.parse_cart([{'product_id': 3, 'quantity': 2}, {'product_id': '3'}, {'product_id': 1}], 10, 5)
+
+    assert cart == {3: 3, 1: 1}
+
+
+@pytest.mark.parametrize('items', [[], None, [{'quantity': 1}], [{'product_id': 1, 'quantity': 0}],
+                                   [{'product_id': 1, 'quantity': 'two'}], [{'product_id': 1, 'quantity': 6}]])
+def test_parse_cart_rejects_bad_lines(items):
+    with pytest.raises(checkout.CheckoutError):
+        checkout.parse_cart(items, 10, 5)
+
+
+def test_checkout_takes_stock_and_records_the_order(db, signed_in, make_customer, make_product):
+    product_id = make_product(stock_quantity=3, price=250.0)
+
+    response = signed_in(make_customer()).post('/api/orders/checkout', json={
+        'items': [{'product_id': product_id, 'quantity': 2}]
+    })
+
+    assert response.status_code == 200
+    assert response.get_json()['order']['total_amount'] == 500.0
+    assert stock_of(db, product_id) == (1, 'published')
+
+
+def test_out_of_stock_line_rolls_back_the_whole_cart(db, signed_in, make_customer, make_product):
+    from app import Order
+
+    in_stock, scarce = make_product(stock_quantity=5), make_product(stock_quantity=1)
+    customer_id = make_customer()
+
+    response = signed_in(customer_id).post('/api/orders/checkout', json={
+        'items': [{'product_id': in_stock, 'quantity': 2}, {'product_id': scarce, 'quantity': 2}]
+    })
+
+    assert response.status_code == 409
+    assert response.get_json()['product_id'] == scarce
+    assert stock_of(db, in_stock) == (5, 'published')
+    assert stock_of(db, scarce) == (1, 'published')
+    assert Order.query.filter_by(customer_id=customer_id).count() == 0
+
+
+def test_concurrent_checkouts_never_oversell(db, signed_in, make_customer, make_product):
+    from app import OrderItem
+
+    product_id = make_product(stock_quantity=3)
+    clients = [signed_in(make_customer()) for _ in range(8)]
+    statuses = []
+    start = threading.Barrier(len(clients))
+
+    def buy(client):
+        start.wait()
+        response = client.post('/api/orders/checkout', json={'items': [{'product_id': product_id}]})
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=buy, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == [200] * 3 + [409] * 5
+    assert stock_of(db, product_id) == (0, 'sold_out')
+    assert OrderItem.query.filter_by(product_id=product_id).count() == 3
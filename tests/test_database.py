@@ -0,0 +1,108 @@
+import sqlite3
+from collections import Counter
+
+import pytest
+from sqlalchemy import create_engine, event
+
+import database
+
+
+@pytest.fixture
+def served_by(db):
+    """Counts the statements each engine runs, by bind key ('primary' for the default engine)"""
+    counts = Counter()
+    listeners = []
+    for key, engine in db.engines.items():
+        def count(*_, key=key):
+            counts[key or 'primary'] += 1
+        event.listen(engine, 'before_cursor_execute', count)
+        listeners.append((engine, count))
+    yield counts
+    for engine, count in listeners:
+        event.remove(engine, 'before_cursor_execute', count)
+
+
+@pytest.fixture
+def replica(db, tmp_path, monkeypatch, served_by):
+    """A copy of the test database registered as replica_0"""
+    path = str(tmp_path / 'replica.db')
+    with db.engine.connect() as conn:
+        source = conn.connection.driver_connection
+        with sqlite3.connect(path) as target:
+            source.backup(target)
+        target.close()
+
+    engine = create_engine(f'sqlite:///{path}')
+    event.listen(engine, 'before_cursor_execute', lambda *_: served_by.update(['replica_0']))
+    monkeypatch.setitem(db.engines, 'replica_0', engine)
+    database.replicas.configure(['replica_0'], sticky_seconds=5, max_lag=30, check_interval=60)
+    yield engine
+    database.replicas.configure([], sticky_seconds=5, max_lag=30, check_interval=60)
+    engine.dispose()
+
+
+def test_reads_use_the_read_only_bind_until_the_session_writes(db, make_product, served_by):
+    from app import Product
+
+    product = db.session.get(Product, make_product())
+    served_by.clear()
+    db.session.execute(db.select(Product.id).limit(1))
+    assert set(served_by) == {database.READER_BIND}
+
+    product.stock_quantity = 7
+    db.session.flush()
+    served_by.clear()
+    db.session.execute(db.select(Product.stock_quantity).where(Product.id == product.id))
+
+    assert set(served_by) == {'primary'}
+    db.session.commit()
+
+
+def test_read_after_commit_returns_to_the_read_only_bind(db, make_product, served_by):
+    from app import Product
+
+    db.session.get(Product, make_product()).stock_quantity = 8
+    db.session.commit()
+    served_by.clear()
+
+    db.session.execute(db.select(Product.id).limit(1))
+
+    assert set(served_by) == {database.READER_BIND}
+
+
+def test_replica_views_read_from_the_replica(client, replica, served_by):
+    served_by.clear()
+
+    assert client.get('/api/marketplace/feed').status_code == 200
+
+    assert 'replica_0' in served_by and 'primary' not in served_by
+
+
+def test_read_after_write_goes_to_the_primary(signed_in, make_customer, make_product, replica, served_by):
+    buyer = signed_in(make_customer())
+    assert buyer.post('/api/orders/checkout', json={'items': [{'product_id': make_product()}]}).status_code == 200
+    served_by.clear()
+
+    assert buyer.get('/api/marketplace/feed').status_code == 200
+
+    assert 'replica_0' not in served_by
+    assert database.replicas.sticky_reads > 0
+
+
+def test_sticky_window_ends(signed_in, make_customer, replica, served_by):
+    writer = signed_in(make_customer())
+    with writer.session_transaction() as session:
+        session[database.STICKY_SESSION_KEY] = 0  # wrote long ago
+    served_by.clear()
+
+    writer.get('/api/marketplace/feed')
+
+    assert 'replica_0' in served_by
+
+
+def test_sticky_window_follows_replica_lag(replica, monkeypatch):
+    monkeypatch.setitem(database.replicas._lag, 'replica_0', 12.0)
+    assert database.replicas.sticky_window() == 12.0
+
+    monkeypatch.setitem(database.replicas._lag, 'replica_0', 90.0)
+    assert database.replicas.sticky_window() == 30.0  # capped at max_lag
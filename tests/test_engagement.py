@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from upserts import insert_on_conflict
+
+
+@pytest.mark.parametrize('dialect', [sqlite.dialect(), postgresql.dialect()])
+def test_insert_on_conflict_matches_the_bind_dialect(db, dialect):
+    from app import EngagementCounter
+
+    bind = SimpleNamespace(dialect=dialect)  # only the dialect is read; no server needed
+    statement = insert_on_conflict(bind, EngagementCounter.__table__).on_conflict_do_nothing()
+
+    assert 'ON CONFLICT DO NOTHING' in str(statement.compile(dialect=dialect))
+
+
+def test_insert_on_conflict_rejects_other_dialects(db):
+    from app import EngagementCounter
+
+    with pytest.raises(NotImplementedError):
+        insert_on_conflict(SimpleNamespace(dialect=mysql.dialect()), EngagementCounter.__table__)
+
+
+@pytest.fixture
+def counters(db, monkeypatch):
+    """A fresh counter buffer with the background flusher held off, so tests flush by hand"""
+    import engagement
+
+    monkeypatch.setattr(engagement, 'buffer', engagement.CounterBuffer())
+    monkeypatch.setattr(engagement, '_ensure_flusher', lambda app: None)
+    return engagement
+
+
+@pytest.fixture
+def statements(db):
+    captured = []
+
+    def capture(conn, cursor, statement, *_):
+        captured.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    yield captured
+    event.remove(db.engine, 'before_cursor_execute', capture)
+
+
+def stored(db, kind, subject_id):
+    from app import EngagementCounter
+
+    return db.session.scalar(db.select(EngagementCounter.count).where(
+        EngagementCounter.kind == kind, EngagementCounter.subject_id == subject_id))
+
+
+def test_taps_are_buffered_until_a_flush(client, db, counters, make_artisan, statements):
+    artisan_id = make_artisan()
+    statements.clear()
+
+    for expected in (1, 2, 3):
+        response = client.post('/api/artisan/follow', json={'artisan_id': artisan_id})
+        assert response.get_json()['followers'] == expected
+
+    assert statements == []
+    assert stored(db, 'artisan_follow', artisan_id) is None
+    assert counters.buffer.stats()['pending'] == 1
+
+
+def test_flush_upserts_one_row_per_counter(client, db, counters, make_artisan, statements):
+    artisan_id = make_artisan()
+    for _ in range(3):
+        client.post('/api/story/like', json={'story_id': artisan_id})
+    assert counters.flush() == 1
+    client.post('/api/story/like', json={'story_id': artisan_id})
+    client.post('/api/story/like', json={'story_id': artisan_id, 'liked': False})
+    client.post('/api/story/like', json={'story_id': artisan_id})
+    statements.clear()
+
+    assert counters.flush() == 1
+
+    upserts = [s for s in statements if s.lstrip().upper().startswith('INSERT')]
+    assert len(upserts) == 1 and 'ON CONFLICT' in upserts[0]
+    assert stored(db, 'story_like', artisan_id) == 4
+
+
+def test_taps_on_missing_subjects_are_dropped(client, db, counters):
+    client.post('/api/bundle/add', json={'product_id': 10 ** 9})
+
+    assert counters.flush() == 0
+    assert stored(db, 'bundle_add', 10 ** 9) is None
+
+
+def test_reads_merge_persisted_counts_with_pending_taps(client, db, counters, make_product):
+    from app import EngagementCounter
+
+    product_id = make_product()
+    client.post('/api/bundle/add', json={'product_id': product_id})
+    counters.flush()
+    # Another worker's flush lands in the table
+    db.session.execute(db.update(EngagementCounter).where(
+        EngagementCounter.kind == 'bundle_add', EngagementCounter.subject_id == product_id
+    ).values(count=EngagementCounter.count + 5))
+    db.session.commit()
+    assert counters.get_count('bundle_add', product_id) == 1  # not seen until the snapshot reloads
+
+    counters.reload_snapshot()
+    client.post('/api/bundle/add', json={'product_id': product_id})
+
+    assert counters.get_count('bundle_add', product_id) == 7
+    assert counters.get_counts('bundle_add', [product_id, 10 ** 9]) == {product_id: 7, 10 ** 9: 0}
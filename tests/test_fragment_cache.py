@@ -0,0 +1,123 @@
+from sqlalchemy import create_engine
+
+import database
+from fragment_cache import FragmentCache, artisan_version, artisan_versions, invalidate_artisan
+from repository import count_queries
+
+
+def committed_version(db, artisan_id):
+    """The version other workers see, read outside the test session's transaction"""
+    with db.engines[database.READER_BIND].connect() as conn:
+        return conn.exec_driver_sql(
+            'SELECT version FROM fragment_version WHERE artisan_id = ?', (artisan_id,)
+        ).scalar() or 0
+
+
+def test_product_write_bumps_the_version_only_on_commit(db, make_product, sample_artisan):
+    from app import Product
+
+    artisan_id = sample_artisan[1]
+    product = db.session.get(Product, make_product())
+    before = artisan_version(artisan_id)
+
+    product.name = 'Renamed Vase'
+    db.session.flush()
+    assert committed_version(db, artisan_id) == before
+
+    db.session.commit()
+    assert committed_version(db, artisan_id) == artisan_version(artisan_id) == before + 1
+
+
+def test_rolled_back_write_leaves_the_version_alone(db, make_product, sample_artisan):
+    from app import Product
+
+    artisan_id = sample_artisan[1]
+    product = db.session.get(Product, make_product())
+    before = artisan_version(artisan_id)
+
+    product.name = 'Never Saved'
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+
+    assert artisan_version(artisan_id) == before
+
+
+def test_savepoint_rollback_keeps_the_outer_write_pending(db, make_product, make_artisan):
+    from app import Artisan, Product
+
+    artisan_id = make_artisan()
+    product = db.session.get(Product, make_product(artisan_id=artisan_id))
+    before = artisan_version(artisan_id)
+
+    db.session.get(Artisan, artisan_id).bio = 'Updated bio'
+    db.session.flush()
+    with db.session.begin_nested() as savepoint:
+        product.name = 'Discarded'
+        db.session.flush()
+        savepoint.rollback()
+    db.session.commit()
+
+    assert artisan_version(artisan_id) == before + 1
+
+
+def test_releasing_a_savepoint_waits_for_the_outer_commit(db, make_product, sample_artisan):
+    from app import Product
+
+    artisan_id = sample_artisan[1]
+    product = db.session.get(Product, make_product())
+    before = artisan_version(artisan_id)
+
+    with db.session.begin_nested():
+        product.name = 'Kept'
+    assert committed_version(db, artisan_id) == before
+
+    db.session.commit()
+    assert committed_version(db, artisan_id) == before + 1
+
+
+def test_moving_a_product_invalidates_both_artisans(db, make_product, make_artisan):
+    from app import Product
+
+    old_owner, new_owner = make_artisan(), make_artisan()
+    product = db.session.get(Product, make_product(artisan_id=old_owner))
+    before = artisan_version(old_owner), artisan_version(new_owner)
+
+    product.artisan_id = new_owner
+    db.session.commit()
+
+    assert (artisan_version(old_owner), artisan_version(new_owner)) == (before[0] + 1, before[1] + 1)
+
+
+def test_versions_bumped_by_another_worker_are_seen(db, make_artisan):
+    artisan_id = make_artisan()
+    before = artisan_version(artisan_id)
+
+    # Another process commits a write through its own engine
+    other_worker = create_engine(db.engine.url)
+    with other_worker.begin() as conn:
+        invalidate_artisan(conn, artisan_id)
+    other_worker.dispose()
+
+    assert artisan_version(artisan_id) == before + 1
+
+
+def test_a_request_reads_each_version_once(app, db, make_artisan):
+    artisan_ids = [make_artisan(), make_artisan()]
+
+    with app.test_request_context(), count_queries() as queries:
+        versions = artisan_versions(artisan_ids)
+        assert artisan_version(artisan_ids[0]) == versions[artisan_ids[0]]
+
+    assert queries.count == 1
+
+
+def test_cache_evicts_least_recently_used_past_its_byte_budget():
+    cache = FragmentCache(max_bytes=10)
+    cache.set('a', 'aaaa')
+    cache.set('b', 'bbbb')
+    cache.get('a')
+    cache.set('c', 'cccc')
+
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == ('aaaa', None, 'cccc')
+    assert cache.size == 8
@@ -0,0 +1,87 @@
+import uuid
+
+import pytest
+
+import identity
+from repository import count_queries
+
+
+@pytest.fixture(params=[False, True], ids=['claims off', 'claims on'])
+def claims(request, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'SESSION_IDENTITY_CLAIMS', request.param)
+    return request.param
+
+
+def log_in(client, username='maya_potter', password='potter123'):
+    with count_queries() as queries:
+        response = client.post('/login', json={'username': username, 'password': password})
+    assert response.get_json()['success']
+    return queries.count
+
+
+def test_login_is_one_query(client, claims):
+    assert log_in(client) == 1
+
+    with client.session_transaction() as session:
+        assert (identity.CLAIMS_KEY in session) == claims
+
+
+def test_claims_spare_authorization_checks_the_identity_query(client, claims):
+    log_in(client)
+
+    with count_queries() as queries:
+        assert client.get('/artisan/onboard').status_code == 200
+
+    assert queries.count == (0 if claims else 1)
+
+
+def test_new_artisan_profile_is_in_the_claims(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'SESSION_IDENTITY_CLAIMS', True)
+    name = f'claims_{uuid.uuid4().hex[:8]}'
+    client.post('/register', json={'username': name, 'email': f'{name}@example.com', 'password': 'pw123456',
+                                   'user_type': 'artisan'})
+
+    artisan_id = client.post('/api/artisan/create', json={
+        'name': 'Claims Artisan', 'craft_type': 'Weaving', 'location': 'Kutch'
+    }).get_json()['artisan_id']
+
+    with client.session_transaction() as session:
+        assert session[identity.CLAIMS_KEY]['artisan_id'] == artisan_id
+    with count_queries() as queries:
+        client.get('/artisan/onboard')
+    assert queries.count == 0
+
+
+def test_role_change_clears_the_claims(app, db, make_customer, monkeypatch):
+    from flask import session
+    from app import User
+
+    monkeypatch.setitem(app.config, 'SESSION_IDENTITY_CLAIMS', True)
+    user = db.session.get(User, make_customer())
+
+    with app.test_request_context():
+        identity.remember(user)
+        assert identity.user_type() == 'customer'
+
+        user.user_type = 'artisan'
+        db.session.commit()
+
+        assert identity.CLAIMS_KEY not in session
+        assert identity.user_type() == 'artisan'  # rebuilt from the database
+        assert session[identity.CLAIMS_KEY]['user_type'] == 'artisan'
+
+
+def test_unrelated_profile_edits_keep_the_claims(app, db, sample_artisan, monkeypatch):
+    from flask import session
+    from app import Artisan, User
+
+    monkeypatch.setitem(app.config, 'SESSION_IDENTITY_CLAIMS', True)
+    user_id, artisan_id = sample_artisan
+    artisan = db.session.get(Artisan, artisan_id)
+
+    with app.test_request_context():
+        identity.remember(db.session.get(User, user_id), artisan)
+        artisan.craft_history = 'Forty years at the wheel'
+        db.session.commit()
+
+        assert session[identity.CLAIMS_KEY]['artisan_id'] == artisan_id
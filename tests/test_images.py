@@ -0,0 +1,99 @@
+import io
+import os
+
+import pytest
+
+import images
+
+PIL = pytest.importorskip('PIL.Image')
+
+
+def png_bytes(size=(800, 600), color=(180, 90, 40)):
+    buffer = io.BytesIO()
+    PIL.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setitem(images._settings, 'root', str(tmp_path))
+    return tmp_path
+
+
+def upload(client, data):
+    return client.post('/api/images/upload', data={'file': (io.BytesIO(data), 'photo.png')},
+                       content_type='multipart/form-data')
+
+
+def test_upload_stores_the_original_and_renders_variants(artisan_client, storage):
+    response = upload(artisan_client, png_bytes())
+
+    body = response.get_json()
+    assert response.status_code == 200 and body['variants_job_id'] is not None
+    assert os.path.exists(images.original_path(body['image']))
+    assert not images.variants_missing(body['image'])
+
+
+def test_identical_uploads_share_one_original(artisan_client, storage):
+    data = png_bytes(color=(10, 20, 30))
+    first = upload(artisan_client, data).get_json()
+
+    second = upload(artisan_client, data).get_json()
+
+    assert second['image'] == first['image']
+    assert second['variants_job_id'] is None
+
+
+def test_repeat_upload_requeues_missing_variants(artisan_client, storage):
+    data = png_bytes(color=(30, 20, 10))
+    key = upload(artisan_client, data).get_json()['image']
+    os.remove(images.variant_path(key, 'w640'))
+
+    again = upload(artisan_client, data).get_json()
+
+    assert again['variants_job_id'] is not None
+    assert os.path.exists(images.variant_path(key, 'w640'))
+
+
+def test_oversized_uploads_are_rejected(storage):
+    data = png_bytes()
+
+    with pytest.raises(images.ImageUploadError, match='limited'):
+        images.save_upload(io.BytesIO(data), {'png'}, max_bytes=len(data) - 1)
+
+    assert os.listdir(storage / 'incoming') == []
+
+
+@pytest.mark.parametrize('data', [
+    b'%PDF-1.7 not an image',
+    b'\x89PNG\r\n\x1a\n' + b'\x00' * 200,  # PNG signature, garbage after it
+])
+def test_files_that_are_not_images_are_rejected(artisan_client, storage, data):
+    response = upload(artisan_client, data)
+
+    assert response.status_code == 400
+    assert not os.path.exists(storage / 'originals')
+
+
+def test_variants_are_served_with_immutable_caching(artisan_client, client, storage):
+    key = upload(artisan_client, png_bytes(color=(1, 2, 3))).get_json()['image']
+
+    response = client.get(images.image_url(key, 'w320'))
+
+    assert (response.status_code, response.mimetype) == (200, 'image/webp')
+    assert response.cache_control.immutable
+    assert PIL.open(io.BytesIO(response.data)).width == 320
+
+
+def test_unrendered_variant_falls_back_to_the_original_briefly(client, storage):
+    key, _ = images.save_upload(io.BytesIO(png_bytes(color=(4, 5, 6))), {'png'}, max_bytes=10 ** 7)
+
+    response = client.get(images.image_url(key))
+
+    assert (response.status_code, response.mimetype) == (200, 'image/png')
+    assert response.cache_control.max_age == 60 and not response.cache_control.immutable
+
+
+def test_unknown_images_are_not_found(client, storage):
+    assert client.get(f'/images/{"0" * 64}.png/thumb').status_code == 404
+    assert client.get('/images/../config.py/original').status_code == 404
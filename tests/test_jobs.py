@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobs
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    """Registers a `test_task` handler that fails its first `failures` runs"""
+    calls = []
+
+    def run(payload):
+        calls.append(payload)
+        if len(calls) <= run.failures:
+            raise RuntimeError(f'attempt {len(calls)} failed')
+        return {'echo': payload['value']}
+
+    run.failures = 0
+    run.calls = calls
+    monkeypatch.setitem(jobs._handlers, 'test_task', run)
+    return run
+
+
+def queue(db, max_attempts=3):
+    from app import Job
+
+    job = jobs.enqueue('test_task', {'value': 42})
+    job.max_attempts = max_attempts
+    db.session.commit()
+    return db.session.get(Job, job.id)
+
+
+def test_job_result_is_stored(app, db, handler):
+    job = queue(db)
+
+    assert jobs.run_job(job.id)
+
+    db.session.refresh(job)
+    assert (job.status, job.attempts, json.loads(job.result)) == ('succeeded', 1, {'echo': 42})
+
+
+def test_a_job_runs_once_even_if_claimed_twice(app, db, handler):
+    job = queue(db)
+
+    assert jobs.run_job(job.id)
+    assert not jobs.run_job(job.id)
+    assert len(handler.calls) == 1
+
+
+def test_failed_job_backs_off_exponentially(app, db, handler, monkeypatch):
+    monkeypatch.setitem(app.config, 'JOB_RETRY_BACKOFF', 10)
+    handler.failures = 2
+    job = queue(db)
+
+    jobs.run_job(job.id)
+    db.session.refresh(job)
+    first_delay = job.run_after - job.updated_at
+    assert (job.status, job.last_error) == ('pending', 'attempt 1 failed')
+    assert not jobs.run_job(job.id)  # not due until the backoff elapses
+
+    job.run_after = datetime.utcnow()
+    db.session.commit()
+    jobs.run_job(job.id)
+    db.session.refresh(job)
+    second_delay = job.run_after - job.updated_at
+
+    assert timedelta(seconds=9) < first_delay <= timedelta(seconds=10)
+    assert timedelta(seconds=19) < second_delay <= timedelta(seconds=20)
+
+
+def test_job_fails_permanently_after_max_attempts(app, db, handler):
+    handler.failures = 5
+    job = queue(db, max_attempts=2)
+
+    for _ in range(2):
+        job.run_after = datetime.utcnow()
+        db.session.commit()
+        jobs.run_job(job.id)
+        db.session.refresh(job)
+
+    assert (job.status, job.attempts, job.last_error) == ('failed', 2, 'attempt 2 failed')
+    assert not jobs.run_job(job.id)
+
+
+def test_running_job_is_reclaimed_after_its_lease_expires(app, db, handler, monkeypatch):
+    monkeypatch.setitem(app.config, 'JOB_LEASE_SECONDS', 60)
+    job = queue(db)
+    job.status, job.updated_at = 'running', datetime.utcnow()
+    db.session.commit()
+    assert not jobs.run_job(job.id)
+
+    job.updated_at = datetime.utcnow() - timedelta(seconds=61)
+    db.session.commit()
+
+    assert jobs.run_job(job.id)
+    db.session.refresh(job)
+    assert job.status == 'succeeded'
+
+
+def test_unknown_kinds_are_rejected_at_enqueue(db):
+    with pytest.raises(ValueError):
+        jobs.enqueue('no_such_task', {})
+
+
+def test_lease_is_renewed_while_the_handler_runs(app, db, monkeypatch):
+    from app import Job
+
+    monkeypatch.setitem(app.config, 'JOB_LEASE_SECONDS', 1)
+    reclaimed = []
+
+    def other_worker(job_id):
+        with app.app_context():
+            reclaimed.append(jobs.run_job(job_id))
+            db.session.remove()
+
+    def slow(payload):
+        time.sleep(1.5)  # well past the lease
+        thread = threading.Thread(target=other_worker, args=(payload['job_id'],))
+        thread.start()
+        thread.join()
+        return 'done'
+
+    monkeypatch.setitem(jobs._handlers, 'slow_task', slow)
+    job = jobs.enqueue('slow_task', {})
+    job.payload = json.dumps({'job_id': job.id})
+    db.session.commit()
+
+    assert jobs.run_job(job.id)
+
+    db.session.refresh(job)
+    assert reclaimed == [False]
+    assert (job.status, job.attempts) == ('succeeded', 1)
+    assert not any(thread.name == f'job-lease-{job.id}' for thread in threading.enumerate())
+
+
+def test_a_reclaimed_job_lease_is_not_renewed_by_the_old_worker(app, db, handler):
+    job = queue(db)
+    job.status, job.attempts = 'running', 2  # claimed again by another worker
+    db.session.commit()
+
+    assert not jobs.renew_lease(job.id, attempt=1)
+    assert jobs.renew_lease(job.id, attempt=2)
@@ -0,0 +1,157 @@
+import sqlite3
+
+import pytest
+
+import llm_cache
+from google_ai_service import GoogleAIService
+from llm_cache import MemoryLRUCache, SQLiteCache, TwoTierCache
+from upstream import UpstreamClient
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def disk(tmp_path):
+    return SQLiteCache(str(tmp_path / 'llm_cache.db'), max_entries=10, ttl=60, evict_every=5)
+
+
+def rows(cache):
+    with sqlite3.connect(cache.path) as conn:
+        return {key for key, in conn.execute('SELECT key FROM llm_cache')}
+
+
+def test_memory_hit_and_miss():
+    cache = MemoryLRUCache()
+    cache.set('a', 'alpha')
+
+    assert (cache.get('a'), cache.get('b')) == ('alpha', None)
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+
+
+def test_memory_entries_expire(clock):
+    cache = MemoryLRUCache(ttl=60)
+    cache.set('a', 'alpha')
+
+    clock.now += 61
+
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_memory_evicts_the_least_recently_used():
+    cache = MemoryLRUCache(max_entries=2)
+    cache.set('a', 'alpha')
+    cache.set('b', 'beta')
+    cache.get('a')
+
+    cache.set('c', 'gamma')
+
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == ('alpha', None, 'gamma')
+
+
+def test_disk_hit_and_miss(disk):
+    disk.set('a', 'alpha')
+
+    assert (disk.get('a'), disk.get('b')) == ('alpha', None)
+    assert (disk.hits, disk.misses) == (1, 1)
+
+
+def test_disk_entries_expire(disk, clock):
+    disk.set('a', 'alpha')
+
+    clock.now += 61
+
+    assert disk.get('a') is None
+
+
+def test_disk_evicts_the_least_recently_accessed(disk, clock):
+    for i in range(10):
+        clock.now += 1
+        disk.set(f'k{i}', 'v')
+    clock.now += 1
+    disk.get('k0')
+
+    clock.now += 1
+    disk.set('k10', 'v')  # 11 rows: over the limit, trimmed to 9
+
+    assert rows(disk) == {'k0'} | {f'k{i}' for i in range(3, 11)}
+    assert disk.evictions == 2
+
+
+def test_disk_eviction_is_not_run_on_every_write(disk, clock):
+    for i in range(4):
+        disk.set(f'k{i}', 'v')
+    clock.now += 61
+
+    disk.set('k4', 'v')  # fifth write: sweeps the expired rows
+    assert rows(disk) == {'k4'}
+
+    clock.now += 61
+    disk.set('k5', 'v')
+    assert rows(disk) == {'k4', 'k5'}  # expired, but not swept until the next round
+
+
+def test_disk_tier_is_shared_between_instances(disk):
+    disk.set('a', 'alpha')
+
+    other = SQLiteCache(disk.path, max_entries=10, ttl=60)
+
+    assert other.get('a') == 'alpha'
+
+
+def test_disk_hits_are_promoted_to_memory(disk):
+    disk.set('a', 'alpha')
+    cache = TwoTierCache(MemoryLRUCache(), disk)
+
+    assert cache.get('a') == 'alpha'
+    assert cache.get('a') == 'alpha'
+
+    assert (cache.memory.hits, cache.memory.misses, disk.hits) == (1, 1, 1)
+
+
+def test_two_tier_writes_through_to_disk(disk):
+    cache = TwoTierCache(MemoryLRUCache(), disk)
+
+    cache.set('a', 'alpha')
+
+    assert cache.memory.get('a') == disk.get('a') == 'alpha'
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        self.calls += 1
+        return StubResponse(f'answer {self.calls}')
+
+
+@pytest.mark.parametrize('temperature, upstream_calls', [(0.2, 1), (0.9, 2)])
+def test_hot_calls_skip_the_cache(monkeypatch, temperature, upstream_calls):
+    model = CountingModel()
+    service = GoogleAIService(cache=MemoryLRUCache(), gemini_model=model,
+                              gemini_upstream=UpstreamClient('gemini-test', timeout=5))
+    monkeypatch.setattr(service.config, 'LLM_CACHE_MAX_TEMPERATURE', 0.5)
+
+    for _ in range(2):
+        service.generate_text('Describe a brass lamp', temperature=temperature)
+
+    assert model.calls == upstream_calls
@@ -0,0 +1,72 @@
+import json
+import re
+
+import pytest
+
+from google_ai_service import GoogleAIService, MarketingContentAgent
+from llm_cache import MemoryLRUCache
+from upstream import UpstreamClient
+
+ARTISAN = {'name': 'Ravi', 'craft_type': 'Block printing', 'location': 'Bagru'}
+PRODUCTS = [{'id': i, 'name': f'Printed scarf {i}', 'category': 'Textiles', 'price': 900} for i in range(1, 5)]
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubCatalogModel:
+    """Answers every product in the prompt except those listed in `skip`"""
+
+    def __init__(self):
+        self.skip = set()
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        self.calls += 1
+        ids = [int(i) for i in re.findall(r'\{"id": (\d+)', prompt)]
+        return StubResponse(json.dumps([
+            {'id': i, 'caption': f'Scarf {i}, printed by hand', 'hashtags': ['blockprint']}
+            for i in ids if i not in self.skip
+        ]))
+
+
+@pytest.fixture
+def model():
+    return StubCatalogModel()
+
+
+@pytest.fixture
+def agent(model):
+    service = GoogleAIService(cache=MemoryLRUCache(), gemini_model=model,
+                              gemini_upstream=UpstreamClient('gemini-test', max_concurrency=2, timeout=5))
+    return MarketingContentAgent(ai_service=service, batch_size=2, max_retries=1)
+
+
+def test_products_are_packed_into_batches(agent, model):
+    result = agent.generate_catalog_posts(ARTISAN, PRODUCTS)
+
+    assert (result['upstream_calls'], result['fallbacks']) == (2, 0)
+    assert result['posts']['3']['hashtags'] == ['#blockprint']
+
+
+def test_only_invalid_items_are_retried(agent, model):
+    model.skip = {3}
+
+    result = agent.generate_catalog_posts(ARTISAN, PRODUCTS)
+
+    assert (result['upstream_calls'], result['fallbacks']) == (3, 1)
+    assert result['posts']['3']['source'] == 'fallback'
+
+
+def test_incomplete_batches_are_not_cached(agent, model):
+    model.skip = {3}
+    agent.generate_catalog_posts(ARTISAN, PRODUCTS)
+
+    model.skip = set()
+    result = agent.generate_catalog_posts(ARTISAN, PRODUCTS)
+
+    # The complete batch is a cache hit; the incomplete one is asked again
+    assert (result['upstream_calls'], result['fallbacks']) == (1, 0)
+    assert result['posts']['3']['source'] == 'ai'
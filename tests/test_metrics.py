@@ -0,0 +1,33 @@
+import pytest
+
+
+@pytest.fixture
+def metrics_config(app, monkeypatch):
+    def configure(token=None, public=False):
+        monkeypatch.setitem(app.config, 'METRICS_TOKEN', token)
+        monkeypatch.setitem(app.config, 'METRICS_PUBLIC', public)
+    return configure
+
+
+def test_metrics_are_off_without_a_token(client, metrics_config):
+    metrics_config()
+
+    assert client.get('/metrics').status_code == 404
+
+
+def test_metrics_require_the_bearer_token(client, metrics_config):
+    metrics_config(token='scrape-secret')
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret ü'}).status_code == 401
+
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+    assert 'http_request_duration_seconds' in response.get_data(as_text=True)
+
+
+def test_public_metrics_need_no_token(client, metrics_config):
+    metrics_config(public=True)
+
+    assert client.get('/metrics').status_code == 200
@@ -0,0 +1,154 @@
+import json
+import threading
+import uuid
+
+import pytest
+
+from google_ai_service import ArtisanStorytellingAgent, GoogleAIService, count_upstream_calls
+from llm_cache import MemoryLRUCache
+from upstream import UpstreamClient
+
+ARTISAN = {'name': 'Maya', 'craft_type': 'blue pottery', 'location': 'Jaipur'}
+PROFILE = {
+    'bio': 'Raised among the kilns of Jaipur, Maya learned blue pottery from her grandmother.',
+    'title': 'Cobalt Dreams in Clay',
+    'cultural_context': 'Jaipur blue pottery came to Rajasthan with Persian artisans.'
+}
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubOnboardingModel:
+    """Answers the composite prompt with valid JSON unless `structured` is off"""
+
+    def __init__(self, structured=True):
+        self.structured = structured
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        with self.lock:
+            self.prompts.append(prompt)
+        if 'JSON object' in prompt:
+            return StubResponse(json.dumps(PROFILE) if self.structured else 'Here is a lovely profile!')
+        if 'story title' in prompt:
+            return StubResponse(PROFILE['title'])
+        return StubResponse(PROFILE['bio'])
+
+    def composite_prompts(self):
+        return [prompt for prompt in self.prompts if 'JSON object' in prompt]
+
+
+@pytest.fixture
+def model():
+    return StubOnboardingModel()
+
+
+@pytest.fixture
+def agent(model):
+    service = GoogleAIService(cache=MemoryLRUCache(), gemini_model=model,
+                              gemini_upstream=UpstreamClient('gemini-test', max_concurrency=4, timeout=5))
+    return ArtisanStorytellingAgent(ai_service=service)
+
+
+def test_composite_answer_fills_every_field_in_one_call(agent, model):
+    profile = agent.generate_onboarding_profile(ARTISAN)
+
+    assert (profile['source'], profile['upstream_calls']) == ('composite', 1)
+    assert profile['bio'] == PROFILE['bio']
+    assert len(model.prompts) == 1
+
+
+def test_cache_hits_are_not_counted_as_upstream_calls(agent, model):
+    agent.generate_onboarding_profile(ARTISAN)
+
+    profile = agent.generate_onboarding_profile(ARTISAN)
+
+    assert (profile['source'], profile['upstream_calls']) == ('composite', 0)
+    assert len(model.prompts) == 1
+
+
+def test_unusable_composite_answer_is_not_cached(agent, model):
+    model.structured = False
+    first = agent.generate_onboarding_profile(ARTISAN)
+    assert (first['source'], first['upstream_calls']) == ('separate', 4)
+
+    model.structured = True
+    second = agent.generate_onboarding_profile(ARTISAN)
+
+    assert (second['source'], second['upstream_calls']) == ('composite', 1)
+    assert len(model.composite_prompts()) == 2
+
+
+def test_upstream_counter_ignores_other_threads(agent):
+    with count_upstream_calls() as counter:
+        thread = threading.Thread(target=agent.ai_service.generate_text, args=('Describe a loom',))
+        thread.start()
+        thread.join()
+
+    assert counter.count == 0
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Every preview bio the server actually renders"""
+    from app import AIStorytellingAgent
+
+    rendered = []
+    render = AIStorytellingAgent.generate_artisan_bio
+
+    def counting(artisan_data, persona_data):
+        rendered.append(persona_data.get('tone'))
+        return render(artisan_data, persona_data)
+
+    monkeypatch.setattr(AIStorytellingAgent, 'generate_artisan_bio', counting)
+    return rendered
+
+
+def preview(client, tone, etag=None, name=None):
+    headers = {'If-None-Match': etag} if etag else {}
+    return client.post('/api/persona/preview', headers=headers, json={
+        'name': name, 'craft_type': 'blue pottery', 'location': 'Jaipur',
+        'persona': {'tone': tone, 'style': 'narrative', 'storytelling_depth': 3}
+    })
+
+
+def test_preview_answers_the_shown_etag_with_304(client, renders):
+    name = f'Preview {uuid.uuid4().hex[:8]}'
+    first = preview(client, 'warm', name=name)
+    etag = first.headers['ETag'].strip('"')
+
+    again = preview(client, 'warm', etag=etag, name=name)
+
+    assert first.status_code == 200 and first.get_json()['preview_bio']
+    assert (again.status_code, again.data) == (304, b'')
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert renders == ['warm']
+
+
+def test_superseded_previews_cost_one_render_per_setting(client, renders):
+    # A slider drag: the page aborts each request the next one supersedes, so
+    # the server may see all of them while the client only keeps the last ETag
+    name = f'Preview {uuid.uuid4().hex[:8]}'
+    shown = preview(client, 'warm', name=name).headers['ETag'].strip('"')
+    for tone in ('formal', 'playful', 'formal'):
+        aborted = preview(client, tone, etag=shown, name=name)
+        assert aborted.status_code == 200
+
+    settled = preview(client, 'playful', etag=shown, name=name)
+
+    assert settled.status_code == 200  # an older ETag never answers for new settings
+    assert settled.headers['ETag'].strip('"') != shown
+    assert renders == ['warm', 'formal', 'playful']
+
+
+def test_onboarding_page_debounces_and_aborts_previews(artisan_client):
+    page = artisan_client.get('/artisan/onboard').get_data(as_text=True)
+
+    assert 'const PREVIEW_DEBOUNCE_MS = 250;' in page
+    assert 'clearTimeout(previewTimer);' in page
+    assert 'previewRequest.abort();' in page
+    assert "'If-None-Match': previewETag" in page
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+
+from persona_templates import (BIO_ARGS, BIO_FIELDS, PRODUCT_ARGS, CompiledTemplate, get_pack, render_bio,
+                               render_product_description)
+
+ARTISAN = {'name': 'Maya Sharma', 'craft_type': 'Pottery', 'location': 'Jaipur'}
+
+
+def test_fields_are_substituted_and_literals_kept():
+    template = CompiledTemplate('100% {craft_type} from {location}, by {name} (%s)', BIO_FIELDS)
+
+    assert template.render(ARTISAN) == '100% Pottery from Jaipur, by Maya Sharma (%s)'
+
+
+def test_templates_without_fields_render_their_text():
+    assert CompiledTemplate('Made by hand, 50% slower', BIO_FIELDS).render({}) == 'Made by hand, 50% slower'
+
+
+def test_non_string_values_are_rendered_like_str():
+    template = CompiledTemplate('{name} has {craft_type}', BIO_FIELDS)
+
+    assert template.render({'name': 'Maya', 'craft_type': 7}) == 'Maya has 7'
+
+
+@pytest.mark.parametrize('source', [
+    '{name}',
+    '{name}{craft_type}',
+    '{location}, home of {name}; {name} makes {craft_type}',
+    'No fields at all',
+    '',
+])
+def test_bound_renderer_matches_render(source):
+    template = CompiledTemplate(source, BIO_FIELDS)
+    values = tuple(ARTISAN[name] for name in BIO_ARGS)
+
+    assert template.bind(BIO_ARGS)(values) == template.render(ARTISAN)
+
+
+def test_every_pack_template_binds_like_it_renders():
+    pack = get_pack()
+    product = {'category': 'Pottery', 'description': 'A vase.'}
+    for key, variants in pack.bios.items():
+        for template, renderer in zip(variants, pack.bio_renderers[key]):
+            assert renderer(tuple(ARTISAN[name] for name in BIO_ARGS)) == template.render(ARTISAN)
+    for tone, template in pack.products.items():
+        assert pack.product_renderers[tone](tuple(product[name] for name in PRODUCT_ARGS)) == template.render(product)
+
+
+@pytest.mark.parametrize('source', [
+    '{price}',
+    '{name.__class__}',
+    '{name[0]}',
+    '{name!r}',
+    '{name:>10}',
+])
+def test_unsupported_fields_are_rejected(source):
+    with pytest.raises(ValueError):
+        CompiledTemplate(source, BIO_FIELDS)
+
+
+def test_bio_grows_with_storytelling_depth():
+    short = render_bio(ARTISAN, {'tone': 'formal', 'storytelling_depth': 1})
+    full = render_bio(ARTISAN, {'tone': 'formal', 'storytelling_depth': 10})
+
+    assert short == ('I am Maya Sharma, a dedicated Pottery artisan. My workshop in Jaipur serves as the '
+                     'foundation for creating exceptional Pottery works.')
+    assert full.startswith(short) and 'cultural heritage of Jaipur' in full
+
+
+def test_unknown_tone_and_locale_fall_back_to_defaults():
+    persona = SimpleNamespace(tone='unknown', language_preference='xx')
+    description = render_product_description({'description': 'A vase.'}, persona)
+
+    assert description.startswith('This beautiful handcraft piece is one of my favorites to create! A vase.')
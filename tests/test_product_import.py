@@ -0,0 +1,67 @@
+import pytest
+
+from product_import import validate_rows
+
+ROW = {'name': 'Indigo Throw', 'description': 'Hand-block printed cotton', 'price': '1200'}
+
+
+def test_valid_rows_become_draft_records():
+    records, errors = validate_rows([(2, ROW)], artisan_id=7, default_category='Textiles')
+
+    assert errors == []
+    assert (records[0]['price'], records[0]['category'], records[0]['status']) == (1200.0, 'Textiles', 'draft')
+
+
+@pytest.mark.parametrize('price', ['nan', 'NaN', 'inf', '-inf', 'Infinity', float('nan'), float('inf')])
+def test_non_finite_prices_are_rejected(price):
+    records, errors = validate_rows([(3, {**ROW, 'price': price})], artisan_id=7, default_category='Textiles')
+
+    assert records == []
+    assert errors == [{'row': 3, 'errors': ['price must be a finite number']}]
+
+
+def test_every_problem_in_a_row_is_reported():
+    _, errors = validate_rows([(4, {'name': 'x' * 500, 'price': '-5', 'stock_quantity': 'many'})],
+                              artisan_id=7, default_category='Textiles')
+
+    assert len(errors[0]['errors']) == 4
+
+
+@pytest.mark.parametrize('field', ['name', 'description'])
+def test_whitespace_only_required_fields_are_missing(field):
+    records, errors = validate_rows([(5, {**ROW, field: ' \t\n '})], artisan_id=7, default_category='Textiles')
+
+    assert records == []
+    assert errors == [{'row': 5, 'errors': [f'{field} is required']}]
+
+
+def test_values_are_stored_stripped():
+    records, _ = validate_rows([(6, {**ROW, 'name': '  Indigo Throw ', 'category': ' Decor '})],
+                               artisan_id=7, default_category='Textiles')
+
+    assert (records[0]['name'], records[0]['category']) == ('Indigo Throw', 'Decor')
+
+
+@pytest.mark.parametrize('field', ['price', 'stock_quantity'])
+@pytest.mark.parametrize('value', [True, False])
+def test_booleans_are_not_numbers(field, value):
+    records, errors = validate_rows([(7, {**ROW, field: value})], artisan_id=7, default_category='Textiles')
+
+    assert records == []
+    assert len(errors[0]['errors']) == 1
+
+
+@pytest.mark.parametrize('stock', [2.7, '2.7', '1e-3'])
+def test_fractional_stock_is_rejected_not_truncated(stock):
+    records, errors = validate_rows([(8, {**ROW, 'stock_quantity': stock})], artisan_id=7, default_category='Textiles')
+
+    assert records == []
+    assert errors == [{'row': 8, 'errors': ['stock_quantity must be a whole number']}]
+
+
+@pytest.mark.parametrize('stock, expected', [(3, 3), ('3', 3), (' 4 ', 4), (5.0, 5), ('0', 0)])
+def test_whole_stock_quantities_are_accepted(stock, expected):
+    records, errors = validate_rows([(9, {**ROW, 'stock_quantity': stock})], artisan_id=7, default_category='Textiles')
+
+    assert errors == []
+    assert records[0]['stock_quantity'] == expected
@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+import recommendations
+from config import Config
+
+
+@pytest.fixture
+def fresh_index(db, monkeypatch):
+    """A just-built index, with background rebuilds allowed to start immediately"""
+    monkeypatch.setattr(Config, 'BUNDLE_INDEX_REBUILD_INTERVAL', 0)
+    recommendations.invalidate_index()
+    wait_for_rebuild()
+    if not recommendations._is_fresh(recommendations._index):
+        recommendations._build()
+    return recommendations.get_index()
+
+
+def wait_for_rebuild(timeout=10):
+    deadline = time.time() + timeout
+    while recommendations._rebuild_started and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_a_committed_product_write_marks_the_index_stale(fresh_index, db, make_product):
+    from app import Product
+
+    product = db.session.get(Product, make_product())
+    recommendations._build()
+    index = recommendations.get_index()
+
+    product.price = 321.0
+    db.session.flush()
+    assert recommendations._is_fresh(index)
+
+    db.session.commit()
+    assert not recommendations._is_fresh(index)
+
+
+def test_stale_index_is_served_while_the_next_one_builds(fresh_index, make_product, monkeypatch):
+    started, release = [], []
+    load_rows = recommendations.load_rows
+
+    def slow_load_rows():
+        started.append(True)
+        while not release:
+            time.sleep(0.01)
+        return load_rows()
+
+    monkeypatch.setattr(recommendations, 'load_rows', slow_load_rows)
+    product_id = make_product(name='Freshly Listed Brass Lamp')
+
+    began = time.perf_counter()
+    assert recommendations.get_index() is fresh_index
+    assert recommendations.get_index() is fresh_index
+    assert time.perf_counter() - began < 0.5
+    assert product_id not in fresh_index.position
+
+    deadline = time.time() + 5
+    while not started and time.time() < deadline:
+        time.sleep(0.01)
+    assert started == [True]  # one rebuild for both requests
+    release.append(True)
+    wait_for_rebuild()
+
+    index = recommendations.get_index()
+    assert index.generation > fresh_index.generation
+    assert product_id in index.position
+
+
+def test_rebuilds_wait_for_the_interval(fresh_index, make_product, monkeypatch):
+    monkeypatch.setattr(Config, 'BUNDLE_INDEX_REBUILD_INTERVAL', 0.5)
+    make_product()
+
+    recommendations.get_index()
+    time.sleep(0.2)
+    assert recommendations.get_index() is fresh_index
+
+    wait_for_rebuild()
+    assert recommendations.get_index().generation > fresh_index.generation
+
+
+def test_bundles_fit_the_price_band(fresh_index):
+    bundles = recommendations.suggest_bundles('complementary', size=2, limit=2, max_price=5000)
+
+    assert bundles
+    for bundle in bundles:
+        assert len(bundle['products']) == 2
+        assert bundle['total_price'] <= 5000
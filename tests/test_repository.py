@@ -0,0 +1,89 @@
+import threading
+
+from repository import count_queries, decode_feed_cursor, encode_feed_cursor, load_marketplace_page
+
+
+def test_count_queries_counts_statements_in_the_block(db):
+    with count_queries() as counter:
+        db.session.execute(db.text('SELECT 1'))
+        db.session.execute(db.text('SELECT 2'))
+    db.session.execute(db.text('SELECT 3'))
+
+    assert counter.count == 2
+    assert counter.statements == ['SELECT 1', 'SELECT 2']
+
+
+def test_count_queries_nests(db):
+    with count_queries() as outer:
+        db.session.execute(db.text('SELECT 1'))
+        with count_queries() as inner:
+            db.session.execute(db.text('SELECT 2'))
+
+    assert (outer.count, inner.count) == (2, 1)
+
+
+def test_count_queries_ignores_other_threads(app, db):
+    def query_elsewhere():
+        with app.app_context():
+            db.session.execute(db.text('SELECT 1'))
+
+    with count_queries() as counter:
+        thread = threading.Thread(target=query_elsewhere)
+        thread.start()
+        thread.join()
+
+    assert counter.count == 0
+
+
+def test_request_query_count_is_exposed(client):
+    response = client.get('/api/marketplace/feed')
+
+    assert response.status_code == 200
+    assert int(response.headers['X-Query-Count']) > 0
+
+
+def test_feed_pages_cost_the_same_at_any_depth(db, make_artisan, make_product):
+    for _ in range(2):
+        make_product(artisan_id=make_artisan())
+    cursor = load_marketplace_page(limit=1)[2]
+    assert cursor
+
+    with count_queries() as first_page:
+        load_marketplace_page(limit=1)
+    with count_queries() as later_page:
+        load_marketplace_page(cursor, limit=1)
+
+    assert later_page.count == first_page.count
+
+
+def test_feed_cursor_round_trips(db):
+    artisan = load_marketplace_page(limit=1)[0][0]
+
+    assert decode_feed_cursor(encode_feed_cursor(artisan)) == (artisan.created_at, artisan.id)
+
+
+def test_feed_pages_through_artisans_without_created_at(db, client, make_artisan, make_product):
+    from app import Artisan, Product
+
+    undated = [make_artisan(), make_artisan()]
+    for artisan_id in undated:
+        make_product(artisan_id=artisan_id)
+    db.session.execute(db.update(Artisan).where(Artisan.id.in_(undated)).values(created_at=None))
+    db.session.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {'limit': 1, 'cursor': cursor} if cursor else {'limit': 1}
+        response = client.get('/api/marketplace/feed', query_string=params)
+        assert response.status_code == 200
+        page = response.get_json()
+        seen += [artisan['id'] for artisan in page['artisans']]
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    expected = db.session.scalars(db.select(Artisan.id).where(
+        Artisan.id.in_(db.select(Product.artisan_id).where(Product.status == 'published'))
+    )).all()
+    assert sorted(seen) == sorted(expected)
+    assert seen[-2:] == sorted(undated, reverse=True)
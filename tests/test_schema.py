@@ -0,0 +1,68 @@
+import pytest
+
+import schema
+from search import install_search_index, search_index_ddl
+
+
+@pytest.fixture
+def applied(app, db, monkeypatch):
+    """ensure_schema against the test database, recording create_all() and install calls"""
+    from app import SchemaVersion
+
+    calls = []
+    monkeypatch.setattr(db, 'create_all', lambda: calls.append('create_all'))
+
+    def ensure(extra_ddl=None, **kwargs):
+        extra = search_index_ddl() if extra_ddl is None else extra_ddl
+        return schema.ensure_schema(db, SchemaVersion.__table__, extra,
+                                    lambda engine: calls.append('install'), **kwargs)
+
+    yield ensure, calls
+    # Leave the real fingerprint behind for the tests that follow
+    schema.ensure_schema(db, SchemaVersion.__table__, search_index_ddl(), install_search_index, force=True)
+
+
+def test_matching_fingerprint_skips_create_all(applied):
+    ensure, calls = applied
+
+    assert ensure() is False
+    assert calls == []
+
+
+def test_changed_fingerprint_reapplies_the_schema(applied, db):
+    from app import SchemaVersion
+
+    ensure, calls = applied
+
+    assert ensure(extra_ddl=['CREATE INDEX ix_schema_test ON product (name)']) is True
+    assert calls == ['create_all', 'install']
+    assert schema.stored_fingerprint(db.engine, SchemaVersion.__table__) == schema.fingerprint(
+        db.metadata, ['CREATE INDEX ix_schema_test ON product (name)'])
+
+    assert ensure() is True  # back to the real DDL: a mismatch again
+    assert ensure() is False
+    assert calls == ['create_all', 'install'] * 2
+
+
+def test_force_reapplies_a_matching_schema(applied):
+    ensure, calls = applied
+
+    assert ensure(force=True) is True
+    assert calls == ['create_all', 'install']
+
+
+def test_fingerprint_tracks_model_changes():
+    from sqlalchemy import Column, Integer, MetaData, String, Table
+
+    def metadata(*columns):
+        meta = MetaData()
+        Table('widget', meta, Column('id', Integer, primary_key=True), *columns)
+        return meta
+
+    base = schema.fingerprint(metadata())
+
+    assert schema.fingerprint(metadata()) == base
+    assert schema.fingerprint(metadata(Column('name', String(80)))) != base
+    assert schema.fingerprint(metadata(Column('name', String(80), index=True))) != \
+        schema.fingerprint(metadata(Column('name', String(80))))
+    assert schema.fingerprint(metadata(), ['CREATE INDEX x ON widget (id)']) != base
@@ -0,0 +1,129 @@
+import uuid
+
+import pytest
+
+import search
+
+
+@pytest.fixture
+def without_fts(monkeypatch):
+    monkeypatch.setattr(search, 'fts_available', lambda engine: False)
+
+
+def test_escape_like_escapes_wildcards_and_the_escape_character():
+    assert search.escape_like('50%_off\\') == '50\\%\\_off\\\\'
+
+
+def test_autocomplete_fallback_treats_wildcards_literally(db, make_product, without_fts):
+    run = uuid.uuid4().hex[:6]
+    percent = make_product(name=f'{run}% Cotton Shawl')
+    make_product(name=f'{run}0 Cotton Shawl')
+    underscore = make_product(name=f'{run}_x Bowl')
+    make_product(name=f'{run}yx Bowl')
+
+    def suggested(query):
+        return [row['id'] for row in search.autocomplete(query) if row['type'] == 'product']
+
+    assert suggested(f'{run}%') == [percent]
+    assert suggested(f'{run}_') == [underscore]
+
+
+def test_like_search_treats_underscores_literally(db, make_product):
+    run = uuid.uuid4().hex[:6]
+    literal = make_product(name=f'Vase {run}_blue')
+    make_product(name=f'Vase {run}xblue')
+
+    assert search.like_search_products(f'{run}_blue')['product_ids'] == [literal]
+
+
+@pytest.fixture
+def fts(db):
+    if not search.fts_available(db.engine):
+        pytest.skip('SQLite FTS5 not compiled in')
+
+
+@pytest.fixture
+def term():
+    """A word no other test's rows contain"""
+    return 'q' + uuid.uuid4().hex[:8]
+
+
+def test_bm25_ranks_name_matches_above_description_matches(db, fts, make_product, term):
+    in_enrichment = make_product(ai_enriched_description=f'Fired in a {term} kiln')
+    in_description = make_product(description=f'Glazed with {term} ash')
+    in_name = make_product(name=f'{term} Vase')
+
+    assert search.search_products(term)['product_ids'] == [in_name, in_description, in_enrichment]
+
+
+def test_search_api_returns_hits_in_rank_order(client, fts, make_product, term):
+    in_description = make_product(description=f'Glazed with {term} ash')
+    in_name = make_product(name=f'{term} Bowl')
+
+    body = client.get(f'/api/search?q={term}').get_json()
+
+    assert [product['id'] for product in body['products']] == [in_name, in_description]
+    assert body['total'] == 2
+
+
+def test_product_edits_reach_the_index(db, fts, make_product, term):
+    from app import Product
+
+    product_id = make_product(name=f'{term} Jug')
+    product = db.session.get(Product, product_id)
+
+    product.name = 'Plain Jug'
+    db.session.commit()
+    assert search.search_products(term)['product_ids'] == []
+
+    product.description = f'Now described as {term}'
+    db.session.commit()
+    assert search.search_products(term)['product_ids'] == [product_id]
+
+    db.session.delete(product)
+    db.session.commit()
+    assert search.search_products(term)['product_ids'] == []
+
+
+def test_unpublished_products_are_not_found(db, fts, make_product, term):
+    make_product(name=f'{term} Draft', status='draft')
+
+    assert search.search_products(term)['total'] == 0
+
+
+def test_artisan_edits_reach_their_products(db, fts, make_artisan, make_product, term):
+    from app import Artisan
+
+    artisan_id = make_artisan()
+    product_id = make_product(artisan_id=artisan_id)
+
+    db.session.get(Artisan, artisan_id).location = f'{term} Village'
+    db.session.commit()
+
+    assert search.search_products(term)['product_ids'] == [product_id]
+
+
+def test_facets_count_every_match(db, fts, make_artisan, make_product, term):
+    jaipur, pune = make_artisan(location='Jaipur'), make_artisan(location='Pune')
+    for category, artisan_id in (('Pottery', jaipur), ('Pottery', pune), ('Textiles', jaipur)):
+        make_product(name=f'{term} {category}', category=category, artisan_id=artisan_id)
+
+    results = search.search_products(term, limit=1)
+
+    assert (results['total'], len(results['product_ids'])) == (3, 1)
+    assert results['facets'] == {
+        'category': [{'value': 'Pottery', 'count': 2}, {'value': 'Textiles', 'count': 1}],
+        'location': [{'value': 'Jaipur', 'count': 2}, {'value': 'Pune', 'count': 1}],
+    }
+
+
+def test_autocomplete_matches_prefixes_of_artisans_and_products(db, fts, make_artisan, make_product, term):
+    artisan_id = make_artisan(name=f'{term}ika Devi')
+    product_id = make_product(name=f'{term}ware Platter')
+
+    suggestions = search.autocomplete(term[:7])
+
+    assert suggestions == [
+        {'type': 'artisan', 'id': artisan_id, 'text': f'{term}ika Devi'},
+        {'type': 'product', 'id': product_id, 'text': f'{term}ware Platter'},
+    ]
@@ -0,0 +1,82 @@
+import json
+import time
+
+import pytest
+
+from streaming import stream_generation, wants_stream
+from upstream import CircuitBreaker, UpstreamClient
+
+
+def events(response):
+    """(event, payload) pairs of an SSE body"""
+    parsed = []
+    for message in response.get_data(as_text=True).split('\n\n'):
+        if message:
+            lines = dict(line.split(': ', 1) for line in message.split('\n'))
+            parsed.append((lines.get('event'), json.loads(lines['data'])))
+    return parsed
+
+
+def test_chunks_then_done_with_the_full_text(app):
+    with app.test_request_context():
+        response = stream_generation(iter(['Hand', 'made ', 'clay']), 'bio', {'tone': 'warm'})
+
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache'
+        assert events(response) == [
+            ('chunk', {'text': 'Hand'}),
+            ('chunk', {'text': 'made '}),
+            ('chunk', {'text': 'clay'}),
+            ('done', {'success': True, 'bio': 'Handmade clay', 'tone': 'warm'}),
+        ]
+
+
+def test_finish_post_processes_only_the_done_payload(app):
+    with app.test_request_context():
+        response = stream_generation(iter(['"Title"  ']), 'title', finish=lambda text: text.strip().strip('"'))
+
+        assert events(response)[-1] == ('done', {'success': True, 'title': 'Title'})
+
+
+def test_failure_mid_stream_ends_with_an_error_event(app):
+    def chunks():
+        yield 'Partial'
+        raise RuntimeError('upstream dropped the connection')
+
+    with app.test_request_context():
+        response = stream_generation(chunks(), 'description')
+
+        assert events(response) == [
+            ('chunk', {'text': 'Partial'}),
+            ('error', {'success': False, 'error': 'upstream dropped the connection'}),
+        ]
+
+
+@pytest.mark.parametrize('path, headers, expected', [
+    ('/?stream=1', {}, True),
+    ('/?stream=true', {}, True),
+    ('/', {'Accept': 'text/event-stream'}, True),
+    ('/?stream=0', {}, False),
+    ('/', {'Accept': 'application/json'}, False),
+])
+def test_wants_stream(app, path, headers, expected):
+    with app.test_request_context(path, headers=headers):
+        assert wants_stream() is expected
+
+
+def test_abandoned_stream_releases_the_half_open_trial(app):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    client = UpstreamClient('stream-test', breaker=breaker, timeout=5)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    with app.test_request_context():
+        response = stream_generation(client.stream(lambda: iter(['one', 'two', 'three'])), 'bio')
+        body = iter(response.response)
+        assert next(body).startswith('event: chunk')
+        assert not breaker.allow()  # the stream holds the single trial
+
+        response.close()  # the client went away
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
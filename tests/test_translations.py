@@ -0,0 +1,162 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+import translations
+from config import Config
+
+
+class StubTranslateClient:
+    """Records every upstream batch and answers with the target language prefixed"""
+
+    def __init__(self, delay=0.0, available=True):
+        self.delay = delay
+        self.available = available
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def translation_available(self):
+        return self.available
+
+    def translate_batch(self, texts, target_language, source_language=None):
+        with self.lock:
+            self.batches.append(list(texts))
+        time.sleep(self.delay)
+        return [f'[{target_language}] {text}' for text in texts]
+
+
+@pytest.fixture
+def stub_client(monkeypatch):
+    client = StubTranslateClient()
+    monkeypatch.setattr(translations, '_client', client)
+    return client
+
+
+def unique_texts(n):
+    run = uuid.uuid4().hex[:8]
+    return [f'Hand-thrown bowl {run} number {i}' for i in range(n)]
+
+
+def test_misses_are_translated_and_stored(db, stub_client):
+    texts = unique_texts(3)
+
+    assert translations.translate_segments(texts, 'hi') == [f'[hi] {text}' for text in texts]
+    assert translations.translate_segments(texts, 'hi') == [f'[hi] {text}' for text in texts]
+    assert stub_client.batches == [texts]
+
+
+def test_store_is_keyed_by_content_not_row(db, stub_client):
+    text = unique_texts(1)[0]
+    translations.translate_segments([text], 'hi')
+
+    # Reflowed whitespace and repeats are the same segment
+    results = translations.translate_segments([text, f'  {text}\n', text], 'hi')
+
+    assert results == [f'[hi] {text}'] * 3
+    assert len(stub_client.batches) == 1
+
+
+def test_only_misses_go_upstream(db, stub_client):
+    stored, new = unique_texts(2), unique_texts(2)
+    translations.translate_segments(stored, 'hi')
+
+    translations.translate_segments(stored + new, 'hi')
+
+    assert stub_client.batches[-1] == new
+
+
+def test_misses_are_grouped_into_bounded_batches(db, stub_client, monkeypatch):
+    monkeypatch.setattr(Config, 'TRANSLATE_BATCH_SIZE', 2)
+    texts = unique_texts(5)
+
+    translations.translate_segments(texts + texts[:2], 'hi')
+
+    assert stub_client.batches == [texts[0:2], texts[2:4], texts[4:5]]
+
+
+def test_batches_are_bounded_by_characters(db, stub_client, monkeypatch):
+    texts = unique_texts(3)
+    monkeypatch.setattr(Config, 'TRANSLATE_BATCH_MAX_CHARS', len(texts[0]) * 2)
+
+    translations.translate_segments(texts, 'hi')
+
+    assert [len(batch) for batch in stub_client.batches] == [2, 1]
+
+
+def test_concurrent_identical_requests_share_one_upstream_call(app, stub_client):
+    stub_client.delay = 0.2
+    texts = unique_texts(2)
+    shared_before = translations.inflight.shared
+    results = []
+    start = threading.Barrier(4)
+
+    def request():
+        start.wait()
+        with app.app_context():
+            results.append(translations.translate_cached(texts, 'hi'))
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stub_client.batches == [texts]
+    assert results == [[f'[hi] {text}' for text in texts]] * 4
+    assert translations.inflight.shared - shared_before == 3
+
+
+def test_single_flight_shares_errors_and_then_forgets_the_key():
+    flight = translations.SingleFlight()
+
+    def fail():
+        raise RuntimeError('upstream down')
+
+    with pytest.raises(RuntimeError):
+        flight.do('key', fail)
+    assert flight.do('key', lambda: 'recovered') == 'recovered'
+
+
+def test_pretranslation_is_not_queued_without_a_usable_client(db, monkeypatch):
+    monkeypatch.setattr(translations, '_client', StubTranslateClient(available=False))
+    assert translations.enqueue_pretranslation(product_ids=[1]) is None
+    assert translations.pretranslate(product_ids=[1]) == {}
+
+    monkeypatch.setattr(translations, '_client', None)
+    assert translations.enqueue_pretranslation(product_ids=[1]) is None
+
+
+def test_pretranslation_is_not_queued_without_target_languages(db, stub_client, monkeypatch):
+    monkeypatch.setattr(Config, 'TRANSLATION_TARGET_LANGUAGES', [])
+
+    assert translations.enqueue_pretranslation(product_ids=[1]) is None
+
+
+def test_product_create_without_translate_queues_no_translation_job(artisan_client, db):
+    from app import Job
+
+    def translation_jobs():
+        return db.session.scalar(db.select(db.func.count()).where(Job.kind == 'pretranslate_content'))
+
+    before = translation_jobs()
+    response = artisan_client.post('/api/products/create', json={
+        'name': 'Untranslated Bowl', 'description': 'Wheel-thrown stoneware', 'price': 450
+    })
+
+    assert response.status_code == 200
+    assert translation_jobs() == before
+
+
+def test_pretranslate_stores_bios_in_every_target_language(db, stub_client, make_artisan, monkeypatch):
+    from app import Artisan
+
+    monkeypatch.setattr(Config, 'TRANSLATION_TARGET_LANGUAGES', ['hi', 'ta'])
+    bio = unique_texts(1)[0]
+    artisan_id = make_artisan(bio=bio)
+
+    assert translations.pretranslate(artisan_ids=[artisan_id]) == {'hi': 1, 'ta': 1}
+    source_hash = translations.content_hash(bio)
+    assert translations.lookup([source_hash], 'ta') == {source_hash: f'[ta] {bio}'}
+    assert db.session.get(Artisan, artisan_id).bio == bio
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from upstream import (CircuitBreaker, CircuitOpenError, UpstreamBusyError, UpstreamClient,
+                      UpstreamTimeoutError)
+
+
+def fail():
+    raise RuntimeError('upstream error')
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_breaker_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+    assert breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_client_rejects_calls_once_the_circuit_opens():
+    client = UpstreamClient('test', breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            client.call(fail)
+    upstream_calls = []
+
+    with pytest.raises(CircuitOpenError):
+        client.call(upstream_calls.append, 'never sent')
+
+    assert upstream_calls == []
+    assert not client.available()
+    assert (client.counters['failed'], client.counters['rejected_open']) == (2, 1)
+
+
+def test_slow_call_times_out_and_counts_as_a_failure():
+    client = UpstreamClient('test', timeout=0.05)
+
+    with pytest.raises(UpstreamTimeoutError):
+        client.call(time.sleep, 0.5)
+
+    assert (client.counters['timed_out'], client.breaker.failures) == (1, 1)
+
+
+def test_saturated_client_rejects_without_tripping_the_breaker():
+    client = UpstreamClient('test', max_concurrency=1, timeout=1)
+    release = threading.Event()
+    holder = threading.Thread(target=client.call, args=(release.wait,))
+    holder.start()
+    while client.in_flight == 0:
+        time.sleep(0.01)
+
+    with pytest.raises(UpstreamBusyError):
+        client.call(lambda: 'second', timeout=0.05)
+    release.set()
+    holder.join()
+
+    assert client.breaker.failures == 0
+    assert client.call(lambda: 'after') == 'after'
+
+
+def test_stream_yields_chunks_and_records_first_chunk_latency():
+    client = UpstreamClient('test')
+
+    assert list(client.stream(lambda: iter(['a', 'b', 'c']))) == ['a', 'b', 'c']
+
+    stats = client.stats()
+    assert stats['succeeded'] == 1
+    assert stats['first_chunk_ms']['p50'] is not None
+
+
+def test_abandoned_stream_is_not_a_failure():
+    client = UpstreamClient('test', breaker=CircuitBreaker(failure_threshold=1))
+    stream = client.stream(lambda: iter(range(100)))
+
+    assert next(stream) == 0
+    stream.close()
+
+    assert client.breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,216 @@
+"""
+Translation Store - Content-addressed cache of translated segments
+Translations are keyed by a hash of the source text, so identical bios and
+descriptions are translated once no matter how many rows share them. Misses
+are sent upstream in batches, and concurrent identical misses share one call.
+"""
+
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import Config
+from upserts import insert_on_conflict
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+
+def configure(client):
+    """Set the translate client: anything with translate_batch(texts, target, source) -> list or None.
+
+    A client may also define translation_available(); pre-translation is skipped while it returns False.
+    """
+    global _client
+    _client = client
+
+
+def available() -> bool:
+    """Whether pre-translation can do anything: target languages and a client that can reach upstream"""
+    if _client is None or not target_languages():
+        return False
+    check = getattr(_client, 'translation_available', None)
+    return check() if check else True
+
+
+def content_hash(text: str, source_language: Optional[str] = None) -> str:
+    """Key for a source segment; whitespace-normalized so reflowed text still hits"""
+    normalized = ' '.join(text.split())
+    return hashlib.sha256(f"{source_language or 'auto'}\x00{normalized}".encode('utf-8')).hexdigest()
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution"""
+
+    class _Call:
+        __slots__ = ('done', 'result', 'error')
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls: Dict[Any, 'SingleFlight._Call'] = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+inflight = SingleFlight()
+
+
+def _insert_ignore(table):
+    """INSERT that skips rows another worker stored first"""
+    from app import db
+
+    return insert_on_conflict(db.engine, table).on_conflict_do_nothing(
+        index_elements=[table.c.source_hash, table.c.target_language]
+    )
+
+
+def lookup(hashes: Iterable[str], target_language: str) -> Dict[str, str]:
+    """Stored translations for the given source hashes, in one query"""
+    from app import db, Translation
+
+    hashes = list(set(hashes))
+    if not hashes:
+        return {}
+    rows = db.session.execute(db.select(Translation.source_hash, Translation.translated_text).where(
+        Translation.target_language == target_language,
+        Translation.source_hash.in_(hashes)
+    )).all()
+    return dict(rows)
+
+
+def _batches(segments: Sequence[Tuple[str, str]], size: int, max_chars: int):
+    """Split (hash, text) segments into upstream requests bounded by count and total characters"""
+    batch, chars = [], 0
+    for segment in segments:
+        length = len(segment[1])
+        if batch and (len(batch) >= size or chars + length > max_chars):
+            yield batch
+            batch, chars = [], 0
+        batch.append(segment)
+        chars += length
+    if batch:
+        yield batch
+
+
+def translate_segments(texts: Sequence[str], target_language: str,
+                       source_language: Optional[str] = None, client=None) -> List[Optional[str]]:
+    """Translate many segments, serving from the store and batching the misses upstream.
+
+    Returns one entry per input; None where no translation could be produced.
+    Only real upstream results are stored.
+    """
+    from app import db, Translation
+    from datetime import datetime
+
+    client = client or _client
+    hashes = [content_hash(text, source_language) for text in texts]
+    found = lookup(hashes, target_language)
+
+    # Each distinct missing segment is sent once
+    missing = {}
+    for text, source_hash in zip(texts, hashes):
+        if source_hash not in found and text.strip():
+            missing.setdefault(source_hash, text)
+
+    if missing and client is not None:
+        new_rows = []
+        for batch in _batches(list(missing.items()), Config.TRANSLATE_BATCH_SIZE, Config.TRANSLATE_BATCH_MAX_CHARS):
+            translated = client.translate_batch([text for _, text in batch], target_language, source_language)
+            if not translated:
+                continue
+            for (source_hash, _), result in zip(batch, translated):
+                found[source_hash] = result
+                new_rows.append({
+                    'source_hash': source_hash,
+                    'target_language': target_language,
+                    'translated_text': result,
+                    'created_at': datetime.utcnow()
+                })
+
+        if new_rows:
+            db.session.execute(_insert_ignore(Translation.__table__), new_rows)
+            db.session.commit()
+
+    return [found.get(source_hash) for source_hash in hashes]
+
+
+def translate_cached(texts: Sequence[str], target_language: str,
+                     source_language: Optional[str] = None) -> List[Optional[str]]:
+    """translate_segments behind a single-flight guard for identical concurrent requests"""
+    key = (target_language, source_language, tuple(content_hash(text, source_language) for text in texts))
+    return inflight.do(key, lambda: translate_segments(texts, target_language, source_language))
+
+
+def target_languages() -> List[str]:
+    return list(Config.TRANSLATION_TARGET_LANGUAGES)
+
+
+def enqueue_pretranslation(artisan_ids: Iterable[int] = (), product_ids: Iterable[int] = ()):
+    """Queue a job translating the given bios and descriptions; the caller dispatches it after commit"""
+    from jobs import enqueue
+
+    artisan_ids, product_ids = sorted(set(artisan_ids)), sorted(set(product_ids))
+    if not (artisan_ids or product_ids) or not available():
+        return None
+    return enqueue('pretranslate_content', {'artisan_ids': artisan_ids, 'product_ids': product_ids})
+
+
+def pretranslate(artisan_ids: Iterable[int] = (), product_ids: Iterable[int] = ()) -> Dict[str, int]:
+    """Translate artisan bios and enriched product descriptions into every target language"""
+    from app import db, Artisan, Product
+
+    if not available():
+        logger.info('No translate client or target languages configured, skipping pre-translation')
+        return {}
+
+    texts = []
+    if artisan_ids:
+        texts += db.session.scalars(db.select(Artisan.bio).where(
+            Artisan.id.in_(list(artisan_ids)), Artisan.bio.isnot(None)
+        )).all()
+    if product_ids:
+        texts += db.session.scalars(db.select(Product.ai_enriched_description).where(
+            Product.id.in_(list(product_ids)), Product.ai_enriched_description.isnot(None)
+        )).all()
+
+    texts = [text for text in texts if text.strip()]
+    translated = {}
+    for language in target_languages():
+        results = translate_segments(texts, language)
+        if texts and not any(results):
+            # Nothing came back at all: let the job retry with backoff
+            raise RuntimeError(f'Translation to {language} unavailable')
+        translated[language] = sum(1 for result in results if result)
+    return translated
@@ -0,0 +1,21 @@
+"""
+Upserts - INSERT ... ON CONFLICT for the databases that support it
+SQLite and PostgreSQL share SQLAlchemy's on_conflict_do_nothing() and
+on_conflict_do_update() API but expose it from their own dialect modules;
+this picks the right one for the bind a statement will run on.
+"""
+
+
+def insert_on_conflict(bind, table):
+    """Dialect INSERT for `table` offering on_conflict_do_nothing() and on_conflict_do_update().
+
+    `bind` is the engine or connection the statement will run on.
+    """
+    dialect = bind.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"INSERT ... ON CONFLICT needs SQLite or PostgreSQL, not {dialect}")
+    return insert(table)
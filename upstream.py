@@ -0,0 +1,288 @@
+"""
+Upstream Client - Bounded, deadline-aware calls to external AI APIs
+Each upstream (Gemini, Translate) gets its own concurrency limit, per-call
+deadline and circuit breaker, so a slow or failing API degrades to the local
+fallbacks instead of tying up every worker thread.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 256  # recent successful calls (and first stream chunks) kept for percentiles
+
+
+class UpstreamError(Exception):
+    """Base class for calls that never produced an upstream response"""
+
+
+class UpstreamBusyError(UpstreamError):
+    """No concurrency slot became free before the call's deadline"""
+
+
+class UpstreamTimeoutError(UpstreamError):
+    """The upstream did not answer before the call's deadline"""
+
+
+class CircuitOpenError(UpstreamError):
+    """The breaker is open; the call was rejected without contacting the upstream"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open -> closed.
+
+    After `failure_threshold` failures in a row the breaker opens and rejects
+    calls for `reset_timeout` seconds, then lets a single trial call through.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go to the upstream right now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def release_trial(self):
+        """Give back a half-open trial slot for a call that never reached the upstream"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._state = self.CLOSED
+            self._trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Count a failed call. Returns True if this failure opened the circuit."""
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self._state != self.HALF_OPEN and self.failures < self.failure_threshold:
+                return False
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            return True
+
+
+class UpstreamClient:
+    """Runs calls to one upstream with a concurrency limit, a deadline and a breaker.
+
+    Calls execute on a pool sized to `max_concurrency`. A call that misses its
+    deadline is abandoned by the caller but keeps its slot until the upstream
+    actually returns, so the limit always reflects real in-flight requests.
+    """
+
+    def __init__(self, name: str, max_concurrency: int = 4, timeout: float = 10,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.in_flight = 0
+        self.counters = {'calls': 0, 'succeeded': 0, 'failed': 0, 'timed_out': 0,
+                         'rejected_busy': 0, 'rejected_open': 0}
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._first_chunk_latencies = deque(maxlen=LATENCY_WINDOW)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f'upstream-{name}')
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def _release(self, future):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def _record_failure(self):
+        if self.breaker.record_failure():
+            logger.warning(f"{self.name} circuit opened after {self.breaker.failures} consecutive failures")
+
+    def available(self) -> bool:
+        """False while the breaker is open, so callers can skip straight to a fallback"""
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    def _acquire(self, deadline: float):
+        """Pass the breaker and take a concurrency slot before `deadline`, or raise"""
+        self._count('calls')
+
+        if not self.breaker.allow():
+            self._count('rejected_open')
+            raise CircuitOpenError(f'{self.name} circuit is open')
+
+        if not self._slots.acquire(timeout=max(deadline - time.monotonic(), 0)):
+            # Saturation is our own back-pressure, not a sign the upstream is unhealthy
+            self.breaker.release_trial()
+            self._count('rejected_busy')
+            raise UpstreamBusyError(f'{self.name} has {self.max_concurrency} calls in flight')
+
+        with self._lock:
+            self.in_flight += 1
+
+    def call(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Call `fn(*args, **kwargs)` against the upstream within the deadline.
+
+        Raises CircuitOpenError, UpstreamBusyError or UpstreamTimeoutError
+        without a result; exceptions raised by `fn` itself propagate unchanged.
+        """
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout)
+        self._acquire(deadline)
+        started = time.monotonic()
+        future = self._executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(self._release)
+
+        try:
+            result = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            self._count('timed_out')
+            self._record_failure()
+            raise UpstreamTimeoutError(f'{self.name} did not respond within the deadline')
+        except Exception:
+            self._count('failed')
+            self._record_failure()
+            raise
+
+        self._latencies.append(time.monotonic() - started)
+        self._count('succeeded')
+        self.breaker.record_success()
+        return result
+
+    def stream(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Iterator[Any]:
+        """Iterate the chunks of `fn(*args, **kwargs)`, a streaming upstream call.
+
+        The stream is read on the upstream's pool, so it holds a concurrency slot
+        until it ends. `timeout` bounds the wait for the first chunk and then
+        for each following one. A consumer that stops early cancels the stream.
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        deadline = time.monotonic() + timeout
+        self._acquire(deadline)
+        chunks = queue.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            try:
+                for chunk in fn(*args, **kwargs):
+                    if cancelled.is_set():
+                        return
+                    chunks.put(('chunk', chunk))
+                chunks.put(('done', None))
+            except Exception as e:
+                chunks.put(('error', e))
+
+        started = time.monotonic()
+        future = self._executor.submit(produce)
+        future.add_done_callback(self._release)
+        first = True
+        finished = False
+
+        try:
+            while True:
+                try:
+                    kind, value = chunks.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    finished = True
+                    self._count('timed_out')
+                    self._record_failure()
+                    raise UpstreamTimeoutError(f'{self.name} stream stalled past the deadline')
+
+                if kind == 'error':
+                    finished = True
+                    self._count('failed')
+                    self._record_failure()
+                    raise value
+                if kind == 'done':
+                    finished = True
+                    self._latencies.append(time.monotonic() - started)
+                    self._count('succeeded')
+                    self.breaker.record_success()
+                    return
+
+                if first:
+                    self._first_chunk_latencies.append(time.monotonic() - started)
+                    first = False
+                deadline = time.monotonic() + timeout
+                yield value
+        finally:
+            # Stop reading a stream nobody is consuming any more; its slot frees when it does
+            cancelled.set()
+            if not finished:
+                # Abandoned by the consumer: neither a success nor an upstream failure
+                self.breaker.release_trial()
+
+    def stats(self) -> Dict[str, Any]:
+        def percentiles(samples):
+            samples = sorted(samples)
+
+            def percentile(p):
+                return round(samples[min(int(len(samples) * p), len(samples) - 1)] * 1000, 1) if samples else None
+
+            return {'p50': percentile(0.5), 'p95': percentile(0.95), 'max': percentile(1.0)}
+
+        return {
+            **self.counters,
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'circuit': self.breaker.state,
+            'latency_ms': percentiles(self._latencies),
+            'first_chunk_ms': percentiles(self._first_chunk_latencies)
+        }
+
+
+def build_upstream_client(name: str, config) -> UpstreamClient:
+    """Build the client for `name` ('gemini' or 'translate') from the app config"""
+    prefix = name.upper()
+    breaker = CircuitBreaker(config.UPSTREAM_BREAKER_FAILURES, config.UPSTREAM_BREAKER_RESET)
+    return UpstreamClient(
+        name,
+        getattr(config, f'{prefix}_MAX_CONCURRENCY'),
+        getattr(config, f'{prefix}_TIMEOUT'),
+        breaker
+    )
+
+
+def pooled_http_session(credentials, pool_size: int):
+    """Authorized requests session with a keep-alive pool sized to the upstream's concurrency"""
+    from google.auth.transport.requests import AuthorizedSession
+    from requests.adapters import HTTPAdapter
+
+    session = AuthorizedSession(credentials)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    return session